@@ -0,0 +1,82 @@
+"""Benchmark: convergence of prior statistics with pseudo-random vs QMC sampling.
+
+For increasing ensemble sizes N, compares the per-depth class marginals, the
+per-depth mean log10-resistivity and the water-level distribution of an
+ensemble against a large pseudo-random reference, for each sampler. Errors
+are averaged over several seeds. The last table gives the ensemble size each
+sampler needs to reach the accuracy of the pseudo-random sampler at N_TARGET.
+
+Usage: python benchmark_qmc.py
+"""
+
+import time
+
+import numpy as np
+
+from geoprior1d import get_prior_sample, extract_prior_info
+
+input_file = "examples/data/daugaard_matlab.xlsx"
+depth_max = 90
+depth_step = 1
+sizes = [64, 128, 256, 512, 1024, 2048]
+N_TARGET = 1024
+n_repeats = 5
+n_reference = 2 ** 14
+samplers = ["random", "sobol", "lhs"]
+
+info, _ = extract_prior_info(input_file)
+# The example files have no water table sheet; add one so water levels are sampled
+info['Water Level'] = {'min': np.array([0.0]), 'max': np.array([10.0])}
+z_vec = np.arange(depth_step, depth_max + depth_step, depth_step)
+n_classes = len(info['Classes']['codes'])
+
+
+def statistics(ms, ns):
+    """Per-depth class proportions and mean log10 resistivity."""
+    props = np.stack([(ms == c).mean(axis=0) for c in range(1, n_classes + 1)])
+    return props, np.log10(ns).mean(axis=0)
+
+
+def water_ks(ws):
+    """Kolmogorov-Smirnov distance to the exact uniform water-level distribution."""
+    w = np.sort((ws - 0.0) / 10.0)
+    n = len(w)
+    return max(np.max(np.arange(1, n + 1) / n - w), np.max(w - np.arange(n) / n))
+
+
+print(f"Reference: {n_reference} pseudo-random realizations...")
+t0 = time.time()
+ref = get_prior_sample(info, z_vec, n_reference, n_processes=-1, seed=10**6, progress="silent")
+ref_props, ref_logres = statistics(ref[0], ref[1])
+print(f"  done in {time.time() - t0:.1f} s\n")
+
+errors = {s: {} for s in samplers}
+for sampler in samplers:
+    for N in sizes:
+        e_class, e_res, e_water = [], [], []
+        for r in range(n_repeats):
+            ms, ns, ws, _ = get_prior_sample(info, z_vec, N, n_processes=-1, seed=1000 * r,
+                                             progress="silent", sampler=sampler)
+            props, logres = statistics(ms, ns)
+            e_class.append(np.sqrt(np.mean((props - ref_props) ** 2)))
+            e_res.append(np.sqrt(np.mean((logres - ref_logres) ** 2)))
+            e_water.append(water_ks(ws))
+        errors[sampler][N] = (np.mean(e_class), np.mean(e_res), np.mean(e_water))
+
+for k, label in enumerate(["Class marginal RMSE", "Mean log10-resistivity RMSE",
+                           "Water level KS distance"]):
+    print(label)
+    print("  N      " + "".join(f"{s:>10}" for s in samplers))
+    for N in sizes:
+        print(f"  {N:<7}" + "".join(f"{errors[s][N][k]:10.4f}" for s in samplers))
+    print()
+
+print(f"Realizations needed to match pseudo-random accuracy at N={N_TARGET}")
+print("  statistic        " + "".join(f"{s:>10}" for s in samplers))
+for k, label in enumerate(["class marginals", "log-resistivity", "water level"]):
+    target = errors["random"][N_TARGET][k]
+    needed = []
+    for s in samplers:
+        hits = [N for N in sizes if errors[s][N][k] <= target]
+        needed.append(f"{hits[0]:>10}" if hits else f"{'>' + str(sizes[-1]):>10}")
+    print(f"  {label:<17}" + "".join(needed))
@@ -0,0 +1,79 @@
+"""Benchmark: size and read throughput of M1 storage layouts.
+
+Writes the resistivity of one ensemble as float32 and as uint16/uint8 log10
+codes (see geoprior1d.quantize), each contiguous and chunked with gzip, and
+reports the file size, the maximum relative error against float32 and the
+throughput of a sequential full read and of random row reads, both decoded
+to float32 resistivity.
+
+Usage: python benchmark_storage.py
+"""
+
+import os
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+from geoprior1d import get_prior_sample, extract_prior_info
+from geoprior1d.quantize import M1_ENCODINGS, create_m1, write_m1, read_m1, error_bound
+
+input_file = "examples/data/daugaard_standard.xlsx"
+depth_max = 90
+depth_step = 1
+n_realizations = 20000
+chunk_rows = 1000
+n_random = 2000
+n_repeats = 3
+
+info, _ = extract_prior_info(input_file)
+z_vec = np.arange(depth_step, depth_max + depth_step, depth_step)
+
+print(f"Generating {n_realizations} realizations...")
+_, ns, _, _ = get_prior_sample(info, z_vec, n_realizations, n_processes=-1, seed=1,
+                               progress="silent")
+rng = np.random.default_rng(0)
+rows = np.sort(rng.choice(n_realizations, n_random, replace=False))
+
+
+def best_time(fn):
+    times = []
+    for _ in range(n_repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def read_sequential(name):
+    with h5py.File(name, 'r') as f:
+        for start in range(0, n_realizations, chunk_rows):
+            read_m1(f['M1'], slice(start, start + chunk_rows))
+
+
+def read_random(name):
+    with h5py.File(name, 'r') as f:
+        read_m1(f['M1'], rows)
+
+
+layouts = [(enc, comp) for comp in (None, "gzip") for enc in M1_ENCODINGS]
+print(f"\n{'layout':<18}{'size MB':>9}{'ratio':>8}{'max err %':>11}{'bound %':>9}"
+      f"{'seq Mrows/s':>13}{'rand krows/s':>14}")
+with tempfile.TemporaryDirectory() as tmp:
+    base_size = None
+    for enc, comp in layouts:
+        name = os.path.join(tmp, f"{enc}_{comp}.h5")
+        kwargs = {'chunks': (chunk_rows, ns.shape[1]), 'compression': comp} if comp else {}
+        with h5py.File(name, 'w') as f:
+            write_m1(create_m1(f, *ns.shape, encoding=enc, **kwargs), slice(None), ns)
+        with h5py.File(name, 'r') as f:
+            err = np.max(np.abs(read_m1(f['M1']) / ns - 1))
+        size = os.path.getsize(name)
+        base_size = base_size or size
+        t_seq = best_time(lambda: read_sequential(name))
+        t_rand = best_time(lambda: read_random(name))
+        label = f"{enc}" + (f" + {comp}" if comp else "")
+        print(f"{label:<18}{size / 1e6:9.2f}{base_size / size:8.2f}{100 * err:11.4f}"
+              f"{100 * error_bound(enc):9.4f}{n_realizations / t_seq / 1e6:13.2f}"
+              f"{n_random / t_rand / 1e3:14.1f}")
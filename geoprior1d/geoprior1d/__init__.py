@@ -20,8 +20,12 @@ except PackageNotFoundError:
 # Import main API functions
 from .core import geoprior1d, generate_prior_realizations, save_prior_to_hdf5
 from .io import extract_prior_info
-from .sampling import get_prior_sample
+from .sampling import get_prior_sample, PriorSampler
 from .colormaps import flj_log
+from .memory import estimate_memory
+from .features import query_prior, read_features
+from .reader import PriorFile
+from .thinning import thin_prior
 
 # Define public API
 __all__ = [
@@ -30,5 +34,11 @@ __all__ = [
     "save_prior_to_hdf5",
     "extract_prior_info",
     "get_prior_sample",
+    "PriorSampler",
     "flj_log",
+    "estimate_memory",
+    "query_prior",
+    "read_features",
+    "PriorFile",
+    "thin_prior",
 ]
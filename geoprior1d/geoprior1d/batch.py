@@ -0,0 +1,230 @@
+"""Manifest-driven batch generation of many priors over one worker pool.
+
+A manifest (YAML or JSON) lists jobs, each an input file with optional
+parameter overrides and its own generation settings:
+
+    defaults:
+      n_realizations: 10000
+      dmax: 90
+      dz: 1
+    jobs:
+      - name: standard
+        input: daugaard_standard.xlsx
+        seed: 1
+      - name: valley_dry
+        input: daugaard_valley.xlsx
+        output: out/valley_dry.h5
+        seed: 2
+        overrides:
+          Sections.frequency[2]: 0.25
+
+Relative paths are resolved against the manifest's directory; the default
+output is <name>.h5 next to the manifest. All jobs are scheduled over one
+persistent process pool whose workers cache parsed configurations, and
+blocks are written to each job's output as they arrive. A job is skipped
+when its output exists and carries the same job hash (input file content,
+overrides, settings and package version). Jobs without a seed draw one per
+run, which is part of the hash and stored in the output (`Seed`), so they are
+regenerated on every run.
+"""
+
+import hashlib
+import json
+import os
+from multiprocessing import cpu_count
+
+import h5py
+import numpy as np
+
+from .configs import config_spec, load_config, worker_init, config_block_task, file_digest
+from .core import create_prior_datasets, write_prior_block, write_prior_provenance
+from .executors import open_executor
+from .progress import get_progress_reporter
+from .rng import SAMPLERS
+from .sampling import _default_block_size, _imap_bounded, _merge_flags
+
+# Per-job settings and their defaults
+JOB_DEFAULTS = {
+    "n_realizations": 1000,
+    "dmax": 90.0,
+    "dz": 1.0,
+    "seed": None,
+    "sampler": "random",
+    "overrides": None,
+}
+
+
+def load_manifest(manifest):
+    """
+    Read a batch manifest and resolve its jobs.
+
+    Args:
+        manifest (str): Path to a .yaml/.yml (requires PyYAML) or .json manifest.
+
+    Returns:
+        list of dict: Jobs with keys name, input, output and JOB_DEFAULTS keys.
+    """
+    with open(manifest) as f:
+        if manifest.lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ImportError("YAML manifests require PyYAML (pip install pyyaml); "
+                                  "JSON manifests work without it") from e
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest))
+    defaults = dict(JOB_DEFAULTS, **(data.get("defaults") or {}))
+    jobs = []
+    for k, entry in enumerate(data.get("jobs") or []):
+        if "input" not in entry:
+            raise ValueError(f"Job {k} in {manifest} has no 'input' file")
+        job = dict(defaults, **entry)
+        unknown = set(job) - set(JOB_DEFAULTS) - {"name", "input", "output"}
+        if unknown:
+            raise ValueError(f"Job {k} in {manifest}: unknown keys {sorted(unknown)}")
+        if job["sampler"] not in SAMPLERS:
+            raise ValueError(f"Job {k} in {manifest}: unknown sampler '{job['sampler']}'")
+        job["name"] = str(job.get("name") or f"{os.path.splitext(os.path.basename(job['input']))[0]}_{k}")
+        job["input"] = os.path.join(base_dir, job["input"])
+        job["output"] = os.path.join(base_dir, job.get("output") or f"{job['name']}.h5")
+        if not job["output"].endswith('.h5'):
+            job["output"] += '.h5'
+        job["n_realizations"] = int(job["n_realizations"])
+        if job["n_realizations"] < 1:
+            raise ValueError(f"Job {k} in {manifest}: n_realizations must be positive")
+        jobs.append(job)
+
+    names = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Job names in {manifest} must be unique")
+    return jobs
+
+
+def job_hash(job):
+    """Hash identifying the output of a job: input content, overrides and settings
+    (with the seed resolved)."""
+    from . import __version__
+    key = {
+        "input": file_digest(job["input"]),
+        "version": __version__,
+    }
+    key.update({k: job[k] for k in JOB_DEFAULTS})
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _is_up_to_date(job, digest):
+    if not os.path.exists(job["output"]):
+        return False
+    try:
+        with h5py.File(job["output"], 'r') as f:
+            return f.attrs.get("Job hash") == digest
+    except OSError:
+        return False
+
+
+def run_batch(manifest, n_processes=-1, force=False, progress=None, max_configs=16):
+    """
+    Run all jobs of a manifest over one persistent process pool.
+
+    Args:
+        manifest (str): Path to the manifest file.
+        n_processes (int): Worker processes (-1 = all cores, 0 = sequential).
+        force (bool): Regenerate jobs even if their output is up to date.
+        progress (optional): Progress sink, see get_prior_sample.
+        max_configs (int): Parsed configurations cached per worker.
+
+    Returns:
+        list of dict: Per job: name, output, status ("generated" or "skipped")
+            and flags.
+    """
+    reporter = get_progress_reporter(progress)
+    jobs = load_manifest(manifest)
+
+    results, pending = [], []
+    for job in jobs:
+        if job["seed"] is None:
+            job["seed"] = int(np.random.randint(0, 1e9))  # Recorded in the output
+        job["hash"] = job_hash(job)
+        if not force and _is_up_to_date(job, job["hash"]):
+            reporter.message(f"[{job['name']}] up to date: {job['output']}")
+            results.append({"name": job["name"], "output": job["output"], "status": "skipped"})
+            continue
+        job["spec"] = config_spec(job["input"], job["dmax"], job["dz"], job["overrides"])
+        pending.append(job)
+
+    if n_processes is not None and n_processes != 0:
+        n_workers = cpu_count() if n_processes == -1 else min(n_processes, cpu_count())
+    else:
+        n_workers = 0
+
+    # One flat task list over all jobs keeps the pool busy across job boundaries
+    tasks, owners = [], []
+    for k, job in enumerate(pending):
+        N = job["n_realizations"]
+        size = _default_block_size(N, n_workers)
+        kwargs = {"features": True, "sampler": job["sampler"], "n_total": N}
+        for b in range(0, N, size):
+            tasks.append((job["spec"], b, min(b + size, N), job["seed"], kwargs))
+            owners.append(k)
+
+    reporter.start(sum(job["n_realizations"] for job in pending), n_workers)
+
+    def _open(job):
+        """Start writing a job's output (under a temporary name until complete)."""
+        info, z_vec, cmaps = load_config(job["spec"], {}, 1)
+        os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+        job["tmp"] = job["output"] + ".tmp"
+        job["file"] = h5py.File(job["tmp"], 'w')
+        create_prior_datasets(job["file"], info, cmaps, job["dmax"], job["dz"],
+                              job["n_realizations"], len(z_vec))
+        job["class_names"] = info['Classes']['names']
+        job["flags"] = [0, 0, 0]
+
+    def _finish(job):
+        f = job.pop("file")
+        write_prior_provenance(f, job["input"], job["dmax"], job["dz"])
+        f.attrs["Job name"] = job["name"]
+        f.attrs["Job hash"] = job["hash"]
+        f.attrs["Seed"] = job["seed"]
+        f.attrs["Sampler"] = job["sampler"]
+        f.attrs["Overrides"] = job["spec"].overrides
+        f.close()
+        os.replace(job["tmp"], job["output"])
+        flag_vector = job["flags"]
+        flag_vector[2] = flag_vector[2] / job["n_realizations"]
+        reporter.message(f"[{job['name']}] saved {job['n_realizations']} realizations "
+                         f"to {job['output']}")
+        results.append({"name": job["name"], "output": job["output"], "status": "generated",
+                        "flags": flag_vector})
+
+    def _consume(block_results):
+        for k, (task, block) in zip(owners, zip(tasks, block_results)):
+            job = pending[k]
+            _, start, stop = task[:3]
+            if "file" not in job:
+                _open(job)
+            bm, bn, bo, block_flag, block_features = block
+            write_prior_block(job["file"], start, stop, bm, bn, bo, block_features,
+                              job["class_names"])
+            _merge_flags(job["flags"], block_flag)
+            reporter.block_done(stop - start, block_flag)
+            if stop == job["n_realizations"]:
+                _finish(job)
+
+    try:
+        with open_executor("process", n_workers, initializer=worker_init,
+                           initargs=(max_configs,)) as pool:
+            _consume(_imap_bounded(pool, config_block_task, tasks, window=2 * n_workers))
+    finally:
+        # Outputs of jobs cut short are not left behind
+        for job in pending:
+            if "file" in job:
+                job.pop("file").close()
+                os.remove(job["tmp"])
+
+    reporter.finish()
+    order = {job["name"]: k for k, job in enumerate(jobs)}
+    return sorted(results, key=lambda r: order[r["name"]])
@@ -0,0 +1,199 @@
+"""Content-addressed cache of generated prior files.
+
+Pipelines often request the same prior again. With a cache directory, every
+seeded run is stored under a key hashing everything its realizations depend
+on:
+
+    tables     the parsed input tables (content, not file name or date)
+    grid       dmax and dz
+    seed       the base seed (realization i uses seed + i)
+    sampler    and, for "lhs" only, Nreals (its design depends on the run size)
+    version    the geoprior1d version
+    engine     the generation engine
+    layers     whether layer indices are stored
+    encoding   the storage of M1, if not float32
+
+Nreals is otherwise not part of the key: realization i depends only on the
+key and i, so a request for fewer realizations than cached is served from
+the first rows of the cached file. An exact match is copied to the output
+name; a prefix is sliced into a new file chunk by chunk, with its flags
+recomputed from the `tries` feature of its realizations. A larger request
+regenerates and replaces the entry.
+
+Entries are read-only `<key>.h5` copies of the generated files with a
+`<key>.json` sidecar holding the flags of the run. Access times are tracked through the file modification time, and the
+least recently used entries are evicted once the cache exceeds its size limit.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import h5py
+
+from .engines import DEFAULT_ENGINE
+from .features import FEATURES_GROUP, flags_from_tries
+from .io import read_prior_tables, table_to_strings
+from .memory import parse_memory_size
+
+# Rows copied per step when slicing a cached file
+_COPY_CHUNK = 100_000
+
+
+def cache_key(input_data, dmax, dz, seed, sampler="random", Nreals=None, engine=DEFAULT_ENGINE,
+              layers=False, m1_encoding="float32"):
+    """Hex digest identifying the realizations of a seeded run (see module docstring)."""
+    from . import __version__
+
+    h = hashlib.sha256()
+    for key, table in sorted(read_prior_tables(input_data).items()):
+        h.update(json.dumps([key, *table_to_strings(table)]).encode())
+    run = [float(dmax), float(dz), int(seed), sampler, __version__, engine]
+    if sampler == "lhs":
+        run.append(int(Nreals))
+    if layers:
+        run.append("layers")
+    if m1_encoding != "float32":
+        run.append(m1_encoding)
+    h.update(json.dumps(run).encode())
+    return h.hexdigest()
+
+
+def _write_prefix(source, target, n, chunk_size=_COPY_CHUNK):
+    """Write the first n realizations of a prior file to a new file."""
+    with h5py.File(source, 'r') as f, h5py.File(target, 'w') as g:
+        for key, value in f.attrs.items():
+            g.attrs[key] = value
+        datasets = [f[k] for k in f if k.startswith('M') and isinstance(f[k], h5py.Dataset)]
+        if FEATURES_GROUP in f:
+            grp = g.create_group(FEATURES_GROUP)
+            for key, value in f[FEATURES_GROUP].attrs.items():
+                grp.attrs[key] = value
+            datasets += list(f[FEATURES_GROUP].values())
+        for dset in datasets:
+            out = g.create_dataset(dset.name, shape=(n,) + dset.shape[1:], dtype=dset.dtype)
+            for key, value in dset.attrs.items():
+                out.attrs[key] = value
+            for start in range(0, n, chunk_size):
+                stop = min(start + chunk_size, n)
+                out[start:stop] = dset[start:stop]
+
+
+class PriorCache:
+    """
+    Directory of cached prior files with size-based LRU eviction.
+
+        cache = PriorCache("~/.cache/geoprior1d", max_bytes="20G")
+        key = cache_key("prior.xlsx", 90, 1, seed=1)
+        if cache.fetch(key, 10000, "prior.h5") is None:
+            ...  # generate prior.h5
+            cache.store(key, "prior.h5", flag_vector)
+
+    Args:
+        cache_dir (str): Cache directory (created if missing).
+        max_bytes (int or str, optional): Size limit, e.g. "20G" (default: unlimited).
+    """
+
+    def __init__(self, cache_dir, max_bytes=None):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_bytes = parse_memory_size(max_bytes) if max_bytes is not None else None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key, ext=".h5"):
+        return os.path.join(self.cache_dir, key + ext)
+
+    def cached_realizations(self, key):
+        """Number of realizations cached under key (0 if none)."""
+        meta = self._meta(key)
+        return meta['Nreals'] if meta is not None else 0
+
+    def _meta(self, key):
+        if not (os.path.exists(self._path(key)) and os.path.exists(self._path(key, ".json"))):
+            return None
+        with open(self._path(key, ".json")) as fh:
+            return json.load(fh)
+
+    def fetch(self, key, Nreals, output_file):
+        """
+        Serve Nreals realizations of key as output_file, if cached.
+
+        Returns:
+            list or None: The flag vector of the served realizations, or None
+                on a miss.
+        """
+        meta = self._meta(key)
+        if meta is None or meta['Nreals'] < Nreals:
+            return None
+        path = self._path(key)
+        flags = list(meta['flags'])
+        if meta['Nreals'] > Nreals:
+            with h5py.File(path, 'r') as f:
+                if FEATURES_GROUP not in f or 'tries' not in f[FEATURES_GROUP]:
+                    return None  # Entries of older versions: prefix flags unknown
+                flags = flags_from_tries(f[FEATURES_GROUP]['tries'][:Nreals])
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        tmp = output_file + ".tmp"
+        if meta['Nreals'] == Nreals:
+            # A copy (copyfile leaves out the entry's read-only mode)
+            shutil.copyfile(path, tmp)
+        else:
+            _write_prefix(path, tmp, Nreals)
+        os.replace(tmp, output_file)
+        os.utime(path)  # Mark as recently used
+        return flags
+
+    def store(self, key, prior_file, flag_vector):
+        """Add a generated prior file under key (replacing a smaller entry) and evict."""
+        with h5py.File(prior_file, 'r') as f:
+            Nreals = int(f['M1'].shape[0])
+        if self.cached_realizations(key) >= Nreals:
+            os.utime(self._path(key))
+            return
+        tmp = self._path(key, ".h5.tmp")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        # A copy, so the output file stays the user's to modify
+        shutil.copyfile(prior_file, tmp)
+        os.chmod(tmp, 0o444)
+        os.replace(tmp, self._path(key))
+        with open(self._path(key, ".json"), 'w') as fh:
+            json.dump({'Nreals': Nreals, 'flags': [float(v) for v in flag_vector]}, fh)
+        self.evict(keep=key)
+
+    def entries(self):
+        """Cached entries as (key, size in bytes, last use time), least recent first."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".h5"):
+                st = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((name[:-3], st.st_size, st.st_mtime))
+        return sorted(entries, key=lambda e: e[2])
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def remove(self, key):
+        for ext in (".h5", ".json"):
+            if os.path.exists(self._path(key, ext)):
+                os.remove(self._path(key, ext))
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits max_bytes."""
+        if self.max_bytes is None:
+            return
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self.remove(key)
+            total -= size
+
+    def clear(self):
+        for key, _, _ in self.entries():
+            self.remove(key)
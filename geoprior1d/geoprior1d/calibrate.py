@@ -0,0 +1,365 @@
+"""Calibration of section frequencies and probabilities to target proportions.
+
+Borehole databases give the class proportions at depth that a prior should
+reproduce. `calibrate_prior` tunes the Geology2 `Frequency` and
+`Probabilities` of an input file towards
+
+    targets        per-depth class proportions (Depth column plus one column
+                   per class name; missing classes and depths are free)
+    layer_counts   optionally, the distribution of the number of layers
+
+with simultaneous perturbation stochastic approximation (SPSA): every
+iteration perturbs all parameters at once in random +/- directions and
+estimates the gradient from two small batches generated with the same seeds
+(common random numbers), so the cost per iteration does not grow with the
+number of parameters. Candidates are evaluated on lithology only (see
+sampling._lithology_block), with the base configuration resident in the pool
+workers and only the parameter vector sent per task. The returned
+parameters are the average of the iterates over the second half of the run.
+
+Parameters are unconstrained internally: frequencies through the logit,
+probabilities through log-weights normalized by softmax. Zero probabilities
+stay zero, and by default only frequencies strictly between 0 and 1 and the
+probabilities of sections with several types are calibrated.
+"""
+
+import copy
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .executors import open_executor, executor_workers
+from .io import extract_prior_info
+from .progress import get_progress_reporter
+from .sampling import _lithology_block
+
+# Name of the depth column of a target table
+_DEPTH_COLUMN = "Depth"
+
+# Parameter names accepted by calibrate_prior(params=...), e.g. "frequency[0]"
+_PARAM_NAME = re.compile(r"^(?P<kind>frequency|probabilities)\[(?P<section>\d+)\]$")
+
+# Frequencies of 1 (always present) start slightly inside (0, 1) when calibrated
+_FREQ_CLIP = 0.99
+
+# Base configuration of a calibration, set once per worker
+_WORKER_CALIBRATION = None
+
+
+def default_parameters(info):
+    """Parameters calibrated by default: frequencies strictly between 0 and 1
+    and the probabilities of sections with several types."""
+    sections = info['Sections']
+    params = []
+    for i in range(sections['N_sections']):
+        # The frequency of the last section is not used (it fills the column)
+        if i < sections['N_sections'] - 1 and 0 < sections['frequency'][i] < 1:
+            params.append(f"frequency[{i}]")
+        if np.count_nonzero(sections['probabilities'][i]) > 1:
+            params.append(f"probabilities[{i}]")
+    return params
+
+
+def _parse_params(params, info):
+    parsed = []
+    for name in params:
+        match = _PARAM_NAME.match(name)
+        if match is None:
+            raise ValueError(f"Invalid calibration parameter '{name}'; "
+                             "use 'frequency[i]' or 'probabilities[i]'")
+        section = int(match.group('section'))
+        if section >= info['Sections']['N_sections']:
+            raise ValueError(f"Calibration parameter '{name}': no section {section}")
+        parsed.append((match.group('kind'), section))
+    return parsed
+
+
+def encode_parameters(info, params):
+    """Unconstrained parameter vector of info for the given parameter names."""
+    theta = []
+    for kind, i in _parse_params(params, info):
+        if kind == 'frequency':
+            f = np.clip(info['Sections']['frequency'][i], 1 - _FREQ_CLIP, _FREQ_CLIP)
+            theta.append(np.log(f / (1 - f)))
+        else:
+            p = np.asarray(info['Sections']['probabilities'][i], dtype=float)
+            theta.extend(np.log(p[p > 0] / p.sum()))
+    return np.array(theta)
+
+
+def decode_parameters(info, params, theta):
+    """Copy of info with the parameters set from an unconstrained vector."""
+    info = copy.deepcopy(info)
+    sections = info['Sections']
+    sections['frequency'] = np.array(sections['frequency'], dtype=float)
+    pos = 0
+    for kind, i in _parse_params(params, info):
+        if kind == 'frequency':
+            sections['frequency'][i] = 1 / (1 + np.exp(-theta[pos]))
+            pos += 1
+        else:
+            p = np.asarray(sections['probabilities'][i], dtype=float)
+            positive = np.flatnonzero(p > 0)
+            w = np.exp(theta[pos:pos + len(positive)] - np.max(theta[pos:pos + len(positive)]))
+            p = np.zeros(len(p))
+            p[positive] = w / w.sum()
+            sections['probabilities'][i] = p.tolist()
+            pos += len(positive)
+    return info
+
+
+def read_targets(path):
+    """Read a target table (.csv or Excel) with a Depth column and one column per class."""
+    if os.path.splitext(path)[1].lower() == '.csv':
+        return pd.read_csv(path)
+    return pd.read_excel(path)
+
+
+def target_proportions(targets, info, z_vec):
+    """
+    Target class proportions on the depth grid.
+
+    Args:
+        targets (DataFrame or ndarray): Table with a 'Depth' column (m) and
+            columns named after classes (case-insensitive), linearly
+            interpolated to the cell centres; or an (Nz x n_classes) array.
+        info (dict): Prior information dictionary.
+        z_vec (array): Depths to cell bottoms.
+
+    Returns:
+        ndarray: (Nz x n_classes) proportions; NaN where unconstrained
+            (outside the table's depth range, or classes not in the table).
+    """
+    n_classes = len(info['Classes']['names'])
+    if isinstance(targets, np.ndarray):
+        if targets.shape != (len(z_vec), n_classes):
+            raise ValueError(f"Target array must be {len(z_vec)} x {n_classes} (depths x classes)")
+        return targets.astype(float)
+
+    columns = {str(c).strip().lower(): c for c in targets.columns}
+    if _DEPTH_COLUMN.lower() not in columns:
+        raise ValueError(f"Target table needs a '{_DEPTH_COLUMN}' column")
+    depth = targets[columns[_DEPTH_COLUMN.lower()]].astype(float).to_numpy()
+    order = np.argsort(depth)
+    z_vec = np.asarray(z_vec, dtype=float)
+    centres = z_vec - np.diff(np.concatenate(([0.0], z_vec))) / 2
+    inside = (centres >= depth[order[0]]) & (centres <= depth[order[-1]])
+
+    out = np.full((len(z_vec), n_classes), np.nan)
+    known = {str(name).strip().lower(): k for k, name in enumerate(info['Classes']['names'])}
+    for key, col in columns.items():
+        if key == _DEPTH_COLUMN.lower():
+            continue
+        if key not in known:
+            raise ValueError(f"Target column '{col}' is not a class of the prior")
+        values = targets[col].astype(float).to_numpy()[order]
+        out[inside, known[key]] = np.interp(centres[inside], depth[order], values)
+    return out
+
+
+def _layer_count_target(layer_counts):
+    """Target probability of 0..max layers from a dict {n_layers: p} or an array."""
+    if isinstance(layer_counts, dict):
+        pmf = np.zeros(max(int(n) for n in layer_counts) + 1)
+        for n, p in layer_counts.items():
+            pmf[int(n)] = p
+    else:
+        pmf = np.asarray(layer_counts, dtype=float)
+    if np.any(pmf < 0) or pmf.sum() <= 0:
+        raise ValueError("Layer-count targets must be non-negative with a positive sum")
+    return pmf / pmf.sum()
+
+
+def batch_statistics(info, z_vec, n, seed, n_classes=None):
+    """
+    Per-depth class proportions and layer-count histogram of a lithology batch.
+
+    Returns:
+        proportions (ndarray): (Nz x n_classes) fraction of realizations per class.
+        layer_hist (ndarray): Number of realizations with 0, 1, 2, ... layers.
+    """
+    n_classes = n_classes or len(info['Classes']['names'])
+    ms, layer_index, _ = _lithology_block(0, n, info, z_vec, seed)
+    proportions = np.stack([np.mean(ms == k + 1, axis=0) for k in range(n_classes)], axis=1)
+    n_layers = 1 + np.count_nonzero(layer_index[:, 1:] != layer_index[:, :-1], axis=1)
+    return proportions, np.bincount(n_layers)
+
+
+def calibration_loss(proportions, layer_hist, target, layer_target=None, layer_weight=1.0):
+    """Mean squared proportion error over constrained entries, plus layer_weight
+    times the squared error of the layer-count distribution."""
+    mask = ~np.isnan(target)
+    loss = float(np.mean((proportions[mask] - target[mask]) ** 2)) if mask.any() else 0.0
+    if layer_target is not None:
+        size = max(len(layer_hist), len(layer_target))
+        pmf = np.zeros(size)
+        pmf[:len(layer_hist)] = layer_hist / max(layer_hist.sum(), 1)
+        goal = np.zeros(size)
+        goal[:len(layer_target)] = layer_target
+        loss += layer_weight * float(np.sum((pmf - goal) ** 2))
+    return loss
+
+
+def _init_calibration_worker(info, z_vec, params):
+    """Pool initializer: keep the base configuration resident in the worker."""
+    global _WORKER_CALIBRATION
+    _WORKER_CALIBRATION = (info, z_vec, params)
+
+
+def _calibration_task(task):
+    """Pool worker: statistics of one candidate parameter vector."""
+    theta, n, seed = task
+    info, z_vec, params = _WORKER_CALIBRATION
+    return batch_statistics(decode_parameters(info, params, theta), z_vec, n, seed)
+
+
+def _evaluate(pool, candidates, n, seeds, loss):
+    """Losses of candidate vectors, each with its seed (pairs share seeds)."""
+    futures = [pool.submit(_calibration_task, (theta, n, seed))
+               for theta, seed in zip(candidates, seeds)]
+    return [loss(*future.result()) for future in futures]
+
+
+def calibrate_prior(input_data, targets, dmax, dz, output_file=None, layer_counts=None,
+                    layer_weight=1.0, params=None, n_iter=200, batch_size=100,
+                    n_perturbations=None, step=0.3, perturbation=0.2, n_check=None,
+                    n_processes=-1, executor=None, seed=None, progress=None):
+    """
+    Calibrate section frequencies and probabilities to target proportions.
+
+    Args:
+        input_data (str): Path to Excel input file.
+        targets (DataFrame, ndarray or str): Target per-depth class proportions,
+            see target_proportions(); a path is read with read_targets().
+        dmax (float): Maximum depth in meters.
+        dz (float): Depth discretization step in meters.
+        output_file (str, optional): Write the calibrated configuration to
+            this Excel file (a copy of input_data with updated Geology2
+            Frequency and Probabilities).
+        layer_counts (dict or array, optional): Target distribution of the
+            number of layers, {n_layers: probability} or indexed by n_layers.
+        layer_weight (float): Weight of the layer-count term in the loss.
+        params (list, optional): Parameters to calibrate, e.g.
+            ["frequency[0]", "probabilities[1]"] (default: default_parameters()).
+        n_iter (int): SPSA iterations.
+        batch_size (int): Realizations per candidate evaluation.
+        n_perturbations (int, optional): Gradient estimates averaged per
+            iteration (default: enough to keep all workers busy).
+        step (float): Size of the first update in parameter units, used to
+            set the SPSA gain.
+        perturbation (float): SPSA perturbation size in parameter units.
+        n_check (int, optional): Realizations for reporting the loss before
+            and after calibration (default: 20 * batch_size).
+        n_processes (int): Number of workers (-1 = all cores, 0 = sequential).
+        executor (str or Executor, optional): Execution backend.
+        seed (int, optional): Random seed.
+        progress (optional): Progress sink; receives a message every tenth
+            of the iterations.
+
+    Returns:
+        info (dict): Calibrated prior information.
+        history (dict): 'loss' per iteration (mean of the evaluated
+            candidates), 'theta' per iteration, 'params', and
+            'initial_loss'/'final_loss' on n_check realizations.
+    """
+    reporter = get_progress_reporter(progress)
+    info, _ = extract_prior_info(input_data)
+    z_vec = np.arange(dz, dmax + dz, dz)
+    if isinstance(targets, str):
+        targets = read_targets(targets)
+    target = target_proportions(targets, info, z_vec)
+    layer_target = _layer_count_target(layer_counts) if layer_counts is not None else None
+    params = default_parameters(info) if params is None else list(params)
+    if not params:
+        raise ValueError("No parameters to calibrate")
+    theta = encode_parameters(info, params)
+
+    def loss(proportions, layer_hist):
+        return calibration_loss(proportions, layer_hist, target, layer_target, layer_weight)
+
+    rng = np.random.default_rng(seed)
+    if n_processes is not None and n_processes != 0:
+        n_workers = os.cpu_count() if n_processes == -1 else min(n_processes, os.cpu_count())
+    else:
+        n_workers = 0
+    if executor is None:
+        executor = "process" if n_workers > 0 else "sequential"
+    n_workers = executor_workers(executor, n_workers)
+    if n_perturbations is None:
+        n_perturbations = max(1, n_workers // 2)
+    n_check = n_check or 20 * batch_size
+
+    # Standard SPSA gain sequences (Spall, 1998)
+    alpha, gamma, A = 0.602, 0.101, 0.1 * n_iter
+    gain = None
+    history = {'loss': [], 'theta': [], 'params': params}
+
+    with open_executor(executor, n_workers, initializer=_init_calibration_worker,
+                       initargs=(info, z_vec, params)) as pool:
+        check_seed = int(rng.integers(0, 1e9))
+        history['initial_loss'] = _evaluate(pool, [theta], n_check, [check_seed], loss)[0]
+        reporter.message(f"Calibrating {len(theta)} values of {', '.join(params)}; "
+                         f"initial loss {history['initial_loss']:.3g}")
+        iterates = []
+        for k in range(n_iter):
+            c_k = perturbation / (k + 1) ** gamma
+            deltas = rng.choice([-1.0, 1.0], size=(n_perturbations, len(theta)))
+            seeds = rng.integers(0, 1e9, n_perturbations)
+            candidates = [theta + sign * c_k * d for d in deltas for sign in (1, -1)]
+            losses = _evaluate(pool, candidates, batch_size, np.repeat(seeds, 2), loss)
+            diffs = np.array(losses[0::2]) - np.array(losses[1::2])
+            grad = np.mean(diffs[:, None] / (2 * c_k * deltas), axis=0)
+            if gain is None:
+                # Scale the gain so that the first update has size `step`
+                gain = step * (A + 1) ** alpha / max(np.mean(np.abs(grad)), 1e-12)
+            # Noisy gradients are limited to steps of at most `step` per value
+            update = np.clip(gain / (k + 1 + A) ** alpha * grad, -step, step)
+            theta = theta - update
+            iterates.append(theta.copy())
+            history['loss'].append(float(np.mean(losses)))
+            history['theta'].append(theta.copy())
+            if (k + 1) % max(1, n_iter // 10) == 0:
+                reporter.message(f"Iteration {k + 1}/{n_iter}: loss {history['loss'][-1]:.3g}")
+
+        # Iterate averaging over the second half smooths out the SPSA noise
+        theta = np.mean(iterates[n_iter // 2:], axis=0) if iterates else theta
+        history['final_loss'] = _evaluate(pool, [theta], n_check, [check_seed], loss)[0]
+
+    history['loss'] = np.array(history['loss'])
+    history['theta'] = np.array(history['theta'])
+    calibrated = decode_parameters(info, params, theta)
+    reporter.message(f"Calibrated loss {history['final_loss']:.3g} "
+                     f"(initial {history['initial_loss']:.3g})")
+    if output_file is not None:
+        write_calibrated_config(input_data, calibrated, output_file)
+    return calibrated, history
+
+
+def write_calibrated_config(input_file, info, output_file):
+    """
+    Copy an Excel input file with the Geology2 Frequency and Probabilities
+    columns replaced by those of info. Other sheets and cells are unchanged.
+    """
+    from openpyxl import load_workbook
+
+    if os.path.abspath(input_file) != os.path.abspath(output_file):
+        shutil.copyfile(input_file, output_file)
+    wb = load_workbook(output_file)
+    ws = wb['Geology2']
+    header = {str(cell.value).strip(): cell.column for cell in ws[1] if cell.value is not None}
+    for name in ('Frequency', 'Probabilities'):
+        if name not in header:
+            raise ValueError(f"{input_file}: Geology2 sheet has no '{name}' column")
+
+    # Full precision (shortest round-trip repr), so probabilities still sum to 1
+    sections = info['Sections']
+    for i in range(sections['N_sections']):
+        ws.cell(row=i + 2, column=header['Frequency'], value=float(sections['frequency'][i]))
+        probs = sections['probabilities'][i]
+        text = ",".join(repr(float(p)) for p in probs)
+        ws.cell(row=i + 2, column=header['Probabilities'], value=1 if len(probs) == 1 else text)
+    wb.save(output_file)
+    return output_file
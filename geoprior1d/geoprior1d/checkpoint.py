@@ -0,0 +1,194 @@
+"""Checkpointed generation straight to the output file, with resume.
+
+Instead of collecting all realizations in memory and writing at the end,
+blocks are written to the output datasets as they complete. At regular
+intervals the file is flushed and the progress is recorded in a
+`checkpoint` group:
+
+    run_key    hash of the input tables, Nreals, dmax, dz, sampler, engine and layout
+    seed       base seed of the run (realization i uses seed + i)
+    n_done     realizations 0..n_done-1 are complete on disk
+    flags      accumulated generation flags of these realizations
+    n_clipped  values of these realizations clipped by an M1 encoding
+
+Because every realization has its own seed, this is the complete random
+state of the run: a resumed run regenerates realizations n_done.. exactly as
+an uninterrupted run would. The checkpoint group is removed when the run
+completes, leaving a file with the same datasets and attributes as
+save_prior_to_hdf5() writes.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import h5py
+import numpy as np
+
+from .core import prior_filename, create_prior_datasets, write_prior_block, write_prior_provenance
+from .io import extract_prior_info, read_prior_tables, table_to_strings
+from .progress import get_progress_reporter
+from .engines import resolve_engine
+from .lithology import layer_index_dtype
+from .memory import _block_size_for_budget
+from .sampling import PriorSampler, _default_block_size, _split_blocks, _merge_flags
+
+CHECKPOINT_GROUP = "checkpoint"
+
+
+def run_key(input_data, Nreals, dmax, dz, sampler, layers=False, m1_encoding="float32",
+            engine="numpy"):
+    """Hash of everything that must match for a run to be resumed."""
+    h = hashlib.sha256()
+    for key, table in read_prior_tables(input_data).items():
+        h.update(json.dumps([key, *table_to_strings(table)]).encode())
+    run = [int(Nreals), float(dmax), float(dz), sampler]
+    if layers:
+        run.append("layers")
+    if m1_encoding != "float32":
+        run.append(m1_encoding)
+    if engine != "numpy":
+        run.append(engine)
+    h.update(json.dumps(run).encode())
+    return h.hexdigest()
+
+
+def _save_state(f, n_done, flag_vector, n_clipped=0):
+    grp = f[CHECKPOINT_GROUP]
+    grp.attrs['n_done'] = n_done
+    grp.attrs['flags'] = np.asarray(flag_vector, dtype=float)
+    grp.attrs['n_clipped'] = n_clipped
+    f.flush()
+
+
+def _clipped(f):
+    """Clipped-value count of an encoded M1 (see geoprior1d.quantize), else 0."""
+    return int(f['M1'].attrs.get('n_clipped', 0))
+
+
+def _open_run(name, info, cmaps, z_vec, Nreals, dmax, dz, key, seed, resume, reporter,
+              m1_encoding="float32"):
+    """Open the output file for a new or resumed run; return (f, seed, n_done, flags)."""
+    if resume and os.path.exists(name):
+        f = h5py.File(name, 'r+')
+        if CHECKPOINT_GROUP not in f:
+            f.close()
+            raise ValueError(f"{name} has no checkpoint to resume (is the run already complete?)")
+        state = dict(f[CHECKPOINT_GROUP].attrs)
+        if state['run_key'] != key:
+            f.close()
+            raise ValueError(f"{name} was started with a different input file, number of "
+                             f"realizations, dmax, dz, sampler, engine or layout")
+        if seed is not None and int(seed) != int(state['seed']):
+            f.close()
+            raise ValueError(f"{name} was started with seed {int(state['seed'])}, not {seed}")
+        n_done = int(state['n_done'])
+        if 'n_clipped' in f['M1'].attrs:
+            # Blocks past n_done may have been counted before the interruption
+            f['M1'].attrs['n_clipped'] = int(state.get('n_clipped', 0))
+        reporter.message(f"Resuming {name} at realization {n_done} of {Nreals}")
+        return f, int(state['seed']), n_done, [float(v) for v in state['flags']]
+
+    if os.path.exists(name):
+        os.remove(name)
+    if seed is None:
+        seed = np.random.randint(0, 1e9)  # For reproducibility across runs
+    f = h5py.File(name, 'w')
+    create_prior_datasets(f, info, cmaps, dmax, dz, Nreals, len(z_vec), m1_encoding=m1_encoding)
+    grp = f.create_group(CHECKPOINT_GROUP)
+    grp.attrs['run_key'] = key
+    grp.attrs['seed'] = int(seed)
+    flag_vector = [0, 0, 0]
+    _save_state(f, 0, flag_vector)
+    return f, int(seed), 0, flag_vector
+
+
+def run_with_checkpoints(input_data, Nreals, dmax, dz, output_file=None, n_processes=-1,
+                         seed=None, progress=None, sampler="random", executor=None,
+                         checkpoint_every=60.0, resume=False, block_size=None, store_layers=False,
+                         m1_encoding="float32", engine=None, max_memory=None):
+    """
+    Generate a prior straight into its HDF5 file, with periodic checkpoints.
+
+    Args:
+        input_data (str): Path to Excel input file.
+        Nreals (int): Number of realizations.
+        dmax (float): Maximum depth in meters.
+        dz (float): Depth discretization step in meters.
+        output_file (str, optional): Output filename; required to resume, as
+            auto-generated names contain a timestamp.
+        n_processes (int): Number of workers (-1 = all cores, 0 = sequential).
+        seed (int, optional): Base seed. On resume, the stored seed is used and
+            a different explicit seed is an error.
+        progress (optional): Progress sink, see get_prior_sample.
+        sampler (str): "random", "sobol" or "lhs".
+        executor (str or Executor, optional): Execution backend.
+        checkpoint_every (float): Seconds between checkpoints.
+        resume (bool): Continue the interrupted run in output_file if it exists.
+        block_size (int, optional): Realizations per work unit.
+        store_layers (bool): Store the layer index of every cell as features/layer_index.
+        m1_encoding (str): Storage of M1: "float32", "uint16" or "uint8".
+        engine (str, optional): "numpy" (default), "numba" or "auto".
+        max_memory (int or str, optional): Memory budget used to size the
+            blocks; only blocks in flight are held in memory.
+
+    Returns:
+        name (str): Output HDF5 filename.
+        flag_vector (list): Flags indicating issues during generation.
+    """
+    if resume and output_file is None:
+        raise ValueError("Resuming needs an explicit output file")
+    info, cmaps = extract_prior_info(input_data)
+    z_vec = np.arange(dz, dmax + dz, dz)
+    reporter = get_progress_reporter(progress)
+    name = prior_filename(output_file, info, input_data, Nreals, dmax)
+    engine = resolve_engine(engine, sampler)
+    key = run_key(input_data, Nreals, dmax, dz, sampler, store_layers, m1_encoding, engine)
+
+    f, seed_offset, n_done, flag_vector = _open_run(
+        name, info, cmaps, z_vec, Nreals, dmax, dz, key, seed, resume, reporter, m1_encoding)
+
+    with f, PriorSampler(info, z_vec, n_processes, executor, engine=engine) as prior_sampler:
+        if block_size is None:
+            block_size = _default_block_size(Nreals, prior_sampler.n_workers)
+            if max_memory is not None:
+                block_size = min(block_size, _block_size_for_budget(
+                    max_memory, Nreals, len(z_vec), len(info['Classes']['codes']),
+                    prior_sampler.n_workers, features=True,
+                    layer_bytes=layer_index_dtype(info).itemsize if store_layers else 0,
+                    streamed=True))
+        blocks = _split_blocks(Nreals, block_size, start=n_done)
+        reporter.start(Nreals - n_done, prior_sampler.n_workers)
+        last_checkpoint = time.time()
+        n_clipped = _clipped(f)
+        try:
+            for (start, stop), result in prior_sampler.iter_blocks(
+                    blocks, seed_offset, Nreals, features=True, sampler=sampler,
+                    store_layers=store_layers):
+                bm, bn, bo, block_flag, block_features = result
+                write_prior_block(f, start, stop, bm, bn, bo, block_features,
+                                  info['Classes']['names'])
+                # State of the complete rows, updated together once the block is written
+                n_done, n_clipped = stop, _clipped(f)
+                _merge_flags(flag_vector, block_flag)
+                reporter.block_done(stop - start, block_flag)
+                if time.time() - last_checkpoint >= checkpoint_every:
+                    _save_state(f, n_done, flag_vector, n_clipped)
+                    last_checkpoint = time.time()
+        except BaseException:
+            # Keep what is complete (e.g. on Ctrl+C) before giving up
+            _save_state(f, n_done, flag_vector, n_clipped)
+            raise
+        reporter.finish()
+
+        del f[CHECKPOINT_GROUP]
+        write_prior_provenance(f, input_data, dmax, dz)
+
+    # Final warnings if applicable
+    if flag_vector[0] == 1:
+        reporter.warning("Something went wrong. Models may not reflect your input assumptions.")
+    if flag_vector[1] == 1:
+        reporter.warning("Number of layers may not be uniformly distributed.")
+    flag_vector[2] = flag_vector[2] / Nreals if Nreals else 0
+    return name, flag_vector
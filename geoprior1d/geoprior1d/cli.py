@@ -3,24 +3,531 @@
 import argparse
 import os
 import shutil
+import sys
 from pathlib import Path
 from .core import geoprior1d
+from .progress import PROGRESS_SINKS, get_progress_reporter
+from .rng import SAMPLERS
+from .quantize import M1_ENCODINGS
+from .executors import EXECUTORS
+from .engines import ENGINES
 from . import __version__
 
 
-def main():
+def serve_main(argv=None):
+    """CLI entry point for `geoprior1d serve`: run a warm sampling server."""
+    from .server import PriorServer, DEFAULT_ADDRESS
+
+    parser = argparse.ArgumentParser(
+        prog="geoprior1d serve",
+        description="Run a local prior-sampling server that keeps parsed configs "
+                    "and a worker pool resident",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        "-a", "--address",
+        type=str,
+        default=DEFAULT_ADDRESS,
+        help="'host:port' for localhost HTTP, or a path for a Unix socket"
+    )
+
+    parser.add_argument(
+        "-j", "--n-processes",
+        type=int,
+        default=-1,
+        metavar="N",
+        help="Number of workers (-1=all cores, 0=no pool)"
+    )
+
+    parser.add_argument(
+        "-b", "--block-size",
+        type=int,
+        default=250,
+        help="Realizations per worker task"
+    )
+
+    parser.add_argument(
+        "--executor",
+        choices=list(EXECUTORS),
+        default=None,
+        help="Execution backend (default: process, or sequential with -j 0)"
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=list(ENGINES),
+        default="numpy",
+        help="Generation engine: numpy, numba (runs in the server process with "
+             "-j kernel threads unless --executor is given) or auto"
+    )
+
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log requests to stderr"
+    )
+
+    args = parser.parse_args(argv)
+
+    server = PriorServer(args.address, n_workers=args.n_processes,
+                         block_size=args.block_size, verbose=args.verbose,
+                         executor=args.executor, engine=args.engine)
+    print(f"Serving priors on {args.address} with {server.n_workers} workers (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+
+def batch_main(argv=None):
+    """CLI entry point for `geoprior1d batch`: run the jobs of a manifest."""
+    from .batch import run_batch
+
+    parser = argparse.ArgumentParser(
+        prog="geoprior1d batch",
+        description="Generate many priors from a YAML/JSON manifest over one worker pool",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        "manifest",
+        type=str,
+        help="Manifest file (.yaml, .yml or .json) listing the jobs"
+    )
+
+    parser.add_argument(
+        "-j", "--n-processes",
+        type=int,
+        default=-1,
+        metavar="N",
+        help="Number of worker processes (-1=all cores, 0=sequential)"
+    )
+
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate jobs whose output is already up to date"
+    )
+
+    parser.add_argument(
+        "--progress",
+        choices=list(PROGRESS_SINKS),
+        default="tqdm",
+        help="Progress output: tqdm bar, JSON-lines telemetry, or silent"
+    )
+
+    parser.add_argument(
+        "--progress-file",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Log file for --progress jsonl (default: stdout)"
+    )
+
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.manifest):
+        print(f"Error: Manifest not found: {args.manifest}", file=sys.stderr)
+        sys.exit(1)
+
+    reporter = get_progress_reporter(args.progress, log_file=args.progress_file)
+    try:
+        results = run_batch(args.manifest, n_processes=args.n_processes,
+                            force=args.force, progress=reporter)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    n_done = sum(r["status"] == "generated" for r in results)
+    reporter.message(f"Done! {n_done} generated, {len(results) - n_done} up to date")
+    reporter.close()
+
+
+def thin_main(argv=None):
+    """CLI entry point for `geoprior1d thin`: write a representative subset of a prior."""
+    from .thinning import thin_prior, THINNING_METHODS
+
+    parser = argparse.ArgumentParser(
+        prog="geoprior1d thin",
+        description="Write a representative subset of the realizations of a prior file",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        "prior_file",
+        type=str,
+        help="HDF5 prior file written by geoprior1d"
+    )
+
+    parser.add_argument(
+        "-n", "--n-realizations",
+        type=int,
+        required=True,
+        help="Number of realizations to keep"
+    )
+
+    parser.add_argument(
+        "-m", "--method",
+        choices=list(THINNING_METHODS),
+        default="stratified",
+        help="Selection: stratified on scenario, dominant class and layer count, "
+             "k-medoids-style clustering of compact features, or uniform random"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Output HDF5 filename (default: {prior}_thin{n}.h5)"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed of the selection"
+    )
+
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.prior_file):
+        print(f"Error: Prior file not found: {args.prior_file}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        name, indices = thin_prior(args.prior_file, args.n_realizations, args.method,
+                                   output_file=args.output, seed=args.seed)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Done! {len(indices)} realizations saved to: {name}")
+
+
+def calibrate_main(argv=None):
+    """CLI entry point for `geoprior1d calibrate`: fit section parameters to targets."""
+    import pandas as pd
+    from .calibrate import calibrate_prior, read_targets
+
+    parser = argparse.ArgumentParser(
+        prog="geoprior1d calibrate",
+        description="Calibrate Geology2 Frequency and Probabilities to target "
+                    "per-depth class proportions and write a calibrated input file",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        "input_file",
+        type=str,
+        help="Excel input file to calibrate"
+    )
+
+    parser.add_argument(
+        "targets",
+        type=str,
+        help="Target proportions (.csv or Excel): a Depth column and one column per class"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        required=True,
+        metavar="FILE",
+        help="Calibrated Excel input file"
+    )
+
+    parser.add_argument(
+        "--layer-counts",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Target layer-count distribution (.csv or Excel with Layers and Probability columns)"
+    )
+
+    parser.add_argument(
+        "--layer-weight",
+        type=float,
+        default=1.0,
+        help="Weight of the layer-count term in the loss"
+    )
+
+    parser.add_argument(
+        "--params",
+        type=str,
+        nargs='+',
+        default=None,
+        metavar="PARAM",
+        help="Parameters to calibrate, e.g. 'frequency[0]' 'probabilities[1]' "
+             "(default: frequencies between 0 and 1 and multi-type probabilities)"
+    )
+
+    parser.add_argument(
+        "-d", "--depth-max",
+        type=float,
+        default=90,
+        help="Maximum depth in meters"
+    )
+
+    parser.add_argument(
+        "-s", "--depth-step",
+        type=float,
+        default=1.0,
+        help="Depth discretization step in meters"
+    )
+
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=200,
+        help="Optimizer iterations"
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="Realizations per candidate evaluation"
+    )
+
+    parser.add_argument(
+        "-j", "--n-processes",
+        type=int,
+        default=-1,
+        metavar="N",
+        help="Number of worker processes (-1=all cores, 0=sequential)"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed"
+    )
+
+    args = parser.parse_args(argv)
+
+    for path in (args.input_file, args.targets, args.layer_counts):
+        if path is not None and not os.path.exists(path):
+            print(f"Error: File not found: {path}", file=sys.stderr)
+            sys.exit(1)
+
+    layer_counts = None
+    if args.layer_counts is not None:
+        table = read_targets(args.layer_counts)
+        layer_counts = dict(zip(table['Layers'].astype(int), table['Probability'].astype(float)))
+
+    reporter = get_progress_reporter("tqdm")
+    try:
+        info, history = calibrate_prior(
+            args.input_file, read_targets(args.targets), args.depth_max, args.depth_step,
+            output_file=args.output, layer_counts=layer_counts, layer_weight=args.layer_weight,
+            params=args.params, n_iter=args.iterations, batch_size=args.batch_size,
+            n_processes=args.n_processes, seed=args.seed, progress=reporter)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    table = pd.DataFrame({'Frequency': info['Sections']['frequency'],
+                          'Probabilities': [",".join(f"{p:.3g}" for p in probs)
+                                            for probs in info['Sections']['probabilities']]})
+    print(table.to_string())
+    reporter.message(f"Done! Calibrated input saved to: {args.output}")
+    reporter.close()
+
+
+def resample_main(argv=None):
+    """CLI entry point for `geoprior1d resample`: redraw resistivity for stored lithology."""
+    from .resample import resample_resistivity
+
+    parser = argparse.ArgumentParser(
+        prog="geoprior1d resample",
+        description="Redraw the resistivity (M1) of a prior generated with --store-layers "
+                    "under a new Resistivity sheet, keeping its lithology",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        "prior_file",
+        type=str,
+        help="HDF5 prior file generated with --store-layers"
+    )
+
+    parser.add_argument(
+        "config",
+        type=str,
+        help="Excel input file with the new Resistivity sheet (same classes)"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Output HDF5 filename (default: {prior}_resampled.h5)"
+    )
+
+    parser.add_argument(
+        "-j", "--n-processes",
+        type=int,
+        default=-1,
+        metavar="N",
+        help="Number of worker processes (-1=all cores, 0=sequential)"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Base random seed (default: random)"
+    )
+
+    parser.add_argument(
+        "--progress",
+        choices=list(PROGRESS_SINKS),
+        default="tqdm",
+        help="Progress output: tqdm bar, JSON-lines telemetry, or silent"
+    )
+
+    args = parser.parse_args(argv)
+
+    for path in (args.prior_file, args.config):
+        if not os.path.exists(path):
+            print(f"Error: File not found: {path}", file=sys.stderr)
+            sys.exit(1)
+
+    reporter = get_progress_reporter(args.progress)
+    try:
+        name = resample_resistivity(args.prior_file, args.config, output_file=args.output,
+                                    seed=args.seed, n_processes=args.n_processes,
+                                    progress=reporter)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    reporter.message(f"Done! Output saved to: {name}")
+    reporter.close()
+
+
+def watch_main(argv=None):
+    """CLI entry point for `geoprior1d watch`: live preview while editing an input file."""
+    from .watch import watch_prior
+
+    parser = argparse.ArgumentParser(
+        prog="geoprior1d watch",
+        description="Re-render a preview of the prior (realizations, proportions, "
+                    "resistivity distributions and feasibility diagnostics) to an image "
+                    "every time the input file is saved",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        "input_file",
+        type=str,
+        help="Excel input file to watch"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        metavar="IMAGE",
+        help="Preview image (default: {input}_preview.png)"
+    )
+
+    parser.add_argument(
+        "-n", "--n-realizations",
+        type=int,
+        default=200,
+        help="Realizations in the preview ensemble"
+    )
+
+    parser.add_argument(
+        "-d", "--depth-max",
+        type=float,
+        default=90,
+        help="Maximum depth in meters"
+    )
+
+    parser.add_argument(
+        "-s", "--depth-step",
+        type=float,
+        default=1.0,
+        help="Depth discretization step in meters"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=1,
+        help="Fixed base seed of the preview"
+    )
+
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.25,
+        metavar="SECONDS",
+        help="Time between checks of the input file"
+    )
+
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Render the preview once and exit"
+    )
+
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input_file):
+        print(f"Error: File not found: {args.input_file}", file=sys.stderr)
+        sys.exit(1)
+
+    reporter = get_progress_reporter("tqdm")
+    name = watch_prior(args.input_file, output_image=args.output, Nreals=args.n_realizations,
+                       dmax=args.depth_max, dz=args.depth_step, seed=args.seed,
+                       interval=args.interval, once=args.once, progress=reporter)
+    reporter.message(f"Preview saved to: {name}")
+    reporter.close()
+
+
+# Subcommands dispatched on the first argument; anything else is an input file
+SUBCOMMANDS = {
+    "serve": serve_main,
+    "batch": batch_main,
+    "thin": thin_main,
+    "calibrate": calibrate_main,
+    "resample": resample_main,
+    "watch": watch_main,
+}
+
+
+def main(argv=None):
     """Main CLI entry point."""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+
     parser = argparse.ArgumentParser(
         description="Generate 1D geological prior realizations",
+        epilog="Other commands: " + ", ".join(f"geoprior1d {c}" for c in SUBCOMMANDS),
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
 
     parser.add_argument(
         "input_file",
         type=str,
-        nargs='?',
+        nargs='*',
+        default=[],
+        help="Path to Excel input file with geological constraints (default: copies daugaard_standard.xlsx to current directory); "
+             "several files sample a scenario mixture"
+    )
+
+    parser.add_argument(
+        "--weights",
+        type=float,
+        nargs='+',
         default=None,
-        help="Path to Excel input file with geological constraints (default: copies daugaard_standard.xlsx to current directory)"
+        metavar="W",
+        help="Scenario weights, one per input file (default: equal)"
     )
 
     parser.add_argument(
@@ -66,17 +573,139 @@ def main():
         help="Output HDF5 filename (default: auto-generated with timestamp)"
     )
 
+    parser.add_argument(
+        "--progress",
+        choices=list(PROGRESS_SINKS),
+        default="tqdm",
+        help="Progress output: tqdm bar, JSON-lines telemetry, or silent"
+    )
+
+    parser.add_argument(
+        "--progress-file",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Log file for --progress jsonl (default: stdout)"
+    )
+
+    parser.add_argument(
+        "--max-memory",
+        type=str,
+        default=None,
+        metavar="SIZE",
+        help="Memory budget, e.g. 512M or 4G; work blocks are sized to fit"
+    )
+
+    parser.add_argument(
+        "--sampler",
+        choices=list(SAMPLERS),
+        default="random",
+        help="Draws for thicknesses, resistivities and water level: pseudo-random, "
+             "scrambled Sobol or Latin hypercube"
+    )
+
+    parser.add_argument(
+        "--executor",
+        choices=list(EXECUTORS),
+        default=None,
+        help="Execution backend (default: process, or sequential with -j 0); "
+             "thread suits free-threaded Python builds"
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=list(ENGINES),
+        default="numpy",
+        help="Generation engine: numpy reference sampler, numba compiled parallel "
+             "kernels (needs numba, random sampler), or auto (numba if installed)"
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Write blocks to the output file as they finish and checkpoint every SECONDS"
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted checkpointed run in the file given by -o"
+    )
+
+    parser.add_argument(
+        "--store-layers",
+        action="store_true",
+        help="Store the layer index of every cell, so resistivity can be redrawn "
+             "later with geoprior1d resample"
+    )
+
+    parser.add_argument(
+        "--m1-encoding",
+        type=str,
+        choices=M1_ENCODINGS,
+        default="float32",
+        help="Storage of the resistivity: float32, or log10 codes as uint16 (max error "
+             "0.008%%) or uint8 (max error 2%%), decoded transparently on read"
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=os.environ.get("GEOPRIOR1D_CACHE"),
+        metavar="DIR",
+        help="Serve repeated seeded runs from this cache directory and add new ones "
+             "(default: $GEOPRIOR1D_CACHE, else no cache)"
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        type=str,
+        default=None,
+        metavar="SIZE",
+        help="Size limit of the cache, e.g. 20G; least recently used priors are evicted"
+    )
+
+    parser.add_argument(
+        "--until-converged",
+        action="store_true",
+        help="Generate until prior statistics stabilize; -n becomes the upper limit"
+    )
+
+    parser.add_argument(
+        "--tol",
+        type=float,
+        default=1e-3,
+        help="Convergence tolerance for --until-converged"
+    )
+
+    parser.add_argument(
+        "--max-time",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Wall-clock limit for --until-converged"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Base random seed for reproducible output (default: random)"
+    )
+
     parser.add_argument(
         "-v", "--version",
         action="version",
         version=f"%(prog)s {__version__}"
     )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Handle default input file
     input_file = args.input_file
-    if input_file is None:
+    if not input_file:
         # Get the path to the example file in the package
         package_dir = Path(__file__).parent.parent
         example_file = package_dir / "examples" / "data" / "daugaard_standard.xlsx"
@@ -104,21 +733,44 @@ def main():
         print(f"{'='*70}")
         return
 
+    if args.resume and args.output is None:
+        print("Error: --resume needs the output file of the interrupted run (-o)", file=sys.stderr)
+        sys.exit(1)
+
+    reporter = get_progress_reporter(args.progress, log_file=args.progress_file)
+
     # Run geoprior1d
     filename, flag_vector = geoprior1d(
-        input_data=input_file,
+        input_data=input_file[0] if len(input_file) == 1 else input_file,
+        weights=args.weights,
         Nreals=args.n_realizations,
         dmax=args.depth_max,
         dz=args.depth_step,
         doPlot=1 if args.plot else 0,
         n_processes=args.n_processes,
-        output_file=args.output
+        output_file=args.output,
+        seed=args.seed,
+        progress=reporter,
+        max_memory=args.max_memory,
+        sampler=args.sampler,
+        until_converged=args.until_converged,
+        tol=args.tol,
+        max_time=args.max_time,
+        executor=args.executor,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+        cache_dir=args.cache_dir,
+        cache_size=args.cache_size,
+        store_layers=args.store_layers,
+        m1_encoding=args.m1_encoding,
+        engine=args.engine
     )
 
-    print(f"\nDone! Output saved to: {filename}")
+    reporter.message(f"Done! Output saved to: {filename}")
 
     if flag_vector[0] == 1:
-        print("⚠️  Warning: Max iterations exceeded. Check constraints.")
+        reporter.warning("Max iterations exceeded. Check constraints.")
+    reporter.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+"""Configuration specs, overrides and parsed-config caches.
+
+Long-running pools (the sampling server, batch runs) identify a prior
+configuration by a small, hashable `ConfigSpec`: the Excel file (path and
+modification time), the depth grid and any parameter overrides. Workers keep
+an LRU cache of parsed configurations keyed by spec, so tasks only carry the
+spec instead of the pickled prior information.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from .io import extract_prior_info
+from .sampling import _generate_block
+
+ConfigSpec = namedtuple("ConfigSpec", "path mtime_ns dmax dz overrides")
+
+# Per-process cache of parsed configurations, keyed by ConfigSpec
+_WORKER_CONFIGS = OrderedDict()
+_WORKER_MAX_CONFIGS = 8
+
+_OVERRIDE_KEY = re.compile(r"^(?P<path>[^\[\]]+?)(?:\[(?P<index>-?\d+)\])?$")
+
+
+def overrides_key(overrides):
+    """Canonical string form of a parameter override mapping ('' for none)."""
+    return json.dumps(overrides, sort_keys=True) if overrides else ""
+
+
+def config_spec(config, dmax, dz, overrides=None):
+    """Build the spec identifying a parsed config, with overrides, on a depth grid."""
+    path = os.path.abspath(config)
+    return ConfigSpec(path, os.stat(path).st_mtime_ns, float(dmax), float(dz),
+                      overrides_key(overrides))
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file's content."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def apply_overrides(info, overrides):
+    """
+    Return a copy of a prior information dict with parameter overrides applied.
+
+    Keys are dotted paths into the dict returned by extract_prior_info(),
+    optionally ending in an element index:
+
+        {"Sections.frequency": [0.3, 1, 0.5, 1],
+         "Sections.frequency[2]": 0.5,
+         "Resistivity.res[1]": 150,
+         "Water Level.max": [5]}
+
+    Values replacing numpy arrays are converted to the array's dtype.
+
+    Args:
+        info (dict): Prior information dictionary.
+        overrides (dict or str): Overrides, or their overrides_key() string.
+
+    Returns:
+        dict: Updated copy of info.
+    """
+    if isinstance(overrides, str):
+        overrides = json.loads(overrides) if overrides else {}
+    if not overrides:
+        return info
+    info = copy.deepcopy(info)
+    for key, value in overrides.items():
+        match = _OVERRIDE_KEY.match(key)
+        if match is None:
+            raise KeyError(f"Invalid override key '{key}'")
+        *parents, leaf = match.group('path').split('.')
+        target = info
+        for part in parents:
+            if part not in target:
+                raise KeyError(f"Override '{key}': no entry '{part}'")
+            target = target[part]
+        if leaf not in target:
+            raise KeyError(f"Override '{key}': no entry '{leaf}'")
+
+        current = target[leaf]
+        if match.group('index') is not None:
+            current[int(match.group('index'))] = value
+        elif isinstance(current, np.ndarray):
+            target[leaf] = np.asarray(value, dtype=current.dtype)
+        else:
+            target[leaf] = value
+    return info
+
+
+def load_config(spec, cache, max_configs=8):
+    """Return (info, z_vec, cmaps) for spec, parsing the Excel file on a cache miss."""
+    if spec in cache:
+        cache.move_to_end(spec)
+        return cache[spec]
+    info, cmaps = extract_prior_info(spec.path)
+    info = apply_overrides(info, spec.overrides)
+    z_vec = np.arange(spec.dz, spec.dmax + spec.dz, spec.dz)
+    cache[spec] = (info, z_vec, cmaps)
+    while len(cache) > max_configs:
+        cache.popitem(last=False)
+    return cache[spec]
+
+
+def worker_init(max_configs=8):
+    """Pool initializer: size the worker-side config cache."""
+    global _WORKER_MAX_CONFIGS
+    _WORKER_MAX_CONFIGS = max_configs
+
+
+def config_block_task(args):
+    """
+    Worker task: generate one block for the config identified by a spec.
+
+    Args:
+        args (tuple): (spec, start, stop, seed_offset, kwargs), where kwargs
+            are passed on to the block generator (features, sampler, n_total).
+    """
+    spec, start, stop, seed_offset, kwargs = args
+    info, z_vec, _ = load_config(spec, _WORKER_CONFIGS, _WORKER_MAX_CONFIGS)
+    return _generate_block(start, stop, info, z_vec, seed_offset, **kwargs)
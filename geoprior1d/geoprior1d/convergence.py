@@ -0,0 +1,183 @@
+"""Convergence monitoring for open-ended prior generation.
+
+A `ConvergenceMonitor` is fed the generated blocks in order and tracks
+running prior statistics:
+
+    class      per-depth class probabilities
+    logres     per-depth mean and standard deviation of log10 resistivity
+    water      empirical CDF of the water level on a fixed grid
+
+The statistics are compared at fixed realization counts (every
+`check_every` realizations), not per block, so the change between two
+checks, and with it the stopping point, does not depend on the block size.
+At every check it records how much each statistic changed since the
+previous check (maximum absolute difference), and declares convergence
+once all changes stay below `tol` for `patience` consecutive checks;
+generation then stops after the block containing that check. A realization
+cap and a wall-clock cap, checked after every block, stop generation as
+well. The per-check record is kept in `trace` and written to the output
+file by geoprior1d().
+"""
+
+import time
+
+import numpy as np
+
+# Grid points of the water-level CDF
+_WATER_GRID = 101
+
+# Names of the per-check trace columns
+TRACE_FIELDS = ("n_realizations", "delta_class", "delta_logres", "delta_water", "elapsed")
+
+
+class ConvergenceMonitor:
+    """
+    Track running prior statistics and decide when they have stabilized.
+
+    Args:
+        n_classes (int): Number of lithology classes.
+        Nz (int): Number of depth cells.
+        tol (float): Convergence tolerance on the change of every statistic
+            (probabilities, log10 resistivity, water-level CDF) between
+            consecutive checks.
+        patience (int): Consecutive checks below tol required to stop.
+        min_realizations (int): Never stop before this many realizations.
+        max_realizations (int, optional): Hard cap on realizations.
+        max_time (float, optional): Wall-clock cap in seconds.
+        water_range (tuple, optional): (min, max) water level used for the CDF
+            grid; the first block's range is used if omitted.
+        check_every (int): Realizations between checks.
+    """
+
+    def __init__(self, n_classes, Nz, tol=1e-3, patience=2, min_realizations=1000,
+                 max_realizations=None, max_time=None, water_range=None, check_every=1000):
+        self.n_classes = n_classes
+        self.tol = tol
+        self.check_every = max(1, int(check_every))
+        self.patience = patience
+        self.min_realizations = min_realizations
+        self.max_realizations = max_realizations
+        self.max_time = max_time
+        self.water_range = water_range
+
+        self.n = 0
+        self._class_counts = np.zeros((n_classes, Nz), dtype=np.int64)
+        self._logres_sum = np.zeros(Nz)
+        self._logres_sumsq = np.zeros(Nz)
+        self._water_counts = np.zeros(_WATER_GRID, dtype=np.int64)
+        self._previous = None
+        self._below = 0
+        self._t0 = None
+
+        self.trace = []
+        self.converged = False
+        self.stop_reason = None
+
+    @classmethod
+    def for_prior(cls, info, z_vec, **kwargs):
+        """Create a monitor sized for a prior information dict and depth vector."""
+        if 'Water Level' in info and 'water_range' not in kwargs:
+            kwargs['water_range'] = (float(np.ravel(info['Water Level']['min'])[0]),
+                                     float(np.ravel(info['Water Level']['max'])[0]))
+        return cls(len(info['Classes']['codes']), len(z_vec), **kwargs)
+
+    def start(self):
+        """Start the wall-clock timer (called by the sampler)."""
+        self._t0 = time.time()
+
+    @property
+    def stopped(self):
+        return self.stop_reason is not None
+
+    def _statistics(self):
+        probs = self._class_counts / self.n
+        mean = self._logres_sum / self.n
+        std = np.sqrt(np.maximum(self._logres_sumsq / self.n - mean ** 2, 0))
+        cdf = np.cumsum(self._water_counts) / self.n
+        return probs, mean, std, cdf
+
+    def update(self, ms, ns, ws):
+        """
+        Add a block of realizations and update the convergence state.
+
+        Args:
+            ms, ns, ws: Lithology, resistivity and water level of the block.
+
+        Returns:
+            bool: True if generation should stop.
+        """
+        if self._t0 is None:
+            self.start()
+        start = 0
+        while start < len(ms) and not self.stopped:
+            # Split the block at the checks, wherever its boundaries are
+            stop = min(len(ms), start + self.check_every - self.n % self.check_every)
+            self._add(ms[start:stop], ns[start:stop], ws[start:stop])
+            if self.n % self.check_every == 0:
+                self._check()
+            start = stop
+        if start < len(ms):
+            # Rows after a converged check belong to the run but not to the statistics
+            self.n += len(ms) - start
+
+        if not self.stopped:
+            if self.max_realizations is not None and self.n >= self.max_realizations:
+                self.stop_reason = "max_realizations"
+            elif self.max_time is not None and time.time() - self._t0 >= self.max_time:
+                self.stop_reason = "max_time"
+        return self.stopped
+
+    def _add(self, ms, ns, ws):
+        """Add realizations to the running statistics."""
+        self.n += ms.shape[0]
+        for c in range(self.n_classes):
+            self._class_counts[c] += np.count_nonzero(ms == c + 1, axis=0)
+        logres = np.log10(ns, dtype=np.float64)
+        self._logres_sum += logres.sum(axis=0)
+        self._logres_sumsq += (logres ** 2).sum(axis=0)
+
+        ws = np.asarray(ws, dtype=np.float64)
+        if self.water_range is None:
+            self.water_range = (float(ws.min()), float(ws.max()))
+        lo, hi = self.water_range
+        grid = np.linspace(lo, hi, _WATER_GRID)
+        self._water_counts += np.bincount(np.searchsorted(grid, ws, side='left').clip(0, _WATER_GRID - 1),
+                                          minlength=_WATER_GRID)
+
+    def _check(self):
+        """Compare the statistics with those of the previous check."""
+        current = self._statistics()
+        if self._previous is None:
+            deltas = (np.inf, np.inf, np.inf)
+        else:
+            (p0, m0, s0, c0), (p1, m1, s1, c1) = self._previous, current
+            deltas = (float(np.max(np.abs(p1 - p0))),
+                      float(max(np.max(np.abs(m1 - m0)), np.max(np.abs(s1 - s0)))),
+                      float(np.max(np.abs(c1 - c0))))
+        self._previous = current
+        self.trace.append((self.n,) + deltas + (time.time() - self._t0,))
+
+        if max(deltas) < self.tol:
+            self._below += 1
+        else:
+            self._below = 0
+        if self._below >= self.patience and self.n >= self.min_realizations:
+            self.converged = True
+            self.stop_reason = "converged"
+
+    def trace_arrays(self):
+        """Return the trace as a dict of arrays keyed by TRACE_FIELDS."""
+        rows = np.array(self.trace, dtype=float).reshape(-1, len(TRACE_FIELDS))
+        return {name: rows[:, k] for k, name in enumerate(TRACE_FIELDS)}
+
+
+def write_convergence(f, monitor):
+    """Write a monitor's trace and settings to the 'convergence' group of an open HDF5 file."""
+    grp = f.create_group('convergence')
+    for name, values in monitor.trace_arrays().items():
+        grp.create_dataset(name, data=values)
+    grp.attrs['tol'] = monitor.tol
+    grp.attrs['patience'] = monitor.patience
+    grp.attrs['check_every'] = monitor.check_every
+    grp.attrs['converged'] = int(monitor.converged)
+    grp.attrs['stop_reason'] = monitor.stop_reason or ""
@@ -3,16 +3,24 @@ import numpy as np
 import h5py
 import matplotlib.pyplot as plt
 import pandas as pd
-from .io import extract_prior_info
+from .io import extract_prior_info, read_prior_tables, table_to_strings
 from .sampling import get_prior_sample
+from .progress import get_progress_reporter
 from .colormaps import flj_log
+from .features import FEATURES_GROUP, write_features, create_feature_datasets
+from .convergence import ConvergenceMonitor, write_convergence
+from .quantize import create_m1, write_m1
+from .engines import resolve_engine
 from scipy.stats import norm
 from datetime import datetime
 from matplotlib.colors import ListedColormap, BoundaryNorm, LogNorm
 import os
 
 
-def generate_prior_realizations(info, z_vec, Nreals, n_processes=-1):
+def generate_prior_realizations(info, z_vec, Nreals, n_processes=-1, seed=None,
+                                progress=None, max_memory=None, return_features=False,
+                                sampler="random", convergence=None, executor=None,
+                                store_layers=False, engine=None):
     """
     Generate prior realizations of lithology, resistivity, and water level.
 
@@ -26,19 +34,37 @@ def generate_prior_realizations(info, z_vec, Nreals, n_processes=-1):
             -1 = use all CPU cores (default, recommended for performance)
             0 or None = sequential execution (slower, for debugging)
             >0 = use specified number of cores
+        seed (int, optional): Base random seed for reproducible output (default: None).
+        progress (optional): Progress sink, see get_prior_sample (default: tqdm bar).
+        max_memory (int or str, optional): Memory budget used to size work blocks.
+        return_features (bool, optional): Also return per-realization feature tables.
+        sampler (str, optional): "random" (default), "sobol" or "lhs".
+        convergence (ConvergenceMonitor, optional): Stop once prior statistics
+            stabilize; Nreals becomes the upper limit.
+        executor (str or Executor, optional): "process", "thread", "sequential"
+            or a concurrent.futures.Executor (see geoprior1d.executors).
+        store_layers (bool, optional): Add the layer index of every cell to the
+            feature tables (with return_features).
+        engine (str, optional): "numpy" (default), "numba" or "auto"; see
+            geoprior1d.engines.
 
     Returns:
         ms (ndarray): Lithology realizations (Nreals x Nz).
         ns (ndarray): Resistivity realizations (Nreals x Nz).
         ws (ndarray): Water level realizations (Nreals,).
         flag_vector (list): Flags indicating issues during generation.
+        features (dict): Only if return_features (see geoprior1d.features).
     """
-    ms, ns, ws, flag_vector = get_prior_sample(info, z_vec, Nreals, n_processes)
-    return ms, ns, ws, flag_vector
+    return get_prior_sample(info, z_vec, Nreals, n_processes, seed=seed,
+                            progress=progress, max_memory=max_memory,
+                            return_features=return_features, sampler=sampler,
+                            convergence=convergence, executor=executor,
+                            store_layers=store_layers, engine=engine)
 
 
 def save_prior_to_hdf5(output_file, ms, ns, ws, info, cmaps, z_vec, dmax, dz,
-                       flag_vector, input_data):
+                       flag_vector, input_data, features=None, convergence=None,
+                       m1_encoding="float32"):
     """
     Save prior realizations to HDF5 file.
 
@@ -55,13 +81,48 @@ def save_prior_to_hdf5(output_file, ms, ns, ws, info, cmaps, z_vec, dmax, dz,
         dz (float): Depth discretization step in meters.
         flag_vector (list): Flags from generation.
         input_data (str): Path to original Excel input file.
+        features (dict, optional): Per-realization feature tables to store in
+            the 'features' group (see geoprior1d.features).
+        convergence (ConvergenceMonitor, optional): Monitor of a convergence-driven
+            run; its trace is stored in the 'convergence' group.
+        m1_encoding (str, optional): Storage of M1: "float32" (default), or
+            "uint16"/"uint8" log10 codes (see geoprior1d.quantize).
 
     Returns:
         name (str): Output HDF5 filename (actual saved filename).
     """
     Nreals = ms.shape[0]
+    name = prior_filename(output_file, info, input_data, Nreals, dmax)
 
-    # Construct output filename
+    # Remove existing file
+    if os.path.exists(name):
+        os.remove(name)
+
+    # Write HDF5 file
+    with h5py.File(name, 'w') as f:
+        create_prior_datasets(f, info, cmaps, dmax, dz, Nreals, ms.shape[1],
+                              m1_encoding=m1_encoding)
+        write_m1(f['M1'], slice(None), ns)
+        f['M2'][...] = ms
+        if 'M3' in f:
+            f['M3'][...] = np.asarray(ws, dtype=np.float32).reshape(-1, 1)
+
+        # Per-realization feature index for fast subset queries
+        if features is not None:
+            write_features(f, features, info['Classes']['names'])
+
+        # Convergence trace of an --until-converged run
+        if convergence is not None:
+            write_convergence(f, convergence)
+
+        write_prior_provenance(f, input_data, dmax, dz)
+
+    return name
+
+
+def prior_filename(output_file, info, input_data, Nreals, dmax):
+    """Output filename: output_file with .h5 extension, or
+    {input_base}_N{Nreals}_dmax{dmax}_{timestamp}.h5 if output_file is None."""
     if output_file is not None:
         # Use custom filename
         name = output_file
@@ -78,66 +139,74 @@ def save_prior_to_hdf5(output_file, ms, ns, ws, info, cmaps, z_vec, dmax, dz,
         # Construct new filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M")
         name = f"{base_name}_N{Nreals}_dmax{dmax}_{timestamp}.h5"
-
-    # Remove existing file
-    if os.path.exists(name):
-        os.remove(name)
-
-    # Write HDF5 file
-    with h5py.File(name, 'w') as f:
-
-        # M1: Resistivity
-        dset_M1 = f.create_dataset('M1', data=ns.astype(np.float32))
-        dset_M1.attrs['is_discrete'] = 0
-        dset_M1.attrs['name'] = 'Resistivity'
-        dset_M1.attrs['x'] = np.arange(0, dmax, dz)
-        dset_M1.attrs['clim'] = [.1, 2600]
-        dset_M1.attrs['cmap'] = flj_log().T
-
-        # M2: Lithology
-        dset_M2 = f.create_dataset('M2', data=ms.astype(np.int16))
-        dset_M2.attrs['is_discrete'] = 1
-        dset_M2.attrs['name'] = 'Lithology'
-        dset_M2.attrs['class_name'] = np.array(info['Classes']['names'], dtype='S')
-        dset_M2.attrs['class_id'] = info['Classes']['codes']
-        dset_M2.attrs['x'] = np.arange(0, dmax, dz)
-        dset_M2.attrs['clim'] = [0.5, len(info['Classes']['codes']) + 0.5]
-        dset_M2.attrs['cmap'] = cmaps['Classes'].T
-
-        # M3: Water level
-        if 'Water Level' in info:
-            dset_M3 = f.create_dataset('M3', data=ws.astype(np.float32).reshape(-1, 1))
-            dset_M3.attrs['is_discrete'] = 0
-            dset_M3.attrs['name'] = 'Waterlevel'
-            dset_M3.attrs['x'] = [0]
-
-        # Read Excel sheets into DataFrames
-        T_geo1 = pd.read_excel(input_data, sheet_name="Geology1")
-        headers_geo1 = T_geo1.columns.astype(str).tolist()
-        contents_geo1 = T_geo1.astype(str).values.flatten().tolist()
-
-        T_geo2 = pd.read_excel(input_data, sheet_name="Geology2")
-        headers_geo2 = T_geo2.columns.astype(str).tolist()
-        contents_geo2 = T_geo2.astype(str).values.flatten().tolist()
-
-        T_res = pd.read_excel(input_data, sheet_name="Resistivity")
-        headers_res = T_res.columns.astype(str).tolist()
-        contents_res = T_res.astype(str).values.flatten().tolist()
-
-        # Open (or create) HDF5 file and write attributes
-        with h5py.File(name, "a") as f:
-            f.attrs["Creation date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            f.attrs["Class headers"] = headers_geo1
-            f.attrs["Class table"] = contents_geo1
-            f.attrs["Unit headers"] = headers_geo2
-            f.attrs["Unit table"] = contents_geo2
-            f.attrs["Resistivity headers"] = headers_res
-            f.attrs["Resistivity table"] = contents_res
-
     return name
 
 
-def geoprior1d(input_data, Nreals, dmax, dz, doPlot=0, n_processes=-1, output_file=None):
+def create_prior_datasets(f, info, cmaps, dmax, dz, Nreals, Nz, m1_encoding="float32"):
+    """Create the (empty) M1 resistivity, M2 lithology and, if the prior has a
+    water table, M3 water level datasets with their attributes. M1 is float32
+    or quantized log10 codes, depending on m1_encoding."""
+    # M1: Resistivity
+    dset_M1 = create_m1(f, Nreals, Nz, m1_encoding)
+    dset_M1.attrs['is_discrete'] = 0
+    dset_M1.attrs['name'] = 'Resistivity'
+    dset_M1.attrs['x'] = np.arange(0, dmax, dz)
+    dset_M1.attrs['clim'] = [.1, 2600]
+    dset_M1.attrs['cmap'] = flj_log().T
+
+    # M2: Lithology
+    dset_M2 = f.create_dataset('M2', shape=(Nreals, Nz), dtype=np.int16)
+    dset_M2.attrs['is_discrete'] = 1
+    dset_M2.attrs['name'] = 'Lithology'
+    dset_M2.attrs['class_name'] = np.array(info['Classes']['names'], dtype='S')
+    dset_M2.attrs['class_id'] = info['Classes']['codes']
+    dset_M2.attrs['x'] = np.arange(0, dmax, dz)
+    dset_M2.attrs['clim'] = [0.5, len(info['Classes']['codes']) + 0.5]
+    dset_M2.attrs['cmap'] = cmaps['Classes'].T
+
+    # M3: Water level
+    if 'Water Level' in info:
+        dset_M3 = f.create_dataset('M3', shape=(Nreals, 1), dtype=np.float32)
+        dset_M3.attrs['is_discrete'] = 0
+        dset_M3.attrs['name'] = 'Waterlevel'
+        dset_M3.attrs['x'] = [0]
+
+
+def write_prior_block(f, start, stop, ms, ns, ws, features=None, class_names=None):
+    """Write realizations start..stop-1 into the datasets made by create_prior_datasets();
+    feature datasets are created on the first call."""
+    write_m1(f['M1'], slice(start, stop), ns)
+    f['M2'][start:stop] = ms
+    if 'M3' in f:
+        f['M3'][start:stop, 0] = ws
+    if features is not None:
+        if FEATURES_GROUP not in f:
+            create_feature_datasets(f, features, class_names, f['M1'].shape[0])
+        for key, values in features.items():
+            f[FEATURES_GROUP][key][start:stop] = values
+
+
+def write_input_tables(obj, input_data):
+    """Store the tables of an input file as "<key> headers"/"<key> table" attributes of obj."""
+    for key, table in read_prior_tables(input_data).items():
+        headers, contents = table_to_strings(table)
+        obj.attrs[f"{key} headers"] = headers
+        obj.attrs[f"{key} table"] = contents
+
+
+def write_prior_provenance(f, input_data, dmax, dz):
+    """Store the creation date, grid and input tables ("<key> headers"/"<key> table")."""
+    f.attrs["Creation date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    f.attrs["dmax"] = dmax
+    f.attrs["dz"] = dz
+    write_input_tables(f, input_data)
+
+
+def geoprior1d(input_data, Nreals, dmax, dz, doPlot=0, n_processes=-1, output_file=None,
+               seed=None, progress=None, max_memory=None, sampler="random",
+               until_converged=False, tol=1e-3, max_time=None, executor=None,
+               checkpoint=None, resume=False, weights=None, cache_dir=None, cache_size=None,
+               store_layers=False, m1_encoding="float32", engine=None):
     """
     Generate 1D geological prior realizations and save to HDF5.
 
@@ -148,7 +217,9 @@ def geoprior1d(input_data, Nreals, dmax, dz, doPlot=0, n_processes=-1, output_fi
     4. Optionally plot results
 
     Args:
-        input_data (str): Path to Excel input file with geological constraints.
+        input_data (str or list): Path to Excel input file with geological
+            constraints, or a list of files for a scenario mixture (see
+            geoprior1d.mixture).
         Nreals (int): Number of realizations to generate.
         dmax (float): Maximum depth in meters.
         dz (float): Depth discretization step in meters.
@@ -159,23 +230,135 @@ def geoprior1d(input_data, Nreals, dmax, dz, doPlot=0, n_processes=-1, output_fi
             >0 = use specified number of cores
         output_file (str, optional): Output HDF5 filename. If None, auto-generates
             filename with pattern: {input_base}_N{Nreals}_dmax{dmax}_{timestamp}.h5
+        seed (int, optional): Base random seed. Realization i is seeded with
+            seed + i, so the same seed reproduces the same prior (default: None).
+        progress (optional): Progress/telemetry sink: "tqdm" (default), "jsonl",
+            "silent", a ProgressReporter, or a callable receiving event dicts.
+        max_memory (int or str, optional): Memory budget in bytes or as a size
+            like "4G". Work blocks are sized automatically to fit it (default: None).
+        sampler (str, optional): "random" (default) pseudo-random draws, or
+            "sobol"/"lhs" quasi-Monte Carlo draws for the continuous quantities.
+        until_converged (bool, optional): Keep generating blocks until the running
+            per-depth class probabilities, log-resistivity moments and water-level
+            distribution change by less than tol per 1000 realizations; Nreals is then
+            the upper limit. The convergence trace is stored in the output.
+        tol (float, optional): Convergence tolerance (default: 1e-3).
+        max_time (float, optional): Wall-clock limit in seconds for
+            until_converged runs (default: None).
+        executor (str or Executor, optional): Execution backend: "process"
+            (default), "thread", "sequential", or a concurrent.futures.Executor.
+        checkpoint (float, optional): Write blocks to the output file as they
+            complete and checkpoint the progress every `checkpoint` seconds,
+            instead of keeping all realizations in memory (default: None).
+        resume (bool, optional): Continue an interrupted checkpointed run in
+            output_file (which must be given); the result is identical to an
+            uninterrupted run (default: False). See geoprior1d.checkpoint.
+        weights (list, optional): Scenario weights when input_data is a list
+            of files (default: equal weights).
+        cache_dir (str, optional): Cache directory for seeded runs. A prior
+            with the same input tables, grid, seed and sampler is served from
+            the cache (also for fewer realizations than cached) instead of
+            being regenerated; see geoprior1d.cache. Unseeded, until_converged
+            and mixture runs are not cached (default: None).
+        cache_size (int or str, optional): Size limit of the cache, e.g. "20G";
+            least recently used entries are evicted (default: unlimited).
+        store_layers (bool, optional): Store the layer index of every cell as
+            features/layer_index, so that resistivity can later be resampled
+            for the same lithology (see geoprior1d.resample) (default: False).
+        m1_encoding (str, optional): Storage of the resistivity: "float32"
+            (default), or "uint16"/"uint8" for log10 codes at half/a quarter of
+            the size, decoded transparently on read (see geoprior1d.quantize).
+        engine (str, optional): Generation engine: "numpy" (default, the
+            reference sampler), "numba" (compiled kernels running in parallel
+            threads, needs numba and the random sampler; falls back to numpy
+            without numba) or "auto" (numba when available). The engines give
+            different realizations for the same seed (see geoprior1d.engines).
 
     Returns:
         name (str): Output HDF5 filename.
         flag_vector (list): Flags indicating issues during generation.
     """
+    if isinstance(input_data, (list, tuple)):
+        # Mixtures are not cached (like unseeded runs), so cache_dir is ignored
+        if until_converged or checkpoint is not None or resume \
+                or store_layers or m1_encoding != "float32" or engine == "numba":
+            raise ValueError("Scenario mixtures do not support until_converged, "
+                             "checkpoints, stored layers, M1 encodings "
+                             "or the numba engine")
+        from .mixture import geoprior1d_mixture
+        name, flag_vector = geoprior1d_mixture(
+            list(input_data), weights, Nreals, dmax, dz, output_file=output_file,
+            n_processes=n_processes, seed=seed, progress=progress, sampler=sampler,
+            executor=executor, max_memory=max_memory)
+        if doPlot == 1:
+            from .reader import PriorFile
+            with PriorFile(name) as pf:
+                pf.plot(nshow=100)
+        return name, flag_vector
+
+    engine = resolve_engine(engine, sampler)
+
+    # Seeded fixed-size runs can be served from (and are added to) the cache
+    cache = None
+    if cache_dir is not None and seed is not None and not until_converged and not resume:
+        from .cache import PriorCache, cache_key
+        cache = PriorCache(cache_dir, cache_size)
+        key = cache_key(input_data, dmax, dz, seed, sampler, Nreals, engine=engine,
+                        layers=store_layers, m1_encoding=m1_encoding)
+        info, _ = extract_prior_info(input_data)
+        name = prior_filename(output_file, info, input_data, Nreals, dmax)
+        flag_vector = cache.fetch(key, Nreals, name)
+        if flag_vector is not None:
+            get_progress_reporter(progress).message(
+                f"Served {Nreals} realizations from cache {cache.cache_dir}")
+            if doPlot == 1:
+                from .reader import PriorFile
+                with PriorFile(name) as pf:
+                    pf.plot(nshow=100)
+            return name, flag_vector
+
+    if checkpoint is not None or resume:
+        if until_converged:
+            raise ValueError("Checkpointed runs need a fixed number of realizations")
+        from .checkpoint import run_with_checkpoints
+        name, flag_vector = run_with_checkpoints(
+            input_data, Nreals, dmax, dz, output_file=output_file, n_processes=n_processes,
+            seed=seed, progress=progress, sampler=sampler, executor=executor,
+            checkpoint_every=60.0 if checkpoint is None else checkpoint, resume=resume,
+            store_layers=store_layers, m1_encoding=m1_encoding, engine=engine,
+            max_memory=max_memory)
+        if cache is not None:
+            cache.store(key, name, flag_vector)
+        if doPlot == 1:
+            from .reader import PriorFile
+            with PriorFile(name) as pf:
+                pf.plot(nshow=100)
+        return name, flag_vector
+
     # Extract input parameters
     info, cmaps = extract_prior_info(input_data)
 
     # Create z vector
     z_vec = np.arange(dz, dmax + dz, dz)
 
+    monitor = None
+    if until_converged:
+        monitor = ConvergenceMonitor.for_prior(info, z_vec, tol=tol, max_time=max_time,
+                                               min_realizations=min(1000, Nreals))
+
     # Generate prior realizations
-    ms, ns, ws, flag_vector = generate_prior_realizations(info, z_vec, Nreals, n_processes)
+    ms, ns, ws, flag_vector, features = generate_prior_realizations(
+        info, z_vec, Nreals, n_processes, seed=seed, progress=progress,
+        max_memory=max_memory, return_features=True, sampler=sampler,
+        convergence=monitor, executor=executor, store_layers=store_layers, engine=engine)
+    Nreals = ms.shape[0]
 
     # Save to HDF5 file
     name = save_prior_to_hdf5(output_file, ms, ns, ws, info, cmaps, z_vec, dmax, dz,
-                              flag_vector, input_data)
+                              flag_vector, input_data, features=features,
+                              convergence=monitor, m1_encoding=m1_encoding)
+    if cache is not None:
+        cache.store(key, name, flag_vector)
 
     # Plotting
     if doPlot == 1:
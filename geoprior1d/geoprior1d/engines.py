@@ -0,0 +1,52 @@
+"""Generation engines.
+
+    "numpy"  the reference sampler (default); realization i reproduces exactly
+             for a given seed across versions and backends
+    "numba"  compiled kernels drawing whole blocks in parallel threads, see
+             geoprior1d.jit; needs numba and the "random" sampler
+    "auto"   "numba" when numba is installed and the sampler is "random",
+             otherwise "numpy"
+
+Both engines sample the same prior, but from different random streams, so a
+seed gives different realizations under each (the engine is part of cache
+and checkpoint keys). Requesting "numba" without numba installed falls back
+to "numpy" with a warning.
+"""
+
+import warnings
+from importlib.util import find_spec
+
+# Available engines
+ENGINES = ("numpy", "numba", "auto")
+
+# Engine used unless another is requested
+DEFAULT_ENGINE = "numpy"
+
+
+def numba_available():
+    return find_spec("numba") is not None
+
+
+def resolve_engine(engine=None, sampler="random"):
+    """
+    The engine ("numpy" or "numba") that runs a request.
+
+    Args:
+        engine (str, optional): "numpy", "numba" or "auto" (default: DEFAULT_ENGINE).
+        sampler (str): Sampler of the run; the numba engine supports "random" only.
+
+    Returns:
+        str: "numpy" or "numba".
+    """
+    engine = DEFAULT_ENGINE if engine is None else engine
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Choose from: {', '.join(ENGINES)}")
+    if engine == "auto":
+        return "numba" if sampler == "random" and numba_available() else "numpy"
+    if engine == "numba":
+        if sampler != "random":
+            raise ValueError(f"The numba engine supports the random sampler only, not '{sampler}'")
+        if not numba_available():
+            warnings.warn("numba is not installed (pip install numba); using the numpy engine")
+            return "numpy"
+    return engine
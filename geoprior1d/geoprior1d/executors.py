@@ -0,0 +1,99 @@
+"""Execution backends for block-based prior generation.
+
+Generation is split into contiguous blocks of realizations (see
+sampling._split_blocks); a backend only decides where the blocks run:
+
+    process      concurrent.futures.ProcessPoolExecutor (default with workers).
+                 The start method ("fork", "spawn", "forkserver") is selectable.
+    thread       ThreadPoolExecutor. No pickling; pays off for kernels that
+                 release the GIL and on free-threaded CPython (3.13t+).
+    sequential   Blocks run in the calling thread, one after another.
+
+Any other concurrent.futures.Executor can be passed instead of a name; it is
+used as is and not shut down. Every realization has its own random source
+(see geoprior1d.rng), so all backends produce identical results.
+
+Forking a process whose native thread pool is running (numba's, once a
+compiled kernel has run, see geoprior1d.jit) can deadlock the children and
+the parent at exit. After mark_threads_started(), process pools are
+therefore spawned unless a start method is given explicitly.
+"""
+
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+EXECUTORS = ("process", "thread", "sequential")
+
+# Set once native worker threads run in this process; later process pools are spawned
+_threads_started = False
+
+
+def mark_threads_started():
+    """Record that native worker threads run in this process (see module docstring)."""
+    global _threads_started
+    _threads_started = True
+
+
+def default_start_method(start_method=None):
+    """The start method for a new process pool: the given one, else "spawn"
+    once native threads run in this process, else the platform default."""
+    if start_method is None and _threads_started:
+        return "spawn"
+    return start_method
+
+
+class SequentialExecutor(Executor):
+    """Executor running each task immediately in the calling thread."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def executor_workers(executor, n_workers):
+    """Number of concurrent workers of a backend (0 for sequential)."""
+    if isinstance(executor, Executor):
+        if isinstance(executor, SequentialExecutor):
+            return 0
+        return getattr(executor, "_max_workers", n_workers) or n_workers
+    return 0 if executor == "sequential" else n_workers
+
+
+@contextmanager
+def open_executor(executor, n_workers, start_method=None, initializer=None, initargs=()):
+    """
+    Context manager yielding a concurrent.futures.Executor for a backend.
+
+    Args:
+        executor (str or Executor): Backend name from EXECUTORS, or an
+            executor instance (yielded unchanged and left running).
+        n_workers (int): Number of workers for the process and thread backends.
+        start_method (str, optional): multiprocessing start method for the
+            process backend (default: default_start_method()).
+        initializer, initargs: Run once in every worker before its first task.
+    """
+    if isinstance(executor, Executor):
+        yield executor
+        return
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}'. Choose from: {', '.join(EXECUTORS)}")
+
+    if executor == "sequential" or n_workers == 0:
+        if initializer is not None:
+            initializer(*initargs)
+        pool = SequentialExecutor()
+    elif executor == "thread":
+        pool = ThreadPoolExecutor(max_workers=n_workers, initializer=initializer, initargs=initargs)
+    else:
+        context = multiprocessing.get_context(default_start_method(start_method))
+        pool = ProcessPoolExecutor(max_workers=n_workers, mp_context=context,
+                                   initializer=initializer, initargs=initargs)
+    try:
+        yield pool
+    finally:
+        pool.shutdown(wait=True)
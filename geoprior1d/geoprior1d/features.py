@@ -0,0 +1,203 @@
+"""Per-realization feature tables and fast subset queries.
+
+Generation can summarize every realization in a few numbers that are stored
+in the `features` group of the output file next to the large M1/M2/M3
+datasets:
+
+    n_layers        number of layers in the realization
+    top_class       lithology class code at the surface
+    depth_to_class  depth (m) to the first occurrence of each class (NaN if absent)
+    thickness       total thickness (m) of each class
+    water_level     depth to the water table (m)
+    tries           proposals of the lithology rejection sampling; the run's
+                    flags follow from it (see flags_from_tries)
+
+Runs with stored layers (geoprior1d(store_layers=True)) add `layer_index`,
+the layer number of every cell, which geoprior1d.resample needs.
+
+`query_prior` answers questions like "clay between 10 and 20 m thick" from
+these tables alone, without reading the realizations.
+"""
+
+import re
+
+import h5py
+import numpy as np
+import pandas as pd
+
+from .lithology import MAX_TRIES
+
+FEATURES_GROUP = "features"
+
+# Rows evaluated per query step when scanning large feature tables
+_QUERY_CHUNK = 1_000_000
+
+
+def _cell_tops(z_vec):
+    """Top depth of each cell, given the cell bottoms z_vec."""
+    z_vec = np.asarray(z_vec, dtype=float)
+    return np.concatenate(([0.0], z_vec[:-1]))
+
+
+def compute_features(ms, layer_index, ws, z_vec, n_classes):
+    """
+    Compute feature tables for a block of realizations.
+
+    Args:
+        ms (ndarray): Lithology codes (Nreals x Nz), classes numbered from 1.
+        layer_index (ndarray): Layer indices (Nreals x Nz).
+        ws (ndarray): Water levels (Nreals,).
+        z_vec (array): Depths to cell bottoms.
+        n_classes (int): Number of lithology classes.
+
+    Returns:
+        dict: Feature arrays keyed by feature name (see module docstring).
+    """
+    z_vec = np.asarray(z_vec, dtype=float)
+    tops = _cell_tops(z_vec)
+    cell_thick = (z_vec - tops).astype(np.float32)
+    Nreals = ms.shape[0]
+
+    n_layers = 1 + np.count_nonzero(layer_index[:, 1:] != layer_index[:, :-1], axis=1)
+
+    depth_to_class = np.full((Nreals, n_classes), np.nan, dtype=np.float32)
+    thickness = np.zeros((Nreals, n_classes), dtype=np.float32)
+    for k in range(n_classes):
+        is_k = ms == k + 1
+        present = is_k.any(axis=1)
+        first = np.argmax(is_k, axis=1)
+        depth_to_class[present, k] = tops[first[present]]
+        thickness[:, k] = is_k @ cell_thick
+
+    return {
+        "n_layers": n_layers.astype(np.int16),
+        "top_class": ms[:, 0].astype(np.int16),
+        "depth_to_class": depth_to_class,
+        "thickness": thickness,
+        "water_level": np.asarray(ws, dtype=np.float32),
+    }
+
+
+def flags_from_tries(tries):
+    """Flag vector (see geoprior1d()) of the realizations with these proposal counts."""
+    tries = np.asarray(tries)
+    return [int(np.any(tries > MAX_TRIES)), 0, float(tries.mean()) if len(tries) else 0]
+
+
+def concatenate_features(blocks):
+    """Concatenate a list of per-block feature dicts along realizations."""
+    return {key: np.concatenate([b[key] for b in blocks]) for key in blocks[0]}
+
+
+def write_features(f, features, class_names):
+    """
+    Write feature tables to the `features` group of an open HDF5 file.
+
+    Args:
+        f (h5py.File): File opened for writing.
+        features (dict): Feature arrays from compute_features().
+        class_names (list): Class names, in class-code order.
+    """
+    if FEATURES_GROUP in f:
+        del f[FEATURES_GROUP]
+    grp = f.create_group(FEATURES_GROUP)
+    grp.attrs['class_name'] = np.array(class_names, dtype='S')
+    for key, values in features.items():
+        grp.create_dataset(key, data=values)
+
+
+def create_feature_datasets(f, like, class_names, n_rows):
+    """
+    Create empty feature datasets for n_rows realizations, to be filled block
+    by block. Shapes beyond the first axis and dtypes are taken from `like`,
+    the features of any block.
+    """
+    if FEATURES_GROUP in f:
+        del f[FEATURES_GROUP]
+    grp = f.create_group(FEATURES_GROUP)
+    grp.attrs['class_name'] = np.array(class_names, dtype='S')
+    for key, values in like.items():
+        grp.create_dataset(key, shape=(n_rows,) + values.shape[1:], dtype=values.dtype)
+    return grp
+
+
+def feature_column_name(prefix, class_name):
+    """Query column for a per-class feature, e.g. ('thick', 'Meltwater clay')
+    -> 'thick_meltwater_clay'."""
+    return f"{prefix}_" + re.sub(r"\W+", "_", str(class_name).strip().lower()).strip("_")
+
+
+def _features_frame(grp, sl=slice(None)):
+    """Build a DataFrame of query columns for rows sl of a features group."""
+    names = [n.decode() if isinstance(n, bytes) else str(n) for n in grp.attrs['class_name']]
+    start = sl.start or 0
+    columns = {
+        "n_layers": grp["n_layers"][sl],
+        "top_class": grp["top_class"][sl],
+        "water_level": grp["water_level"][sl],
+    }
+    if "tries" in grp:
+        columns["tries"] = grp["tries"][sl]
+    depth = grp["depth_to_class"][sl]
+    thick = grp["thickness"][sl]
+    for k, name in enumerate(names):
+        columns[feature_column_name("depth", name)] = depth[:, k]
+        columns[feature_column_name("thick", name)] = thick[:, k]
+    index = np.arange(start, start + len(columns["n_layers"]))
+    return pd.DataFrame(columns, index=index)
+
+
+def read_features(prior_file):
+    """
+    Read the feature tables of a prior file as a DataFrame.
+
+    Columns are n_layers, top_class, water_level, tries (if stored), and
+    depth_<class> and thick_<class> for every class (names lower-cased,
+    non-alphanumeric characters replaced by '_'). The index is the
+    realization number.
+
+    Args:
+        prior_file (str): HDF5 file written by geoprior1d.
+
+    Returns:
+        pandas.DataFrame
+    """
+    with h5py.File(prior_file, 'r') as f:
+        if FEATURES_GROUP not in f:
+            raise KeyError(f"{prior_file} has no '{FEATURES_GROUP}' group; "
+                           "regenerate it with a feature-writing geoprior1d version")
+        return _features_frame(f[FEATURES_GROUP])
+
+
+def query_prior(prior_file, expr, chunk_size=_QUERY_CHUNK):
+    """
+    Return the indices of realizations whose features match an expression.
+
+    The expression uses pandas.DataFrame.query syntax over the columns of
+    read_features(), e.g.
+
+        query_prior("prior.h5", "thick_meltwater_clay >= 10 and thick_meltwater_clay <= 20")
+        query_prior("prior.h5", "water_level < 5")
+        query_prior("prior.h5", "depth_paleogene_clay < 40 and n_layers > 6")
+
+    Only the feature tables are read, in chunks of chunk_size realizations.
+
+    Args:
+        prior_file (str): HDF5 file written by geoprior1d.
+        expr (str): Query expression.
+        chunk_size (int): Realizations evaluated per step.
+
+    Returns:
+        ndarray: Sorted realization indices (rows of M1/M2/M3) matching expr.
+    """
+    with h5py.File(prior_file, 'r') as f:
+        if FEATURES_GROUP not in f:
+            raise KeyError(f"{prior_file} has no '{FEATURES_GROUP}' group; "
+                           "regenerate it with a feature-writing geoprior1d version")
+        grp = f[FEATURES_GROUP]
+        Nreals = grp["n_layers"].shape[0]
+        matches = [
+            _features_frame(grp, slice(start, min(start + chunk_size, Nreals))).query(expr).index.to_numpy()
+            for start in range(0, Nreals, chunk_size)
+        ]
+    return np.concatenate(matches) if matches else np.zeros(0, dtype=int)
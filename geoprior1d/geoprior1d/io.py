@@ -1,6 +1,93 @@
 import pandas as pd
 import numpy as np
 
+# Sheets of an input file, keyed as stored in output file attributes
+SHEETS = {
+    'Class': 'Geology1',
+    'Unit': 'Geology2',
+    'Resistivity': 'Resistivity',
+    'Water': 'Water table',
+}
+
+# Columns holding text (names, comma-separated lists, colors) rather than numbers
+_TEXT_COLUMNS = {'Class', 'Classes', 'Probabilities', 'RGB color', 'Transitions'}
+
+
+def read_prior_tables(filename):
+    """
+    Read the sheets of an Excel input file.
+
+    Args:
+        filename (str): Path to Excel file.
+
+    Returns:
+        dict: DataFrames keyed like SHEETS ('Class', 'Unit', 'Resistivity' and,
+            if the optional water table sheet exists, 'Water').
+    """
+    # Open the workbook once for all sheets
+    with pd.ExcelFile(filename) as xls:
+        tables = {
+            'Class': xls.parse('Geology1'),
+            'Unit': xls.parse('Geology2'),
+            'Resistivity': xls.parse('Resistivity'),
+        }
+        try:
+            tables['Water'] = xls.parse('Water table')
+        except Exception:
+            pass  # Water table is optional
+    return tables
+
+
+def table_to_strings(table):
+    """Flatten a DataFrame to (headers, row-major contents) string lists for storage."""
+    headers = table.columns.astype(str).tolist()
+    # str() again: astype(str) keeps missing cells of text columns as float NaN
+    contents = [str(c) for c in table.astype(str).values.flatten()]
+    return headers, contents
+
+
+def table_from_strings(headers, contents):
+    """Rebuild a DataFrame stored with table_to_strings()."""
+    headers = [h.decode() if isinstance(h, bytes) else str(h) for h in headers]
+    contents = [c.decode() if isinstance(c, bytes) else str(c) for c in contents]
+    table = pd.DataFrame(np.array(contents, dtype=object).reshape(-1, len(headers)),
+                         columns=headers)
+    for col in table.columns:
+        if col not in _TEXT_COLUMNS:
+            table[col] = pd.to_numeric(table[col], errors='coerce')
+    return table
+
+
+def parse_transitions(text, n_types):
+    """
+    Parse a transition matrix from the optional Geology2 'Transitions' column.
+
+    Rows are separated by ';' and entries by ',', in the order of the
+    section's 'Classes'; row a holds the weights of the type following a layer
+    of type a, e.g. "0,0.7,0.3; 0.5,0,0.5; 0.4,0.6,0". Rows are normalized.
+
+    Args:
+        text: Cell content; empty or NaN means no matrix.
+        n_types (int): Number of layer types in the section.
+
+    Returns:
+        ndarray or None: (n_types, n_types) row-stochastic matrix.
+    """
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return None
+    text = str(text).strip()
+    if text.lower() in ('', 'nan', 'none'):
+        return None
+    rows = [list(map(float, row.split(','))) for row in text.split(';') if row.strip()]
+    T = np.array(rows, dtype=float)
+    if T.shape != (n_types, n_types):
+        raise ValueError(f"Transition matrix '{text}' must be {n_types}x{n_types} "
+                         f"(one row and column per class of the section)")
+    if np.any(T < 0) or np.any(T.sum(axis=1) <= 0):
+        raise ValueError(f"Transition matrix '{text}' needs non-negative rows with a positive sum")
+    return T / T.sum(axis=1, keepdims=True)
+
+
 def extract_prior_info(filename):
     """
     Reads geological prior information from an Excel file.
@@ -12,13 +99,27 @@ def extract_prior_info(filename):
         info (dict): Structured information from the Excel sheets.
         cmaps (dict): RGB color mapping for geological classes.
     """
+    return prior_info_from_tables(read_prior_tables(filename))
+
+
+def prior_info_from_tables(tables):
+    """
+    Build the prior information from input tables.
+
+    Args:
+        tables (dict): DataFrames keyed like SHEETS, as returned by
+            read_prior_tables() or rebuilt from an output file.
+
+    Returns:
+        info (dict): Structured information from the tables.
+        cmaps (dict): RGB color mapping for geological classes.
+    """
     info = {}
     cmaps = {}
 
-    # Read tables
-    T_geo1 = pd.read_excel(filename, sheet_name='Geology1')
-    T_geo2 = pd.read_excel(filename, sheet_name='Geology2')
-    T_res = pd.read_excel(filename, sheet_name='Resistivity')
+    T_geo1 = tables['Class']
+    T_geo2 = tables['Unit']
+    T_res = tables['Resistivity']
 
     # Classes
     info['Classes'] = {
@@ -48,6 +149,13 @@ def extract_prior_info(filename):
         'min_depth': T_geo2['Min depth'].astype(float).to_numpy(),
     }
 
+    # Optional transition matrices between the layer types of each section;
+    # sections without one follow their Repeat setting
+    if 'Transitions' in T_geo2.columns:
+        info['Sections']['transitions'] = [
+            parse_transitions(text, len(types))
+            for text, types in zip(T_geo2['Transitions'], info['Sections']['types'])]
+
     # Normalize probabilities: convert "1" to uniform distribution (preprocessing)
     for i in range(len(info['Sections']['probabilities'])):
         if info['Sections']['probabilities'][i][0] == 1:
@@ -73,14 +181,25 @@ def extract_prior_info(filename):
         info['Resistivity']['unsat_res'] = res
         info['Resistivity']['unsat_res_unc'] = res_unc
 
+    # Optional resistivity texture: per-class depth trend (log10 ohm-m per m
+    # below the layer top) and within-layer fluctuations with a correlation length
+    if 'Depth trend' in T_res.columns:
+        info['Resistivity']['trend'] = T_res['Depth trend'].astype(float).fillna(0).to_numpy()
+    if 'Within-layer uncertainty' in T_res.columns:
+        fluct = T_res['Within-layer uncertainty'].astype(float).fillna(1).to_numpy()
+        info['Resistivity']['fluct_unc'] = np.log10(fluct) / 3
+        if 'Correlation length' in T_res.columns:
+            corr = T_res['Correlation length'].astype(float).to_numpy()
+        else:
+            corr = np.full(len(fluct), np.nan)
+        info['Resistivity']['corr_length'] = np.where(np.isnan(corr), 5.0, corr)
+
     # Water table (optional)
-    try:
-        T_water = pd.read_excel(filename, sheet_name='Water table')
+    if 'Water' in tables:
+        T_water = tables['Water']
         info['Water Level'] = {
             'min': T_water['Min depth to water table'].astype(float).to_numpy(),
             'max': T_water['Max depth to water table'].astype(float).to_numpy()
         }
-    except Exception:
-        pass  # Water table is optional
 
     return info, cmaps
@@ -0,0 +1,284 @@
+"""Numba-compiled realization sampler (the "numba" engine).
+
+Requires numba; select it with engine="numba", or engine="auto" to use it
+whenever numba is installed (see geoprior1d.engines). The prior is first
+compiled into flat arrays (JitConfig), and one nopython kernel draws a block
+of realizations in parallel with prange. Per realization it follows
+prior_lith_reals (section draws, constraint checks and the redraw loop,
+Markov chains of layer types), prior_water_reals and prior_res_reals step by
+step. Texture (depth trends, within-layer fluctuations) is applied to the
+block afterwards with NumPy, as in the reference engine.
+
+Realization i is drawn from numba's generator seeded with seed + i, so runs
+are reproducible and independent of the number of threads. The streams
+differ from those of the reference engine, which also draws discrete
+choices from random.Random: both engines sample the same distribution, not
+the same realizations. The kernels are compiled on first use and cached on
+disk.
+"""
+
+from collections import namedtuple
+
+import numba
+import numpy as np
+from numba import njit, prange
+
+from .executors import mark_threads_started
+from .lithology import section_transitions, MAX_TRIES
+
+# Tolerance of the layer thickness checks (see _check_layer_thickness_constraints)
+_TOLERANCE = 1.05
+
+# Redraws after which the number of layers is redrawn too, and the redraw limit
+_REDRAW_LAYERS_AFTER = 100
+_MAX_TRIES = MAX_TRIES
+
+JitConfig = namedtuple('JitConfig', [
+    'n_sections', 'n_types', 'types', 'cum_init', 'cum_trans',
+    'min_layers', 'max_layers', 'sec_min_thick', 'sec_max_thick', 'frequency', 'min_depth',
+    'cls_min_thick', 'cls_max_thick',
+    'res_mu', 'res_sd', 'unsat_mu', 'unsat_sd',
+    'has_water', 'water_min', 'water_max', 'z', 'max_layers_total',
+])
+
+
+def compile_config(info, z_vec):
+    """
+    Flatten the prior information into the arrays used by the kernels.
+
+    Args:
+        info (dict): Prior information dictionary.
+        z_vec (array-like): Depths to cell bottoms.
+
+    Returns:
+        JitConfig: Section tables padded to the largest number of types,
+            cumulative type and transition weights, thickness limits, and the
+            log10 resistivity means and standard deviations per class.
+    """
+    S, C, R = info['Sections'], info['Classes'], info['Resistivity']
+    N = S['N_sections']
+    n_types = np.array([len(t) for t in S['types']], dtype=np.int64)
+    T = int(n_types.max())
+    types = np.zeros((N, T), dtype=np.int64)
+    cum_init = np.zeros((N, T))
+    cum_trans = np.zeros((N, T, T))
+    for i in range(N):
+        k = n_types[i]
+        types[i, :k] = S['types'][i]
+        cum_init[i, :k] = np.cumsum(np.asarray(S['probabilities'][i], dtype=float))
+        cum_trans[i, :k, :k] = np.cumsum(section_transitions(info, i), axis=1)
+    max_layers = np.asarray(S['max_layers'], dtype=np.int64)
+    has_water = 'Water Level' in info
+    water = info['Water Level'] if has_water else {'min': [0.0], 'max': [0.0]}
+    return JitConfig(
+        n_sections=N, n_types=n_types, types=types, cum_init=cum_init, cum_trans=cum_trans,
+        min_layers=np.asarray(S['min_layers'], dtype=np.int64), max_layers=max_layers,
+        sec_min_thick=np.asarray(S['min_thick'], dtype=float),
+        sec_max_thick=np.asarray(S['max_thick'], dtype=float),
+        frequency=np.asarray(S['frequency'], dtype=float),
+        min_depth=np.asarray(S['min_depth'], dtype=float),
+        cls_min_thick=np.asarray(C['min_thick'], dtype=float),
+        cls_max_thick=np.asarray(C['max_thick'], dtype=float),
+        res_mu=np.log10(np.asarray(R['res'], dtype=float)),
+        res_sd=np.asarray(R['res_unc'], dtype=float),
+        unsat_mu=np.log10(np.asarray(R['unsat_res'], dtype=float)),
+        unsat_sd=np.asarray(R['unsat_res_unc'], dtype=float),
+        has_water=has_water,
+        water_min=float(np.ravel(water['min'])[0]), water_max=float(np.ravel(water['max'])[0]),
+        z=np.asarray(z_vec, dtype=float),
+        max_layers_total=max(1, int(max_layers[:N - 1].sum())),
+    )
+
+
+@njit(cache=True)
+def _choose(cum, k, u):
+    """Index drawn by uniform u from the first k cumulative weights (as random.choices)."""
+    target = u * cum[k - 1]
+    s = 0
+    while s < k - 1 and cum[s] <= target:
+        s += 1
+    return s
+
+
+@njit(cache=True)
+def _draw_section(cfg, i, n_layers, thick, types):
+    """Draw section i into the rows thick/types; n_layers < 0 redraws the count.
+    Returns (unit thickness, number of layers)."""
+    thick_section = (np.random.rand() * (cfg.sec_max_thick[i] - cfg.sec_min_thick[i])
+                     + cfg.sec_min_thick[i])
+    if n_layers < 0:
+        n_layers = np.random.randint(cfg.min_layers[i], cfg.max_layers[i] + 1)
+    k = cfg.n_types[i]
+    state = 0
+    for j in range(n_layers):
+        if j == 0:
+            state = _choose(cfg.cum_init[i], k, np.random.rand())
+        else:
+            state = _choose(cfg.cum_trans[i, state], k, np.random.rand())
+        types[j] = cfg.types[i, state]
+    total = 0.0
+    for j in range(n_layers):
+        c = types[j] - 1
+        thick[j] = (np.random.rand() * (cfg.cls_max_thick[c] - cfg.cls_min_thick[c])
+                    + cfg.cls_min_thick[c])
+        total += thick[j]
+    # Layers are rescaled to the unit thickness
+    if total > 0:
+        for j in range(n_layers):
+            thick[j] *= thick_section / total
+    return thick_section, n_layers
+
+
+@njit(cache=True)
+def _violated(cfg, thick_sections, n_layers, thick, types):
+    """True if a layer thickness or a section depth constraint is violated."""
+    for i in range(cfg.n_sections - 1):
+        if thick_sections[i] == 0:
+            continue
+        for j in range(n_layers[i]):
+            c = types[i, j] - 1
+            if (thick[i, j] >= _TOLERANCE * cfg.cls_max_thick[c]
+                    or thick[i, j] <= cfg.cls_min_thick[c] / _TOLERANCE):
+                return True
+    depth = 0.0
+    for i in range(1, cfg.n_sections):
+        depth += thick_sections[i - 1]
+        if depth < cfg.min_depth[i]:
+            return True
+    return False
+
+
+@njit(cache=True)
+def _realization(cfg, seed, m, layer_index, n):
+    """Draw one realization into the rows m, layer_index and n.
+    Returns (water level, proposals, redraw limit hit)."""
+    np.random.seed(seed)
+    N = cfg.n_sections
+    z = cfg.z
+    Nz = z.shape[0]
+
+    # Bottom section fills the column
+    m[:] = cfg.types[N - 1, _choose(cfg.cum_init[N - 1], cfg.n_types[N - 1], np.random.rand())]
+    layer_index[:] = 1
+    layer_count = 2
+    tries = 0
+    failed = False
+
+    if N > 1:
+        width = max(1, cfg.max_layers[:N - 1].max())
+        active = np.empty(N - 1, dtype=np.bool_)
+        for i in range(N - 1):
+            active[i] = np.random.rand() <= cfg.frequency[i]
+        thick_sections = np.zeros(N)
+        n_layers = np.zeros(N - 1, dtype=np.int64)
+        thick = np.zeros((N - 1, width))
+        types = np.zeros((N - 1, width), dtype=np.int64)
+        for i in range(N - 1):
+            if active[i]:
+                thick_sections[i], n_layers[i] = _draw_section(cfg, i, -1, thick[i], types[i])
+
+        # Redraw until all constraints are met
+        tries = 1
+        while _violated(cfg, thick_sections, n_layers, thick, types):
+            for i in range(N - 1):
+                if active[i]:
+                    keep = -1 if tries > _REDRAW_LAYERS_AFTER else n_layers[i]
+                    thick_sections[i], n_layers[i] = _draw_section(cfg, i, keep, thick[i], types[i])
+            tries += 1
+            if tries > _MAX_TRIES:
+                failed = True
+                break
+
+        # Layer bottoms from the top; deeper layers are filled first
+        n_total = n_layers.sum()
+        bottoms = np.empty(n_total)
+        codes = np.empty(n_total, dtype=np.int64)
+        k = 0
+        depth = 0.0
+        for i in range(N - 1):
+            for j in range(n_layers[i]):
+                depth += thick[i, j]
+                bottoms[k] = depth
+                codes[k] = types[i, j]
+                k += 1
+        for k in range(n_total - 1, -1, -1):
+            for c in range(Nz):
+                if z[c] <= bottoms[k]:
+                    m[c] = codes[k]
+                if z[c] < bottoms[k]:
+                    layer_index[c] = layer_count
+            layer_count += 1
+
+    # Water level
+    o = 0.0
+    if cfg.has_water:
+        o = np.random.rand() * (cfg.water_max - cfg.water_min) + cfg.water_min
+
+    # One resistivity per layer present, in order of layer index
+    first = np.full(layer_count, -1, dtype=np.int64)
+    for c in range(Nz):
+        if first[layer_index[c]] < 0:
+            first[layer_index[c]] = c
+    sat = np.zeros(layer_count)
+    unsat = np.zeros(layer_count)
+    draw_unsat = o != z[0]
+    for lid in range(layer_count):
+        if first[lid] < 0:
+            continue
+        cls = m[first[lid]] - 1
+        sat[lid] = 10 ** (cfg.res_mu[cls] + cfg.res_sd[cls] * np.random.randn())
+        if draw_unsat:
+            unsat[lid] = 10 ** (cfg.unsat_mu[cls] + cfg.unsat_sd[cls] * np.random.randn())
+    for c in range(Nz):
+        n[c] = sat[layer_index[c]]
+
+    # Unsaturated values above the water table, weighted mean in the crossing cell
+    if o != 0 and draw_unsat:
+        for c in range(Nz):
+            if z[c] < o:
+                n[c] = unsat[layer_index[c]]
+        for c in range(Nz - 1):
+            d0, d1 = z[c] - o, z[c + 1] - o
+            if d0 * d1 < 0:
+                n[c + 1] = (unsat[layer_index[c + 1]] * abs(d0) + n[c + 1] * d1) / (abs(d0) + d1)
+                break
+    return o, tries, failed
+
+
+@njit(parallel=True, cache=True)
+def _sample_block(cfg, seeds, ms, layer_index, ns, ws, tries, failed):
+    for k in prange(seeds.shape[0]):
+        ws[k], tries[k], failed[k] = _realization(cfg, seeds[k], ms[k], layer_index[k], ns[k])
+
+
+def sample_block(info, z_vec, seeds, n_threads=None):
+    """
+    Draw realizations with the compiled kernels.
+
+    Args:
+        info (dict): Prior information dictionary.
+        z_vec (array-like): Depths to cell bottoms.
+        seeds (array-like): Seed of every realization.
+        n_threads (int, optional): Number of threads (default: numba's setting).
+
+    Returns:
+        tuple: (ms, ns, os, layer_index, block_flag, tries), with block_flag
+            holding the aggregated flags as in _generate_block and tries the
+            proposals of every realization.
+    """
+    cfg = compile_config(info, z_vec)
+    seeds = np.asarray(seeds, dtype=np.int64)
+    n, Nz = len(seeds), len(cfg.z)
+    ms = np.empty((n, Nz), dtype=np.int64)
+    layer_index = np.empty((n, Nz), dtype=np.int64)
+    ns = np.empty((n, Nz))
+    ws = np.empty(n)
+    tries = np.empty(n, dtype=np.int64)
+    failed = np.empty(n, dtype=np.bool_)
+    if n_threads:
+        numba.set_num_threads(max(1, min(int(n_threads), numba.config.NUMBA_NUM_THREADS)))
+    _sample_block(cfg, seeds, ms, layer_index, ns, ws, tries, failed)
+    # numba's threading layer is running now; fork-based pools are unsafe from here on
+    mark_threads_started()
+    block_flag = [int(failed.any()), 0, int(tries.sum())]
+    return ms, ns, ws, layer_index, block_flag, tries
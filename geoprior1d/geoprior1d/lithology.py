@@ -1,5 +1,182 @@
+from bisect import bisect
+
 import numpy as np
-import random
+from .rng import GLOBAL_RNG
+
+# Proposals after which the redraw loop gives up (flag_vector[0] = 1)
+MAX_TRIES = 1000
+
+# Proposals per batch of pre-drawn chains of a section with a Transitions matrix
+_CHAIN_BATCH = 8
+
+
+def smallest_int_dtype(max_value):
+    """Return the smallest signed integer dtype that can hold 0..max_value."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def lithology_dtype(info):
+    """Integer dtype used for lithology class codes of a prior."""
+    return smallest_int_dtype(len(info['Classes']['codes']))
+
+
+def layer_index_dtype(info):
+    """Integer dtype used for layer indices (at most 1 + sum of max layers)."""
+    return smallest_int_dtype(1 + int(np.sum(info['Sections']['max_layers'])))
+
+
+def section_transitions(info, i):
+    """Transition weights between the layer types of section i.
+
+    Row a holds the weights of the next layer's type after a layer of type
+    info['Sections']['types'][i][a]. An explicit matrix from the 'Transitions'
+    column is used as is. Otherwise Repeat=1 gives independent layers (every
+    row equals the type probabilities) and Repeat=0 forbids adjacent layers of
+    the same type (zero diagonal).
+
+    Returns:
+        ndarray: (n_types, n_types) row weights (rows need not sum to one)
+    """
+    transitions = info['Sections'].get('transitions')
+    if transitions is not None and transitions[i] is not None:
+        return np.asarray(transitions[i], dtype=float)
+    probs = np.asarray(info['Sections']['probabilities'][i], dtype=float)
+    T = np.tile(probs, (len(probs), 1))
+    if info['Sections']['repeat'][i] != 1:
+        np.fill_diagonal(T, 0)
+    return T
+
+
+def section_chain(info, i):
+    """Cumulative weights (initial, transition rows) of the layer-type chain of
+    section i, as lists for fast scalar lookups."""
+    probs = np.asarray(info['Sections']['probabilities'][i], dtype=float)
+    return np.cumsum(probs).tolist(), np.cumsum(section_transitions(info, i), axis=1).tolist()
+
+
+def section_chains(info):
+    """section_chain() of every section above the bottom one."""
+    return [section_chain(info, i) for i in range(info['Sections']['N_sections'] - 1)]
+
+
+def _markov_chain(cum_initial, cum_rows, u):
+    """Markov chain of layer types driven by uniforms u (list of state indices).
+
+    The first state is drawn from the cumulative initial weights, each
+    following state from the row of the previous one, by inverse-CDF lookup
+    exactly as random.choices does; a chain driven by the uniforms of a
+    random.Random stream reproduces successive choices() calls.
+    """
+    last = len(cum_initial) - 1
+    states = []
+    cum = cum_initial
+    for x in u:
+        state = bisect(cum, x * cum[-1], 0, last)
+        states.append(state)
+        cum = cum_rows[state]
+    return states
+
+
+def sample_markov_chains(cum_initial, cum_transitions, u):
+    """Sample many Markov chains of layer types at once.
+
+    Vectorized _markov_chain: row r of the result equals
+    _markov_chain(cum_initial, cum_transitions, u[r]).
+
+    Args:
+        cum_initial: (n_types,) cumulative initial weights
+        cum_transitions: (n_types, n_types) cumulative transition weights per row
+        u: (n_chains, n_steps) uniforms on [0, 1)
+
+    Returns:
+        ndarray: (n_chains, n_steps) state indices into the section's types
+    """
+    cum_initial = np.asarray(cum_initial, dtype=float)
+    cum_transitions = np.asarray(cum_transitions, dtype=float)
+    u = np.atleast_2d(u)
+    last = len(cum_initial) - 1
+    states = np.empty(u.shape, dtype=np.intp)
+    if u.shape[1] == 0:
+        return states
+    states[:, 0] = np.minimum(
+        np.searchsorted(cum_initial, u[:, 0] * cum_initial[-1], side='right'), last)
+    for j in range(1, u.shape[1]):
+        rows = cum_transitions[states[:, j - 1]]
+        x = u[:, j] * rows[:, -1]
+        states[:, j] = np.minimum(np.count_nonzero(rows <= x[:, None], axis=1), last)
+    return states
+
+
+class ChainPool:
+    """
+    Pre-drawn layer-type chains of one realization, for the sections with a
+    Transitions matrix.
+
+    Chains are drawn _CHAIN_BATCH proposals at a time at the section's
+    maximum number of layers, from the realization's NumPy stream; a proposal
+    with fewer layers uses a prefix of its chain. The first batch is drawn
+    before any other draw of the realization, so chain_pools() can draw it
+    for a whole block with one sample_markov_chains() call per section and
+    still give the same realizations as a single-realization run.
+
+    Args:
+        sections (dict): {section: (cum_initial, cum_rows, max_layers)}.
+        rng (RealizationRNG): Random source of the realization.
+    """
+
+    def __init__(self, sections, rng):
+        self.sections = sections
+        self._rng = rng
+        self._batches = {}
+        self._next = {}
+
+    def uniforms(self, i):
+        """Uniforms of the next batch of section i."""
+        length = self.sections[i][2]
+        return self._rng.rand_vector(_CHAIN_BATCH * length).reshape(_CHAIN_BATCH, length)
+
+    def fill(self, i, states):
+        self._batches[i], self._next[i] = states, 0
+
+    def draw(self, i, n_layers):
+        """State indices of the next chain of section i, n_layers long."""
+        if self._next[i] == _CHAIN_BATCH:
+            cum_initial, cum_rows, _ = self.sections[i]
+            self.fill(i, sample_markov_chains(cum_initial, cum_rows, self.uniforms(i)))
+        chain = self._batches[i][self._next[i], :n_layers]
+        self._next[i] += 1
+        return chain
+
+
+def _explicit_sections(info, chains):
+    """ChainPool sections: those above the bottom one with a Transitions matrix."""
+    transitions = info['Sections'].get('transitions')
+    if transitions is None:
+        return {}
+    return {i: (np.asarray(chains[i][0]), np.asarray(chains[i][1]),
+                int(info['Sections']['max_layers'][i]))
+            for i in range(info['Sections']['N_sections'] - 1) if transitions[i] is not None}
+
+
+def chain_pools(info, rngs, chains=None):
+    """
+    ChainPools of a block of realizations (None for priors without
+    Transitions matrices), with the first batch of every section drawn for
+    all realizations at once.
+    """
+    sections = _explicit_sections(info, section_chains(info) if chains is None else chains)
+    if not sections:
+        return [None] * len(rngs)
+    pools = [ChainPool(sections, rng) for rng in rngs]
+    for i, (cum_initial, cum_rows, _) in sections.items():
+        states = sample_markov_chains(cum_initial, cum_rows,
+                                      np.concatenate([pool.uniforms(i) for pool in pools]))
+        for k, pool in enumerate(pools):
+            pool.fill(i, states[k * _CHAIN_BATCH:(k + 1) * _CHAIN_BATCH])
+    return pools
 
 
 def _check_layer_thickness_constraints(thick_sections, thick_layers, types_layers, class_max_thick, class_min_thick, tolerance=1.05):
@@ -29,7 +206,8 @@ def _check_section_depth_constraints(thick_sections, N, min_depths):
     return 0
 
 
-def _generate_section_layers(i, is_active, info, existing_N_layers=None):
+def _generate_section_layers(i, is_active, info, existing_N_layers=None, rng=GLOBAL_RNG,
+                             use_qmc=False, chain=None, chain_pool=None):
     """Generate layers for a single geological section.
 
     Args:
@@ -37,6 +215,11 @@ def _generate_section_layers(i, is_active, info, existing_N_layers=None):
         is_active: Whether this section should be generated (based on frequency)
         info: Geological information dictionary
         existing_N_layers: If provided, reuse this count instead of regenerating (default: None)
+        rng: Random source (default: global np.random/random state)
+        use_qmc: Draw the thicknesses from the realization's QMC point (first proposal only)
+        chain: Precomputed section_chain(info, i) (default: computed here)
+        chain_pool: ChainPool of the realization; sections with a Transitions
+            matrix take their chain from it
 
     Returns:
         tuple: (thick_section, N_layers_count, types_layer_list, thick_layer_array)
@@ -45,7 +228,7 @@ def _generate_section_layers(i, is_active, info, existing_N_layers=None):
         return 0, 0, [], np.array([])
 
     # Thickness of unit
-    thick_section = np.random.rand() * (
+    thick_section = rng.rand(rng.slot('section', i) if use_qmc else None) * (
         info['Sections']['max_thick'][i] - info['Sections']['min_thick'][i]
     ) + info['Sections']['min_thick'][i]
 
@@ -53,62 +236,57 @@ def _generate_section_layers(i, is_active, info, existing_N_layers=None):
     if existing_N_layers is not None:
         N_layers_count = existing_N_layers
     else:
-        N_layers_count = np.random.randint(
+        N_layers_count = rng.randint(
             info['Sections']['min_layers'][i],
             info['Sections']['max_layers'][i] + 1)
 
-    # Types of layers
-    if info['Sections']['repeat'][i] == 1 or N_layers_count < 2:
-        # Allow repeating layers or single layer
-        types_layer_list = random.choices(
-            info['Sections']['types'][i],
-            weights=info['Sections']['probabilities'][i],
-            k=N_layers_count)
+    # Types of layers: Markov chain over the section's types
+    types = info['Sections']['types'][i]
+    if chain_pool is not None and i in chain_pool.sections:
+        states = chain_pool.draw(i, N_layers_count)
     else:
-        # Force alternation: no adjacent identical layers
-        vec = [random.choices(
-            info['Sections']['types'][i],
-            weights=info['Sections']['probabilities'][i],
-            k=1)[0]]
-        for j in range(1, N_layers_count):
-            available_types = [t for t in info['Sections']['types'][i] if t != vec[j-1]]
-            available_probs = [p for t, p in zip(info['Sections']['types'][i],
-                                                 info['Sections']['probabilities'][i])
-                             if t != vec[j-1]]
-            vec.append(random.choices(available_types, weights=available_probs, k=1)[0])
-        types_layer_list = vec
+        cum_initial, cum_rows = chain if chain is not None else section_chain(info, i)
+        states = _markov_chain(cum_initial, cum_rows, rng.choice_uniforms(N_layers_count))
+    types_layer_list = [types[s] for s in states]
 
     # Thicknesses of layers
     t_layers = []
-    for t in types_layer_list:
+    for j, t in enumerate(types_layer_list):
         idx = t - 1
         t_layers.append(
-            np.random.rand() * (info['Classes']['max_thick'][idx] - info['Classes']['min_thick'][idx])
+            rng.rand(rng.slot('layer', i, j) if use_qmc else None) * (info['Classes']['max_thick'][idx] - info['Classes']['min_thick'][idx])
             + info['Classes']['min_thick'][idx])
     thick_layer_array = np.array(t_layers)
 
     return thick_section, N_layers_count, types_layer_list, thick_layer_array
 
 
-def prior_lith_reals(info, z, flag_vector):
+def prior_lith_reals(info, z, flag_vector, rng=GLOBAL_RNG, chains=None, chain_pool=None):
     # Number of units
     N = info['Sections']['N_sections']
 
+    # Layer-type chains of the sections, shared by all proposals
+    if chains is None:
+        chains = section_chains(info)
+    # Chains of sections with a Transitions matrix are drawn first, in batches
+    if chain_pool is None:
+        chain_pool = chain_pools(info, [rng], chains)[0]
+
     # Initialize lithology vector
     types = info['Sections']['types'][N-1]
     probs = info['Sections']['probabilities'][N-1]
-    choice = random.choices(types, weights=probs, k=1)[0]
-    m = np.full_like(z, choice, dtype=float)
+    choice = rng.choices(types, weights=probs, k=1)[0]
+    m = np.full(np.shape(z), choice, dtype=lithology_dtype(info))
 
     # Initialize layer vector
     layer_count = 1
-    layer_index = np.full_like(z, layer_count, dtype=int)
+    layer_index = np.full(np.shape(z), layer_count, dtype=layer_index_dtype(info))
     layer_count += 1
     if N == 1:
         return m, layer_index, flag_vector
 
     # Random vector for frequency of layers
-    r = np.random.rand(N-1)
+    r = rng.rand_vector(N-1)
 
     # Preallocate vectors
     thick_sections = np.zeros(N)
@@ -120,7 +298,8 @@ def prior_lith_reals(info, z, flag_vector):
     for i in range(N-1):
         is_active = r[i] <= info['Sections']['frequency'][i]
         thick_sections[i], N_layers[i], types_layers[i], thick_layers[i] = \
-            _generate_section_layers(i, is_active, info)
+            _generate_section_layers(i, is_active, info, rng=rng, use_qmc=True,
+                                     chain=chains[i], chain_pool=chain_pool)
 
     # Normalize thicknesses
     if N > 1:
@@ -147,7 +326,8 @@ def prior_lith_reals(info, z, flag_vector):
             # Keep existing N_layers unless tries > 100, then allow regeneration
             existing_N = None if tries > 100 else N_layers[i]
             thick_sections[i], N_layers[i], types_layers[i], thick_layers[i] = \
-                _generate_section_layers(i, is_active, info, existing_N_layers=existing_N)
+                _generate_section_layers(i, is_active, info, existing_N_layers=existing_N,
+                                         rng=rng, chain=chains[i], chain_pool=chain_pool)
 
         if N > 1:
             for i in np.where(thick_sections != 0)[0]:
@@ -160,7 +340,7 @@ def prior_lith_reals(info, z, flag_vector):
             thick_sections, N, section_min_depths)
 
         tries += 1
-        if tries > 1000:
+        if tries > MAX_TRIES:
             flag_vector[0] = 1
             break
 
@@ -0,0 +1,149 @@
+"""Memory estimation and automatic block sizing."""
+
+import re
+
+import numpy as np
+
+from .lithology import smallest_int_dtype
+
+# Multipliers for memory sizes like "512M" or "4GB"
+_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+# Copies of a block alive at once: worker result, pickled buffer, unpickled copy
+_BLOCK_COPIES = 3
+
+# float64 arrays per cell of a block while it is generated (raw resistivity,
+# texture offsets, their power and the textured product)
+_FLOAT64_TEMPORARIES = 4
+
+# Bytes of the layer index per cell when the prior is not known (int16)
+_LAYER_BYTES = 2
+
+# Largest block chosen automatically (larger blocks only hurt load balancing)
+_MAX_AUTO_BLOCK = 1000
+
+
+def parse_memory_size(size):
+    """
+    Parse a memory size such as 4096, "512M", "4G" or "1.5GB" into bytes.
+
+    Args:
+        size (int, float or str): Size in bytes, or a number with a K/M/G/T suffix.
+
+    Returns:
+        int: Size in bytes.
+    """
+    if isinstance(size, (int, float)):
+        return int(size)
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([KMGT]?)i?B?\s*", str(size).upper())
+    if match is None:
+        raise ValueError(f"Invalid memory size '{size}' (examples: 512M, 4G)")
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def estimate_memory(Nreals, dmax, dz, n_classes=8, n_workers=1, block_size=1000,
+                    features=True, store_layers=False, streamed=False):
+    """
+    Estimate the memory needed to generate a prior.
+
+    Args:
+        Nreals (int): Number of realizations.
+        dmax (float): Maximum depth in meters.
+        dz (float): Depth discretization step in meters.
+        n_classes (int): Number of lithology classes (sets the lithology dtype).
+        n_workers (int): Number of parallel workers (0 = sequential).
+        block_size (int): Realizations per work unit.
+        features (bool): Include the feature tables, which geoprior1d() always
+            computes (see geoprior1d.features).
+        store_layers (bool): Include the layer index of every cell (int16).
+        streamed (bool): Blocks are written to the output file as they
+            complete (checkpointed and mixture runs), so the output arrays are
+            never held in memory.
+
+    Returns:
+        dict: Byte counts:
+            per_realization - one realization (lithology, resistivity, water
+                              level, features and layer index)
+            output          - the full output arrays (0 when streamed)
+            block           - one block of realizations
+            temporaries     - float64 working arrays of one block
+            in_flight       - blocks being generated or transferred at once
+            total           - output + in_flight
+    """
+    Nz = len(np.arange(dz, dmax + dz, dz))
+    return _memory_breakdown(Nreals, Nz, n_classes, n_workers, block_size, features=features,
+                             layer_bytes=_LAYER_BYTES if store_layers else 0, streamed=streamed)
+
+
+def _feature_bytes(n_classes):
+    """Bytes of the feature tables of one realization (see compute_features)."""
+    int16, float32 = np.dtype(np.int16).itemsize, np.dtype(np.float32).itemsize
+    # n_layers, top_class, tries; depth_to_class, thickness per class; water_level
+    return 3 * int16 + 2 * n_classes * float32 + float32
+
+
+def _memory_breakdown(Nreals, Nz, n_classes, n_workers, block_size, features=False,
+                      layer_bytes=0, streamed=False):
+    """estimate_memory() for a depth grid with Nz cells and layer indices of
+    layer_bytes per cell (0 = not stored)."""
+    lith_bytes = smallest_int_dtype(n_classes).itemsize
+    per_real = Nz * (lith_bytes + np.dtype(np.float32).itemsize) + np.dtype(np.float32).itemsize
+    per_real += Nz * layer_bytes
+    if features:
+        per_real += _feature_bytes(n_classes)
+
+    block_size = max(1, min(block_size, Nreals))
+    block = per_real * block_size
+    temporaries = Nz * _FLOAT64_TEMPORARIES * np.dtype(np.float64).itemsize * block_size
+    # Each worker holds one block and at most one more is queued per worker
+    in_flight = (block * _BLOCK_COPIES * 2 + temporaries) * max(n_workers, 1)
+
+    output = 0 if streamed else per_real * Nreals
+    if features and not streamed:
+        # Feature blocks are concatenated at the end: two copies at once
+        output += _feature_bytes(n_classes) * Nreals
+    return {
+        "per_realization": per_real,
+        "output": output,
+        "block": block,
+        "temporaries": temporaries,
+        "in_flight": in_flight,
+        "total": output + in_flight,
+    }
+
+
+def choose_block_size(max_memory, Nreals, dmax, dz, n_classes=8, n_workers=1,
+                      features=True, store_layers=False, streamed=False):
+    """
+    Pick the largest block size whose in-flight memory fits next to the output.
+
+    Args:
+        max_memory (int or str): Memory budget in bytes, or a size like "4G".
+        Nreals, dmax, dz, n_classes, n_workers, features, store_layers,
+            streamed: As for estimate_memory().
+
+    Returns:
+        int: Block size (realizations per work unit).
+
+    Raises:
+        MemoryError: If the output arrays alone do not fit in the budget.
+    """
+    Nz = len(np.arange(dz, dmax + dz, dz))
+    return _block_size_for_budget(max_memory, Nreals, Nz, n_classes, n_workers, features=features,
+                                  layer_bytes=_LAYER_BYTES if store_layers else 0,
+                                  streamed=streamed)
+
+
+def _block_size_for_budget(max_memory, Nreals, Nz, n_classes, n_workers, features=False,
+                           layer_bytes=0, streamed=False):
+    """choose_block_size() for a depth grid with Nz cells."""
+    budget = parse_memory_size(max_memory)
+    est = _memory_breakdown(Nreals, Nz, n_classes, n_workers, block_size=1, features=features,
+                            layer_bytes=layer_bytes, streamed=streamed)
+    available = budget - est["output"]
+    if available < est["in_flight"]:
+        raise MemoryError(
+            f"Generating {Nreals} realizations needs at least "
+            f"{(est['output'] + est['in_flight']) / 1024**2:.1f} MB, "
+            f"which exceeds the memory budget of {budget / 1024**2:.1f} MB.")
+    return int(min(_MAX_AUTO_BLOCK, max(1, Nreals), available // est["in_flight"]))
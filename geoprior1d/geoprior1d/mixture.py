@@ -0,0 +1,269 @@
+"""Scenario-mixture priors: several input files sampled in one run.
+
+Geological uncertainty is often expressed as a weighted set of scenarios,
+each an Excel configuration. A mixture run allocates the realizations over
+the scenarios in proportion to their weights (largest-remainder rounding),
+shuffles the allocation with the run's seed so any prefix of the file is a
+representative mixture, and generates all scenarios over one worker pool,
+writing blocks to the output file as they complete.
+
+Classes are unified by name: the output class codes follow the order in
+which class names first appear in the scenarios, and every scenario's
+lithology is mapped into that code space. The output file holds, besides
+M1/M2/M3 and the feature tables (in unified codes):
+
+    M4               scenario of each realization (1..n_scenarios)
+    scenarios/<k>    input tables of scenario k (attributes as at file level)
+    scenarios attrs  name, file, weight and count of each scenario
+
+Realization i is seeded with seed + i whatever its scenario, so results are
+independent of block size and worker count.
+"""
+
+import os
+from datetime import datetime
+from functools import partial
+from multiprocessing import cpu_count
+
+import h5py
+import numpy as np
+
+from .core import prior_filename, create_prior_datasets, write_prior_block, write_input_tables
+from .executors import open_executor, executor_workers
+from .io import extract_prior_info
+from .lithology import smallest_int_dtype
+from .memory import _block_size_for_budget
+from .progress import get_progress_reporter
+from .rng import SAMPLERS
+from .sampling import _generate_block, _default_block_size, _split_blocks, _imap_bounded, _merge_flags
+
+SCENARIOS_GROUP = "scenarios"
+
+# Mixture configuration kept resident in pool workers
+_WORKER_MIXTURE = None
+
+
+def allocate_realizations(weights, Nreals):
+    """Realizations per scenario, proportional to weights (largest remainder)."""
+    weights = np.asarray(weights, dtype=float)
+    if len(weights) == 0 or np.any(weights < 0) or weights.sum() <= 0:
+        raise ValueError("Scenario weights must be non-negative with a positive sum")
+    exact = weights / weights.sum() * Nreals
+    counts = np.floor(exact).astype(np.int64)
+    remainder = Nreals - counts.sum()
+    counts[np.argsort(-(exact - counts), kind='stable')[:remainder]] += 1
+    return counts
+
+
+def scenario_ids(counts, seed):
+    """Shuffled scenario index (0-based) of every realization."""
+    ids = np.repeat(np.arange(len(counts), dtype=smallest_int_dtype(len(counts))), counts)
+    return np.random.default_rng(seed).permutation(ids)
+
+
+def unify_classes(infos, cmaps_list):
+    """
+    Merge the class tables of several priors by class name.
+
+    Returns:
+        info (dict): Prior information holding the unified 'Classes' table.
+        cmaps (dict): Unified colormap.
+        code_maps (list): Per scenario, an array mapping its class codes
+            (index) to unified codes (entry 0 unused).
+    """
+    names, min_thick, max_thick, colors = [], [], [], []
+    code_maps = []
+    for info, cmaps in zip(infos, cmaps_list):
+        classes = info['Classes']
+        code_map = np.zeros(len(classes['names']) + 1, dtype=np.int64)
+        for k, name in enumerate(classes['names']):
+            if name not in names:
+                names.append(name)
+                min_thick.append(classes['min_thick'][k])
+                max_thick.append(classes['max_thick'][k])
+                colors.append(cmaps['Classes'][k])
+            code_map[k + 1] = names.index(name) + 1
+        code_maps.append(code_map)
+
+    info = {'Classes': {
+        'names': names,
+        'min_thick': np.array(min_thick),
+        'max_thick': np.array(max_thick),
+        'codes': list(range(1, len(names) + 1)),
+    }}
+    if any('Water Level' in i for i in infos):
+        info['Water Level'] = next(i['Water Level'] for i in infos if 'Water Level' in i)
+    return info, {'Classes': np.array(colors)}, code_maps
+
+
+def _init_mixture_worker(infos, code_maps, z_vec):
+    """Pool initializer: keep the scenario configurations resident in the worker."""
+    global _WORKER_MIXTURE
+    _WORKER_MIXTURE = (infos, code_maps, z_vec)
+
+
+def _mixture_block(bounds, ids, infos, code_maps, z_vec, seed_offset=0, **kwargs):
+    """Generate block start..stop-1 of a mixture, each realization from its scenario."""
+    start, stop = bounds
+    # Unified class count: every unified code is the image of some scenario's class
+    n_classes = max(int(m.max()) for m in code_maps)
+    Nz = len(z_vec)
+    ms = np.zeros((stop - start, Nz), dtype=smallest_int_dtype(n_classes))
+    ns = np.zeros((stop - start, Nz), dtype=np.float32)
+    ws = np.zeros(stop - start, dtype=np.float32)
+    block_flag = [0, 0, 0]
+    features = {}
+    for s in np.unique(ids):
+        rows = np.flatnonzero(ids == s)
+        result = _generate_block(start, stop, infos[s], z_vec, seed_offset,
+                                 indices=start + rows, code_map=code_maps[s],
+                                 n_classes=n_classes, **kwargs)
+        ms[rows], ns[rows], ws[rows] = result[:3]
+        _merge_flags(block_flag, result[3])
+        if len(result) > 4:
+            for key, values in result[4].items():
+                if key not in features:
+                    features[key] = np.full((stop - start,) + values.shape[1:],
+                                            np.nan if key == 'depth_to_class' else 0,
+                                            dtype=values.dtype)
+                features[key][rows] = values
+    return ms, ns, ws, block_flag, features
+
+
+def _mixture_block_task(task, seed_offset=0, **kwargs):
+    """Pool worker: a mixture block for the configuration set by the initializer."""
+    bounds, ids = task
+    infos, code_maps, z_vec = _WORKER_MIXTURE
+    return _mixture_block(bounds, ids, infos, code_maps, z_vec, seed_offset, **kwargs)
+
+
+def _scenario_task(task, infos, code_maps, z_vec, seed_offset=0, **kwargs):
+    """Worker for threads and sequential runs: configuration passed directly."""
+    bounds, ids = task
+    return _mixture_block(bounds, ids, infos, code_maps, z_vec, seed_offset, **kwargs)
+
+
+def _scenario_names(files):
+    names = []
+    for path in files:
+        base = os.path.splitext(os.path.basename(path))[0]
+        name, k = base, 2
+        while name in names:
+            name, k = f"{base}_{k}", k + 1
+        names.append(name)
+    return names
+
+
+def geoprior1d_mixture(input_files, weights, Nreals, dmax, dz, output_file=None,
+                       n_processes=-1, seed=None, progress=None, sampler="random",
+                       executor=None, block_size=None, max_memory=None):
+    """
+    Generate a scenario-mixture prior from several input files and save it to HDF5.
+
+    Args:
+        input_files (list): Excel input files, one per scenario.
+        weights (list, optional): Scenario weights (default: equal weights).
+        Nreals (int): Total number of realizations.
+        dmax (float): Maximum depth in meters.
+        dz (float): Depth discretization step in meters.
+        output_file (str, optional): Output filename (default: auto-generated
+            from the first input file).
+        n_processes (int): Number of workers (-1 = all cores, 0 = sequential).
+        seed (int, optional): Base seed; also fixes the scenario allocation.
+        progress (optional): Progress sink, see get_prior_sample.
+        sampler (str): "random", "sobol" or "lhs".
+        executor (str or Executor, optional): Execution backend.
+        block_size (int, optional): Realizations per work unit.
+        max_memory (int or str, optional): Memory budget used to size the
+            blocks; only blocks in flight are held in memory.
+
+    Returns:
+        name (str): Output HDF5 filename.
+        flag_vector (list): Flags indicating issues during generation.
+    """
+    if weights is None:
+        weights = np.ones(len(input_files))
+    if len(weights) != len(input_files):
+        raise ValueError(f"Got {len(weights)} weights for {len(input_files)} input files")
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler '{sampler}'. Choose from: {', '.join(SAMPLERS)}")
+    reporter = get_progress_reporter(progress)
+    if seed is None:
+        seed = np.random.randint(0, 1e9)  # For reproducibility across runs
+    seed_offset = int(seed)
+
+    parsed = [extract_prior_info(path) for path in input_files]
+    infos = [info for info, _ in parsed]
+    info, cmaps, code_maps = unify_classes(infos, [c for _, c in parsed])
+    z_vec = np.arange(dz, dmax + dz, dz)
+    counts = allocate_realizations(weights, Nreals)
+    ids = scenario_ids(counts, seed_offset)
+    names = _scenario_names(input_files)
+
+    # Determine number of workers (0 = sequential execution)
+    if n_processes is not None and n_processes != 0:
+        n_workers = cpu_count() if n_processes == -1 else min(n_processes, cpu_count())
+    else:
+        n_workers = 0
+    if executor is None:
+        executor = "process" if n_workers > 0 else "sequential"
+    n_workers = executor_workers(executor, n_workers)
+    resident = executor == "process" and n_workers > 0
+    kwargs = dict(seed_offset=seed_offset, features=True, sampler=sampler, n_total=Nreals)
+    if resident:
+        worker = partial(_mixture_block_task, **kwargs)
+    else:
+        worker = partial(_scenario_task, infos=infos, code_maps=code_maps, z_vec=z_vec, **kwargs)
+
+    if block_size is None:
+        block_size = _default_block_size(Nreals, n_workers)
+        if max_memory is not None:
+            block_size = min(block_size, _block_size_for_budget(
+                max_memory, Nreals, len(z_vec), len(info['Classes']['codes']), n_workers,
+                features=True, streamed=True))
+    blocks = _split_blocks(Nreals, block_size)
+    tasks = [((start, stop), ids[start:stop]) for start, stop in blocks]
+
+    name = prior_filename(output_file, info, input_files[0], Nreals, dmax)
+    if os.path.exists(name):
+        os.remove(name)
+    flag_vector = [0, 0, 0]
+
+    reporter.start(Nreals, n_workers)
+    with h5py.File(name, 'w') as f, \
+            open_executor(executor, n_workers, initializer=_init_mixture_worker if resident else None,
+                          initargs=(infos, code_maps, z_vec) if resident else ()) as pool:
+        create_prior_datasets(f, info, cmaps, dmax, dz, Nreals, len(z_vec))
+        dset_M4 = f.create_dataset('M4', data=(ids.astype(np.int16) + 1).reshape(-1, 1))
+        dset_M4.attrs['is_discrete'] = 1
+        dset_M4.attrs['name'] = 'Scenario'
+        dset_M4.attrs['class_name'] = np.array(names, dtype='S')
+        dset_M4.attrs['class_id'] = list(range(1, len(names) + 1))
+        dset_M4.attrs['x'] = [0]
+
+        for (start, stop), result in zip(blocks, _imap_bounded(pool, worker, tasks,
+                                                               window=2 * n_workers)):
+            bm, bn, bo, block_flag, block_features = result
+            write_prior_block(f, start, stop, bm, bn, bo, block_features, info['Classes']['names'])
+            _merge_flags(flag_vector, block_flag)
+            reporter.block_done(stop - start, block_flag)
+        reporter.finish()
+
+        f.attrs["Creation date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        f.attrs["dmax"] = dmax
+        f.attrs["dz"] = dz
+        grp = f.create_group(SCENARIOS_GROUP)
+        grp.attrs['name'] = np.array(names, dtype='S')
+        grp.attrs['file'] = np.array([os.path.abspath(p) for p in input_files], dtype='S')
+        grp.attrs['weight'] = np.asarray(weights, dtype=float)
+        grp.attrs['count'] = counts
+        for k, path in enumerate(input_files):
+            write_input_tables(grp.create_group(str(k + 1)), path)
+
+    # Final warnings if applicable
+    if flag_vector[0] == 1:
+        reporter.warning("Something went wrong. Models may not reflect your input assumptions.")
+    if flag_vector[1] == 1:
+        reporter.warning("Number of layers may not be uniformly distributed.")
+    flag_vector[2] = flag_vector[2] / Nreals if Nreals else 0
+    return name, flag_vector
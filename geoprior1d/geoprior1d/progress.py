@@ -0,0 +1,199 @@
+"""Progress and telemetry reporting for prior generation.
+
+Generation reports through a `ProgressReporter`: the sampler calls its hooks
+(`start`, `block_done`, `warning`, `message`, `finish`), the base class turns
+them into plain event dictionaries with throughput, rejection and ETA
+telemetry, and a sink decides what to do with each event in `handle()`.
+
+Event dictionaries always carry an "event" key:
+    start    - total, n_workers
+    block    - done, total, block_size, elapsed, rate (realizations/s), eta (s),
+               mean_tries, rejection_rate, max_iter_exceeded
+    warning  - message
+    message  - message
+    finish   - done, elapsed, rate, mean_tries, rejection_rate
+"""
+
+import json
+import sys
+import time
+
+from tqdm import tqdm
+
+
+class ProgressReporter:
+    """
+    Observer base class for generation progress. Silent unless handle() is overridden.
+
+    Subclass and override handle(event) to build a custom sink, or wrap a
+    plain function with CallbackProgress.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.done = 0
+        self.tries = 0
+        self.max_iter_exceeded = 0
+        self._t0 = None
+
+    def handle(self, event):
+        """Receive one event dictionary. The base implementation ignores it."""
+
+    def close(self):
+        """Release resources held by the sink (files, progress bars)."""
+
+    # ---- hooks called by the sampler ----
+
+    def start(self, total, n_workers=0):
+        self.total = total
+        self.done = 0
+        self.tries = 0
+        self.max_iter_exceeded = 0
+        self._t0 = time.time()
+        self.handle({"event": "start", "total": total, "n_workers": n_workers,
+                     "time": self._t0})
+
+    def block_done(self, n_block, block_flag):
+        """Report a finished block of n_block realizations with its raw flags."""
+        self.done += n_block
+        self.tries += block_flag[2]
+        self.max_iter_exceeded = max(self.max_iter_exceeded, block_flag[0])
+        event = {"event": "block", "done": self.done, "total": self.total,
+                 "block_size": n_block}
+        event.update(self._telemetry())
+        remaining = self.total - self.done
+        event["eta"] = remaining / event["rate"] if event["rate"] > 0 else None
+        event["max_iter_exceeded"] = int(self.max_iter_exceeded)
+        self.handle(event)
+
+    def warning(self, message):
+        self.handle({"event": "warning", "message": message})
+
+    def message(self, message):
+        self.handle({"event": "message", "message": message})
+
+    def finish(self):
+        event = {"event": "finish", "done": self.done}
+        event.update(self._telemetry())
+        self.handle(event)
+
+    def _telemetry(self):
+        elapsed = time.time() - self._t0 if self._t0 is not None else 0.0
+        mean_tries = self.tries / self.done if self.done else 0.0
+        return {
+            "elapsed": elapsed,
+            "rate": self.done / elapsed if elapsed > 0 else 0.0,
+            "mean_tries": mean_tries,
+            # Fraction of lithology proposals rejected by the constraint checks
+            "rejection_rate": 1.0 - 1.0 / mean_tries if mean_tries >= 1 else 0.0,
+        }
+
+
+class SilentProgress(ProgressReporter):
+    """Discard all events."""
+
+
+class TqdmProgress(ProgressReporter):
+    """Console sink: a tqdm progress bar plus printed messages and warnings."""
+
+    def __init__(self, desc="Generating priors"):
+        super().__init__()
+        self.desc = desc
+        self._bar = None
+
+    def handle(self, event):
+        kind = event["event"]
+        if kind == "start":
+            if event["n_workers"]:
+                print(f"Using {event['n_workers']} parallel processes...")
+            self._bar = tqdm(total=event["total"], desc=self.desc, unit="real")
+        elif kind == "block" and self._bar is not None:
+            self._bar.update(event["block_size"])
+        elif kind == "finish":
+            if self._bar is not None:
+                self._bar.close()
+                self._bar = None
+            print(f"Prior generation completed in {round(event['elapsed'])} seconds.")
+        elif kind == "warning":
+            tqdm.write(f"⚠️  Warning: {event['message']}")
+        elif kind == "message":
+            tqdm.write(event["message"])
+
+    def close(self):
+        if self._bar is not None:
+            self._bar.close()
+            self._bar = None
+
+
+class JsonLinesProgress(ProgressReporter):
+    """
+    Machine-readable sink writing one JSON object per event.
+
+    Args:
+        file (str or file-like, optional): Path of the log file (appended to),
+            or an open text stream. Defaults to stdout.
+    """
+
+    def __init__(self, file=None):
+        super().__init__()
+        if file is None:
+            self._stream, self._owned = sys.stdout, False
+        elif isinstance(file, str):
+            self._stream, self._owned = open(file, "a"), True
+        else:
+            self._stream, self._owned = file, False
+
+    def handle(self, event):
+        self._stream.write(json.dumps(event) + "\n")
+        self._stream.flush()
+
+    def close(self):
+        if self._owned and not self._stream.closed:
+            self._stream.close()
+
+
+class CallbackProgress(ProgressReporter):
+    """Forward every event dictionary to a user function."""
+
+    def __init__(self, callback):
+        super().__init__()
+        self.callback = callback
+
+    def handle(self, event):
+        self.callback(event)
+
+
+# Sinks selectable by name from the API and the CLI
+PROGRESS_SINKS = {
+    "tqdm": TqdmProgress,
+    "jsonl": JsonLinesProgress,
+    "silent": SilentProgress,
+}
+
+
+def get_progress_reporter(progress=None, log_file=None):
+    """
+    Resolve a progress specification into a ProgressReporter.
+
+    Args:
+        progress: None or "tqdm" (default console output), "jsonl", "silent",
+            a ProgressReporter instance, or a callable receiving event dicts.
+        log_file (str, optional): Log file for the "jsonl" sink (default: stdout).
+
+    Returns:
+        ProgressReporter
+    """
+    if progress is None:
+        return TqdmProgress()
+    if isinstance(progress, ProgressReporter):
+        return progress
+    if isinstance(progress, str):
+        if progress not in PROGRESS_SINKS:
+            raise ValueError(f"Unknown progress sink '{progress}'. "
+                             f"Choose from: {', '.join(PROGRESS_SINKS)}")
+        if progress == "jsonl":
+            return JsonLinesProgress(log_file)
+        return PROGRESS_SINKS[progress]()
+    if callable(progress):
+        return CallbackProgress(progress)
+    raise TypeError(f"Invalid progress specification: {progress!r}")
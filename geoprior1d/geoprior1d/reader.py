@@ -0,0 +1,385 @@
+"""Lazy reader for prior files written by geoprior1d."""
+
+from collections import OrderedDict
+
+import h5py
+import numpy as np
+
+from .io import SHEETS, table_from_strings, prior_info_from_tables
+from .configs import apply_overrides
+from .mixture import SCENARIOS_GROUP, unify_classes
+from .features import FEATURES_GROUP, read_features
+from .quantize import is_encoded, decode
+
+# Default size of the chunk cache shared by the datasets of a PriorFile
+_DEFAULT_CACHE_BYTES = 64 * 1024 ** 2
+
+# Target size of one cached chunk
+_CHUNK_BYTES = 1024 ** 2
+
+
+class _ChunkCache:
+    """LRU cache of row chunks, bounded by total bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._chunks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        return key in self._chunks
+
+    def get(self, key, load):
+        if key in self._chunks:
+            self._chunks.move_to_end(key)
+            self.hits += 1
+            return self._chunks[key]
+        self.misses += 1
+        chunk = load()
+        if chunk.nbytes <= self.max_bytes:
+            self._chunks[key] = chunk
+            self.nbytes += chunk.nbytes
+            while self.nbytes > self.max_bytes:
+                _, old = self._chunks.popitem(last=False)
+                self.nbytes -= old.nbytes
+        return chunk
+
+    def clear(self):
+        self._chunks.clear()
+        self.nbytes = 0
+
+
+class LazyDataset:
+    """
+    Array-like view of a prior dataset (M1, M2, M3, ...) read on demand.
+
+    Rows (realizations) are read in fixed-size chunks that are kept in the
+    PriorFile's LRU cache, so repeated and nearby accesses are served from
+    memory; scattered rows of a random index are read directly. Supports
+    integer, slice, index-array and boolean-mask indexing of the realization
+    axis, optionally followed by a column index. Like h5py, indexing returns
+    new arrays, which can be modified freely.
+
+    Quantized M1 datasets (see geoprior1d.quantize) are cached as their
+    integer codes and decoded to float32 resistivity on access.
+    """
+
+    def __init__(self, dset, cache, chunk_rows=None):
+        self._dset = dset
+        self._cache = cache
+        self.name = dset.name.lstrip('/')
+        self.shape = dset.shape
+        self.attrs = dict(dset.attrs)
+        self._encoded = is_encoded(dset)
+        self.dtype = np.dtype(np.float32) if self._encoded else dset.dtype
+        row_bytes = max(1, int(np.prod(self.shape[1:])) * dset.dtype.itemsize)
+        self.chunk_rows = int(chunk_rows or max(1, _CHUNK_BYTES // row_bytes))
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def _chunk(self, c):
+        def load():
+            chunk = self._dset[c * self.chunk_rows:(c + 1) * self.chunk_rows]
+            chunk.flags.writeable = False  # Shared by later reads
+            return chunk
+        return self._cache.get((self.name, c), load)
+
+    def _rows(self, start, stop):
+        """Contiguous rows start..stop-1 assembled from cached chunks (a new array)."""
+        if stop <= start:
+            return np.zeros((0,) + self.shape[1:], dtype=self.dtype)
+        first, last = start // self.chunk_rows, (stop - 1) // self.chunk_rows
+        parts = []
+        for c in range(first, last + 1):
+            base = c * self.chunk_rows
+            parts.append(self._chunk(c)[max(start - base, 0):stop - base])
+        if self._encoded:
+            return decode(parts[0] if len(parts) == 1 else np.concatenate(parts), self.attrs)
+        return parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+
+    def take(self, indices):
+        """
+        Rows at arbitrary indices.
+
+        Chunks that hold several of the requested rows, or are cached already,
+        are read once through the cache. The remaining scattered rows are read
+        directly with one sorted fancy-index read and not cached, so random
+        sampling does not load (and evict) a whole chunk per row.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        indices = np.where(indices < 0, indices + len(self), indices)
+        if np.any((indices < 0) | (indices >= len(self))):
+            raise IndexError(f"index out of range for {self.name} with {len(self)} rows")
+        out = np.empty((len(indices),) + self.shape[1:], dtype=self._dset.dtype)
+        chunk_ids = indices // self.chunk_rows
+        order = np.argsort(chunk_ids, kind='stable')
+        bounds = np.flatnonzero(np.diff(chunk_ids[order])) + 1
+        scattered = []
+        for group in np.split(order, bounds):
+            if group.size == 0:
+                continue
+            c = chunk_ids[group[0]]
+            rows = indices[group]
+            if (self.name, c) in self._cache or rows.min() != rows.max():
+                out[group] = self._chunk(c)[rows - c * self.chunk_rows]
+            else:
+                scattered.append(group)
+        if scattered:
+            group = np.concatenate(scattered)
+            # h5py needs increasing indices
+            rows, inverse = np.unique(indices[group], return_inverse=True)
+            out[group] = self._dset[rows][inverse.reshape(-1)]
+        return decode(out, self.attrs) if self._encoded else out
+
+    def __getitem__(self, key):
+        rest = ()
+        if isinstance(key, tuple):
+            key, rest = key[0], key[1:]
+        if isinstance(key, (int, np.integer)):
+            i = int(key) + len(self) if key < 0 else int(key)
+            if not 0 <= i < len(self):
+                raise IndexError(f"index {key} out of range for {self.name} with {len(self)} rows")
+            rows = self._rows(i, i + 1)[0]
+        elif isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                rows = self._rows(start, stop)
+            else:
+                rows = self.take(np.arange(start, stop, step))
+        else:
+            key = np.asarray(key)
+            if key.dtype == bool:
+                key = np.flatnonzero(key)
+            rows = self.take(key)
+        if rest:
+            rows = rows[(slice(None),) + rest] if not isinstance(key, (int, np.integer)) else rows[rest]
+        return rows
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:]
+        return data.astype(dtype) if dtype is not None else data
+
+    def __repr__(self):
+        return f"<LazyDataset {self.name} shape={self.shape} dtype={self.dtype}>"
+
+
+class PriorFile:
+    """
+    Read a prior file written by geoprior1d lazily.
+
+    M1 (resistivity), M2 (lithology) and M3 (water level) are exposed as
+    LazyDataset objects sharing one LRU chunk cache. The prior information
+    and colormaps are rebuilt from the input tables stored in the file, so
+    plotting and summary functions can be used directly:
+
+        with PriorFile("prior.h5") as pf:
+            M1 = pf.M1[1000:2000]
+            batch = pf.read(np.random.choice(len(pf), 500))
+            plot_resistivity_distributions(pf.info)
+
+    Args:
+        filename (str): HDF5 file written by geoprior1d.
+        cache_bytes (int): Maximum size of the chunk cache (default: 64 MB).
+        chunk_rows (int, optional): Rows per cached chunk (default: ~1 MB chunks).
+    """
+
+    def __init__(self, filename, cache_bytes=_DEFAULT_CACHE_BYTES, chunk_rows=None):
+        self.filename = filename
+        self._f = h5py.File(filename, 'r')
+        self.cache = _ChunkCache(cache_bytes)
+        self._chunk_rows = chunk_rows
+        self._datasets = {}
+        self._info = None
+        self._cmaps = None
+
+    # ---- datasets ----
+
+    @property
+    def dataset_names(self):
+        """Names of the model datasets in the file (M1, M2, ...)."""
+        return sorted((k for k in self._f.keys()
+                       if k.startswith('M') and isinstance(self._f[k], h5py.Dataset)),
+                      key=lambda k: int(k[1:]) if k[1:].isdigit() else k)
+
+    def dataset(self, name):
+        """LazyDataset for a dataset of the file."""
+        if name not in self._datasets:
+            self._datasets[name] = LazyDataset(self._f[name], self.cache, self._chunk_rows)
+        return self._datasets[name]
+
+    @property
+    def M1(self):
+        return self.dataset('M1')
+
+    @property
+    def M2(self):
+        return self.dataset('M2')
+
+    @property
+    def M3(self):
+        return self.dataset('M3') if 'M3' in self._f else None
+
+    @property
+    def layer_index(self):
+        """Layer index of every cell, if stored (store_layers=True), else None."""
+        if FEATURES_GROUP in self._f and 'layer_index' in self._f[FEATURES_GROUP]:
+            return self.dataset(f'{FEATURES_GROUP}/layer_index')
+        return None
+
+    def __len__(self):
+        return self._f['M1'].shape[0]
+
+    @property
+    def attrs(self):
+        return dict(self._f.attrs)
+
+    def read(self, indices, names=None):
+        """
+        Read the realizations at indices from several datasets.
+
+        Args:
+            indices (array-like): Realization indices, in any order.
+            names (list, optional): Datasets to read (default: all M datasets).
+
+        Returns:
+            dict: Arrays keyed by dataset name, rows in the order of indices.
+        """
+        names = names or self.dataset_names
+        return {name: self.dataset(name).take(indices) for name in names}
+
+    def iter_batches(self, batch_size=1000, indices=None, names=None, shuffle=False, seed=None):
+        """
+        Iterate over realizations in batches.
+
+        Args:
+            batch_size (int): Realizations per batch.
+            indices (array-like, optional): Subset of realizations (default: all).
+            names (list, optional): Datasets to read (default: all M datasets).
+            shuffle (bool): Visit the realizations in random order.
+            seed (int, optional): Seed for shuffle.
+
+        Yields:
+            (indices, arrays): Realization indices of the batch and a dict of
+                arrays keyed by dataset name.
+        """
+        if indices is None:
+            indices = np.arange(len(self))
+        indices = np.asarray(indices)
+        if shuffle:
+            indices = np.random.default_rng(seed).permutation(indices)
+        for b in range(0, len(indices), batch_size):
+            idx = indices[b:b + batch_size]
+            if not shuffle and len(idx) and np.all(np.diff(idx) == 1):
+                sl = slice(int(idx[0]), int(idx[-1]) + 1)
+                yield idx, {name: self.dataset(name)[sl] for name in (names or self.dataset_names)}
+            else:
+                yield idx, self.read(idx, names)
+
+    # ---- provenance ----
+
+    @property
+    def scenarios(self):
+        """Scenario names of a mixture prior (see geoprior1d.mixture), else None."""
+        if SCENARIOS_GROUP not in self._f:
+            return None
+        return [n.decode() for n in self._f[SCENARIOS_GROUP].attrs['name']]
+
+    def tables(self, scenario=None):
+        """Input tables stored in the file, keyed like geoprior1d.io.SHEETS.
+        For mixture priors, those of scenario number `scenario` (1-based)."""
+        attrs = self._f.attrs if scenario is None else self._f[SCENARIOS_GROUP][str(scenario)].attrs
+        tables = {}
+        for key in SHEETS:
+            if f"{key} headers" in attrs:
+                tables[key] = table_from_strings(attrs[f"{key} headers"],
+                                                 attrs[f"{key} table"])
+        return tables
+
+    def scenario_info(self, scenario):
+        """(info, cmaps) of scenario number `scenario` (1-based) of a mixture prior."""
+        return prior_info_from_tables(self.tables(scenario))
+
+    def _rebuild_info(self):
+        if self.scenarios is not None:
+            # Mixture: unified class table of the scenarios
+            parsed = [self.scenario_info(k + 1) for k in range(len(self.scenarios))]
+            self._info, self._cmaps, _ = unify_classes([p[0] for p in parsed],
+                                                       [p[1] for p in parsed])
+            return
+        info, cmaps = prior_info_from_tables(self.tables())
+        if self._f.attrs.get('Overrides'):
+            # Batch jobs store the parameter overrides applied to the input tables
+            info = apply_overrides(info, self._f.attrs['Overrides'])
+        if 'Water Level' not in info and 'M3' in self._f:
+            # Older files do not store the water table sheet; use the sampled range
+            M3 = self._f['M3'][:]
+            info['Water Level'] = {'min': np.array([float(M3.min())]),
+                                   'max': np.array([float(M3.max())])}
+        self._info, self._cmaps = info, cmaps
+
+    @property
+    def info(self):
+        """Prior information dict, as returned by extract_prior_info(). For
+        mixture priors only the unified 'Classes' (and 'Water Level') entries;
+        see scenario_info() for the full information of each scenario."""
+        if self._info is None:
+            self._rebuild_info()
+        return self._info
+
+    @property
+    def cmaps(self):
+        """Colormaps, as returned by extract_prior_info()."""
+        if self._cmaps is None:
+            self._rebuild_info()
+        return self._cmaps
+
+    @property
+    def dz(self):
+        if 'dz' in self._f.attrs:
+            return float(self._f.attrs['dz'])
+        x = np.asarray(self._f['M1'].attrs['x'], dtype=float)
+        return float(x[1] - x[0]) if len(x) > 1 else 1.0
+
+    @property
+    def z_vec(self):
+        """Depths to cell bottoms, as used during generation."""
+        x = np.asarray(self._f['M1'].attrs['x'], dtype=float)
+        return x + self.dz
+
+    @property
+    def features(self):
+        """Feature tables as a DataFrame (see geoprior1d.features.read_features)."""
+        if FEATURES_GROUP not in self._f:
+            return None
+        return read_features(self.filename)
+
+    # ---- convenience ----
+
+    def plot(self, nshow=100):
+        """Plot resistivity distributions and the first nshow realizations."""
+        from .visualization import plot_resistivity_distributions, plot_realizations
+        n = min(nshow, len(self))
+        ws = self.M3[:n, 0] if self.M3 is not None else np.zeros(n)
+        if 'Resistivity' in self.info:
+            plot_resistivity_distributions(self.info)
+        plot_realizations(self.z_vec, self.M2[:n], self.M1[:n], ws, self.info, self.cmaps, n)
+
+    def close(self):
+        self.cache.clear()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"<PriorFile {self.filename!r} Nreals={len(self)} datasets={self.dataset_names}>"
@@ -0,0 +1,159 @@
+"""Resistivity-only regeneration for a stored lithology ensemble.
+
+Most prior changes touch only the Resistivity sheet, yet a full run repeats
+the expensive lithology rejection sampling. Files generated with
+store_layers=True keep the layer index of every cell (features/layer_index)
+next to the lithology (M2) and water level (M3), which is all
+prior_res_reals needs. `resample_resistivity` streams these in chunks,
+draws new resistivities for every layer under a new configuration and
+writes a copy of the file with a new M1, giving paired ensembles that share
+their lithology for sensitivity studies.
+
+Realization i draws from a source seeded with seed + i, as in generation,
+and texture (depth trends, within-layer fluctuations) is applied per chunk.
+The new resistivities are fresh draws: resampling with an unchanged
+configuration gives a new M1 with the same distribution, not the original
+one. The Resistivity table stored in the output is that of the new
+configuration, and M1 keeps the storage layout of the source file.
+"""
+
+import os
+import shutil
+from datetime import datetime
+from functools import partial
+from multiprocessing import cpu_count
+
+import h5py
+import numpy as np
+
+from .executors import open_executor, executor_workers
+from .features import FEATURES_GROUP
+from .io import extract_prior_info, read_prior_tables, table_to_strings
+from .progress import get_progress_reporter
+from .quantize import is_encoded, write_m1
+from .resistivity import prior_res_reals, has_texture, resistivity_texture
+from .rng import RealizationRNG
+from .sampling import _imap_bounded
+
+# Realizations per work unit
+_RESAMPLE_CHUNK = 10_000
+
+
+def resample_block(ms, layer_index, ws, info, z_vec, seeds):
+    """
+    Resistivity for a block of stored realizations.
+
+    Args:
+        ms (ndarray): Lithology (n x Nz).
+        layer_index (ndarray): Layer indices (n x Nz).
+        ws (ndarray): Water levels (n,); zeros without a water table.
+        info (dict): Prior information with the (new) Resistivity entries.
+        z_vec (ndarray): Depths to cell bottoms.
+        seeds (array-like): Seed of every realization (n,).
+
+    Returns:
+        ndarray: Resistivity (n x Nz), float32.
+    """
+    ns = np.empty(ms.shape, dtype=np.float32)
+    for k in range(len(ms)):
+        ns[k] = prior_res_reals(info, ms[k], float(ws[k]), layer_index[k], z_vec,
+                                rng=RealizationRNG(int(seeds[k])))
+    if has_texture(info):
+        ns[:] = ns * 10 ** resistivity_texture(info, ms, layer_index, z_vec, seeds)
+    return ns
+
+
+def _resample_task(task, info, z_vec):
+    """Pool worker: resistivity of one chunk."""
+    ms, layer_index, ws, seeds = task
+    return resample_block(ms, layer_index, ws, info, z_vec, seeds)
+
+
+def _class_names(values):
+    return [v.decode() if isinstance(v, bytes) else str(v) for v in values]
+
+
+def resample_resistivity(prior_file, new_config, output_file=None, seed=None,
+                         chunk_size=_RESAMPLE_CHUNK, n_processes=-1, executor=None,
+                         progress=None):
+    """
+    Write a copy of a prior file with resistivity redrawn under a new configuration.
+
+    Args:
+        prior_file (str): HDF5 file generated with store_layers=True.
+        new_config (str): Excel input file whose Resistivity sheet is used;
+            its classes must match those of the prior file.
+        output_file (str, optional): Output filename (default:
+            {prior_base}_resampled.h5).
+        seed (int, optional): Base seed; realization i uses seed + i.
+        chunk_size (int): Realizations per work unit.
+        n_processes (int): Number of workers (-1 = all cores, 0 = sequential).
+        executor (str or Executor, optional): Execution backend.
+        progress (optional): Progress sink, see get_prior_sample.
+
+    Returns:
+        name (str): Output HDF5 filename.
+    """
+    reporter = get_progress_reporter(progress)
+    if output_file is None:
+        output_file = f"{os.path.splitext(prior_file)[0]}_resampled.h5"
+    elif not output_file.endswith('.h5'):
+        output_file += '.h5'
+    if os.path.abspath(output_file) == os.path.abspath(prior_file):
+        raise ValueError("The output file must differ from the prior file")
+
+    info, _ = extract_prior_info(new_config)
+    with h5py.File(prior_file, 'r') as f:
+        if FEATURES_GROUP not in f or 'layer_index' not in f[FEATURES_GROUP]:
+            raise ValueError(f"{prior_file} has no stored layer indices; generate it "
+                             "with store_layers=True (--store-layers)")
+        names = _class_names(f['M2'].attrs['class_name'])
+        dz = float(f.attrs['dz'])
+        z_vec = np.asarray(f['M1'].attrs['x'], dtype=float) + dz
+    if names != list(info['Classes']['names']):
+        raise ValueError(f"Classes of {new_config} ({', '.join(map(str, info['Classes']['names']))}) "
+                         f"differ from those of {prior_file} ({', '.join(names)})")
+    if seed is None:
+        seed = np.random.randint(0, 1e9)  # For reproducibility across runs
+    seed = int(seed)
+
+    if n_processes is not None and n_processes != 0:
+        n_workers = cpu_count() if n_processes == -1 else min(n_processes, cpu_count())
+    else:
+        n_workers = 0
+    if executor is None:
+        executor = "process" if n_workers > 0 else "sequential"
+    n_workers = executor_workers(executor, n_workers)
+
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    shutil.copyfile(prior_file, output_file)
+
+    with h5py.File(prior_file, 'r') as f, h5py.File(output_file, 'r+') as g:
+        Nreals = f['M1'].shape[0]
+        blocks = [(b, min(b + chunk_size, Nreals)) for b in range(0, Nreals, chunk_size)]
+
+        def tasks():
+            for start, stop in blocks:
+                ws = f['M3'][start:stop, 0] if 'M3' in f else np.zeros(stop - start)
+                yield (f['M2'][start:stop], f[FEATURES_GROUP]['layer_index'][start:stop],
+                       ws, seed + np.arange(start, stop))
+
+        if is_encoded(g['M1']):
+            g['M1'].attrs['n_clipped'] = 0
+        reporter.start(Nreals, n_workers)
+        with open_executor(executor, n_workers) as pool:
+            worker = partial(_resample_task, info=info, z_vec=z_vec)
+            for (start, stop), ns in zip(blocks, _imap_bounded(pool, worker, tasks(),
+                                                               window=2 * max(n_workers, 1))):
+                write_m1(g['M1'], slice(start, stop), ns)
+                reporter.block_done(stop - start, [0, 0, 0])
+        reporter.finish()
+
+        headers, contents = table_to_strings(read_prior_tables(new_config)['Resistivity'])
+        g.attrs["Resistivity headers"] = headers
+        g.attrs["Resistivity table"] = contents
+        g.attrs["Creation date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        g.attrs["Resampled from"] = os.path.abspath(prior_file)
+        g.attrs["Resample seed"] = seed
+    return output_file
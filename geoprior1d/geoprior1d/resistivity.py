@@ -1,11 +1,12 @@
 import numpy as np
+from .rng import GLOBAL_RNG
 
-def prior_res_reals(info, m, o, layer_index, z_vec):
+def prior_res_reals(info, m, o, layer_index, z_vec, rng=GLOBAL_RNG):
 
-    # Initialize n vector
-    n = m.copy()
+    # Initialize n vector (every cell belongs to a layer and is overwritten below)
+    n = np.empty(m.shape, dtype=float)
     if o != z_vec[0]:
-        n_unsat = n.copy()
+        n_unsat = np.empty(m.shape, dtype=float)
     else:
         n_unsat = None
 
@@ -13,7 +14,7 @@ def prior_res_reals(info, m, o, layer_index, z_vec):
     # Get unique layer indices that actually exist in the model
     unique_layers = np.unique(layer_index)
 
-    for layer_id in unique_layers:
+    for k, layer_id in enumerate(unique_layers):
         # Get the lithology class for this layer (constant within each layer)
         layer_mask = layer_index == layer_id
         lithology_class = int(m[layer_mask][0])  # All cells in a layer have same class
@@ -21,14 +22,14 @@ def prior_res_reals(info, m, o, layer_index, z_vec):
         # Sample resistivity once for entire layer (creates spatial correlation)
         res_value = 10 ** (np.log10(info['Resistivity']['res'][lithology_class-1])
                           + info['Resistivity']['res_unc'][lithology_class-1]
-                          * np.random.randn())
+                          * rng.randn(rng.slot('res', k)))
         n[layer_mask] = res_value
 
         # Unsaturated resistivity above water table
         if o != z_vec[0]:
             unsat_value = 10 ** (np.log10(info['Resistivity']['unsat_res'][lithology_class-1])
                                 + info['Resistivity']['unsat_res_unc'][lithology_class-1]
-                                * np.random.randn())
+                                * rng.randn(rng.slot('unsat', k)))
             n_unsat[layer_mask] = unsat_value
 
     # Apply unsaturated values above water table
@@ -46,3 +47,96 @@ def prior_res_reals(info, m, o, layer_index, z_vec):
             ) / (abs(diffs[i]) + diffs[i+1])
 
     return n
+
+
+# Stream key separating the texture noise from the realization's other draws
+_TEXTURE_STREAM = 37
+
+
+def has_texture(info):
+    """True if the prior defines depth trends or within-layer fluctuations."""
+    res = info['Resistivity']
+    return (np.any(res.get('trend', 0) != 0)
+            or np.any(res.get('fluct_unc', 0) > 0))
+
+
+def gaussian_fields(seeds, Nz, dz, corr_length, n_fields=1):
+    """
+    Standard Gaussian random fields on a regular depth grid, by FFT.
+
+    Uses circulant embedding of the exponential covariance exp(-h / corr_length),
+    which is exact for this covariance. The white noise of field row r comes
+    from its own generator seeded with (seeds[r], stream), so a row does not
+    depend on which other rows are generated with it.
+
+    Args:
+        seeds (array-like): One seed per row (realization).
+        Nz (int): Number of depth cells.
+        dz (float): Cell size in meters.
+        corr_length (array-like): Correlation length in meters of each field.
+        n_fields (int): Number of fields per row (one per correlation length).
+
+    Returns:
+        ndarray: (n_fields, len(seeds), Nz) fields with unit variance.
+    """
+    corr_length = np.broadcast_to(np.asarray(corr_length, dtype=float), (n_fields,))
+    M = 1 << int(np.ceil(np.log2(max(2 * Nz, 2))))
+    lags = np.minimum(np.arange(M), M - np.arange(M)) * dz
+    noise = np.empty((n_fields, len(seeds), 2, M))
+    for r, seed in enumerate(seeds):
+        noise[:, r] = np.random.default_rng([int(seed), _TEXTURE_STREAM]).standard_normal((n_fields, 2, M))
+    fields = np.empty((n_fields, len(seeds), Nz))
+    for g in range(n_fields):
+        L = max(corr_length[g], 1e-9)
+        eig = np.maximum(np.fft.fft(np.exp(-lags / L)).real, 0)
+        w = np.sqrt(eig / M) * (noise[g, :, 0] + 1j * noise[g, :, 1])
+        fields[g] = np.fft.fft(w, axis=1).real[:, :Nz]
+    return fields
+
+
+def resistivity_texture(info, ms, layer_index, z_vec, seeds):
+    """
+    Log10-resistivity offsets from per-class depth trends and within-layer
+    fluctuations, for a batch of realizations.
+
+    The offset of a cell is trend * (depth below the top of its layer) plus
+    the class's fluctuation level times a Gaussian field with the class's
+    correlation length. Classes sharing a correlation length share a field.
+
+    Args:
+        info (dict): Prior information with optional 'trend', 'fluct_unc' and
+            'corr_length' entries in info['Resistivity'].
+        ms (ndarray): Lithology (n x Nz).
+        layer_index (ndarray): Layer indices (n x Nz).
+        z_vec (ndarray): Depths to cell bottoms.
+        seeds (array-like): Realization seeds (n,).
+
+    Returns:
+        ndarray: (n x Nz) offsets to add to log10 resistivity.
+    """
+    res = info['Resistivity']
+    n_classes = len(info['Classes']['codes'])
+    trend = np.broadcast_to(np.asarray(res.get('trend', 0.0), dtype=float), (n_classes,))
+    sigma = np.broadcast_to(np.asarray(res.get('fluct_unc', 0.0), dtype=float), (n_classes,))
+    corr = np.broadcast_to(np.asarray(res.get('corr_length', 1.0), dtype=float), (n_classes,))
+    z_vec = np.asarray(z_vec, dtype=float)
+    Nz = len(z_vec)
+    dz = z_vec[1] - z_vec[0] if Nz > 1 else z_vec[0]
+    idx = ms.astype(np.intp) - 1
+
+    # Depth of each cell centre below the top of its layer
+    cols = np.arange(Nz)
+    starts = np.ones(ms.shape, dtype=bool)
+    starts[:, 1:] = layer_index[:, 1:] != layer_index[:, :-1]
+    top = np.maximum.accumulate(np.where(starts, cols, 0), axis=1)
+    texture = trend[idx] * ((cols - top) + 0.5) * dz
+
+    active = sigma > 0
+    if np.any(active):
+        lengths = np.unique(corr[active])
+        fields = gaussian_fields(seeds, Nz, dz, lengths, n_fields=len(lengths))
+        group = np.searchsorted(lengths, corr)
+        for g in range(len(lengths)):
+            in_group = active & (group == g)
+            texture += np.where(in_group[idx], sigma[idx] * fields[g], 0.0)
+    return texture
@@ -0,0 +1,156 @@
+"""Random number sources for realization sampling.
+
+Every realization draws its random numbers through a `RealizationRNG`. In the
+default "random" mode it is a thin wrapper around a per-realization
+`np.random.RandomState` and `random.Random` seeded with seed + i, which gives
+exactly the same streams as seeding the global generators.
+
+In the quasi-Monte Carlo modes ("sobol", "lhs") realization i is additionally
+given row i of a scrambled Sobol or Latin hypercube point set. The continuous
+draws of the first proposal (water level, section thicknesses, layer
+thicknesses and resistivity perturbations) each read a fixed coordinate
+("slot") of that row, so they are spread evenly over the ensemble. Discrete
+choices and redraws after a rejected proposal stay pseudo-random.
+"""
+
+import random
+import warnings
+from functools import lru_cache
+
+import numpy as np
+from scipy.special import ndtri
+
+# Available sampling modes
+SAMPLERS = ("random", "sobol", "lhs")
+
+# Keep inverse-normal transforms finite
+_U_EPS = 1e-12
+
+
+class QMCLayout:
+    """
+    Assignment of QMC coordinates to the continuous draws of a prior.
+
+    Slots: water level, one thickness per section, one thickness per possible
+    layer of each section, and a saturated and an unsaturated resistivity
+    perturbation per possible layer.
+    """
+
+    def __init__(self, info):
+        N = info['Sections']['N_sections']
+        max_layers = np.asarray(info['Sections']['max_layers'][:N-1], dtype=int)
+        self.water = 0
+        self._section0 = 1
+        self._layer0 = self._section0 + (N - 1) + np.concatenate(([0], np.cumsum(max_layers)))[:-1]
+        self._max_layers = max_layers
+        self._res0 = self._section0 + (N - 1) + int(max_layers.sum())
+        self.n_layers_max = 1 + int(max_layers.sum())
+        self.dim = self._res0 + 2 * self.n_layers_max
+
+    def section(self, i):
+        return self._section0 + i
+
+    def layer(self, i, j):
+        return int(self._layer0[i] + j) if j < self._max_layers[i] else None
+
+    def resistivity(self, k, unsaturated=False):
+        return self._res0 + 2 * k + int(unsaturated) if k < self.n_layers_max else None
+
+
+class RealizationRNG:
+    """
+    Random source for one realization.
+
+    Args:
+        seed (int, optional): Seed for this realization. If None, the global
+            np.random and random module states are used.
+        qmc_row (array, optional): QMC point (uniforms in [0, 1)) for this realization.
+        layout (QMCLayout, optional): Slot layout matching qmc_row.
+    """
+
+    def __init__(self, seed=None, qmc_row=None, layout=None):
+        if seed is None:
+            self._np, self._py = np.random, random
+        else:
+            self._np, self._py = np.random.RandomState(seed), random.Random(seed)
+        self._row = qmc_row
+        self.layout = layout
+
+    def slot(self, kind, *index):
+        """QMC coordinate for a draw ('water', 'section', 'layer', 'res', 'unsat'),
+        or None when not sampling with QMC."""
+        if self._row is None:
+            return None
+        if kind == 'water':
+            return self.layout.water
+        if kind == 'section':
+            return self.layout.section(*index)
+        if kind == 'layer':
+            return self.layout.layer(*index)
+        return self.layout.resistivity(*index, unsaturated=(kind == 'unsat'))
+
+    def rand(self, slot=None):
+        """Uniform draw on [0, 1), from the QMC row if a slot is given."""
+        if slot is not None and self._row is not None:
+            return float(self._row[slot])
+        return self._np.rand()
+
+    def randn(self, slot=None):
+        """Standard normal draw, from the QMC row if a slot is given."""
+        if slot is not None and self._row is not None:
+            return float(ndtri(np.clip(self._row[slot], _U_EPS, 1 - _U_EPS)))
+        return self._np.randn()
+
+    def rand_vector(self, n):
+        return self._np.rand(n)
+
+    def randint(self, low, high):
+        return self._np.randint(low, high)
+
+    def choices(self, population, weights=None, cum_weights=None, k=1):
+        return self._py.choices(population, weights=weights, cum_weights=cum_weights, k=k)
+
+    def choice_uniforms(self, k):
+        """The k uniforms that choices(..., k=k) would consume."""
+        return [self._py.random() for _ in range(k)]
+
+
+# Global-state source used when functions are called without an explicit rng
+GLOBAL_RNG = RealizationRNG()
+
+
+@lru_cache(maxsize=2)
+def _lhs_design(dim, Nreals, seed):
+    from scipy.stats import qmc
+    return qmc.LatinHypercube(d=dim, seed=seed).random(Nreals)
+
+
+def qmc_points(sampler, dim, start, stop, Nreals, seed):
+    """
+    Rows start..stop-1 of the QMC point set of a run.
+
+    Args:
+        sampler (str): "sobol" (scrambled Sobol, fast-forwarded to start) or
+            "lhs" (Latin hypercube over all Nreals realizations; the design is
+            built once per process and needs Nreals x dim doubles).
+        dim (int): Number of coordinates (QMCLayout.dim).
+        start, stop (int): Realization range.
+        Nreals (int): Total number of realizations of the run.
+        seed (int): Base seed of the run (scrambling seed).
+
+    Returns:
+        ndarray: (stop - start) x dim array of uniforms.
+    """
+    from scipy.stats import qmc
+
+    if sampler == "sobol":
+        engine = qmc.Sobol(d=dim, scramble=True, seed=seed)
+        if start:
+            engine.fast_forward(start)
+        with warnings.catch_warnings():
+            # Blocks are generally not powers of two; the full run can be
+            warnings.simplefilter("ignore", UserWarning)
+            return engine.random(stop - start)
+    if sampler == "lhs":
+        return _lhs_design(dim, Nreals, seed)[start:stop]
+    raise ValueError(f"Unknown sampler '{sampler}'. Choose from: {', '.join(SAMPLERS)}")
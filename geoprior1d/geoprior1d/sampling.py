@@ -1,15 +1,22 @@
 import numpy as np
-import random
-import time
-from tqdm import tqdm
-from multiprocessing import Pool, cpu_count
+from collections import deque
+from multiprocessing import cpu_count
+from contextlib import ExitStack
 from functools import partial
-from .lithology import prior_lith_reals
+from .lithology import (prior_lith_reals, lithology_dtype, layer_index_dtype, section_chains,
+                        chain_pools, smallest_int_dtype)
 from .water import prior_water_reals
-from .resistivity import prior_res_reals
+from .resistivity import prior_res_reals, has_texture, resistivity_texture
+from .progress import get_progress_reporter
+from .memory import _block_size_for_budget
+from .features import compute_features, concatenate_features
+from .rng import RealizationRNG, QMCLayout, qmc_points, SAMPLERS
+from .executors import open_executor, executor_workers
+from .engines import resolve_engine
 
 
-def _generate_single_realization(i, info, z_vec, seed_offset=0):
+def _generate_single_realization(i, info, z_vec, seed_offset=0, qmc_row=None, layout=None,
+                                 chains=None, rng=None, chain_pool=None):
     """
     Generate a single realization (worker function for multiprocessing).
 
@@ -18,33 +25,456 @@ def _generate_single_realization(i, info, z_vec, seed_offset=0):
         info (dict): Prior information dictionary
         z_vec (array): Depth vector
         seed_offset (int): Random seed offset for reproducibility
+        qmc_row (array, optional): QMC point driving the continuous draws
+        layout (QMCLayout, optional): Slot layout of qmc_row
+        chains (list, optional): Precomputed section_chains(info)
+        rng (RealizationRNG, optional): The realization's random source, if
+            already created (with its chain_pool, see lithology.chain_pools)
+        chain_pool (ChainPool, optional): Pre-drawn layer-type chains
 
     Returns:
-        tuple: (m, n, o, local_flag_vector)
+        tuple: (m, n, o, local_flag_vector, layer_index)
     """
-    # Set unique random seed for this worker
-    np.random.seed(seed_offset + i)
-    random.seed(seed_offset + i)  # For Python's random module used in lithology.py
+    # Unique random source for this realization
+    if rng is None:
+        rng = RealizationRNG(seed_offset + i, qmc_row, layout)
 
     # Initialize flag vector for this realization
     local_flag = [0, 0, 0]
 
     # Generate lithology
-    m, layer_index, local_flag = prior_lith_reals(info, z_vec, local_flag)
+    m, layer_index, local_flag = prior_lith_reals(info, z_vec, local_flag, rng=rng, chains=chains,
+                                                  chain_pool=chain_pool)
 
     # Generate water level
     if 'Water Level' in info:
-        o = prior_water_reals(info)
+        o = prior_water_reals(info, rng=rng)
     else:
         o = 0
 
     # Generate resistivity
-    n = prior_res_reals(info, m, o, layer_index, z_vec)
+    n = prior_res_reals(info, m, o, layer_index, z_vec, rng=rng)
 
-    return m, n, o, local_flag
+    return m, n, o, local_flag, layer_index
 
 
-def get_prior_sample(info, z_vec, Nreals, n_processes=-1):
+def _merge_flags(flag_vector, local_flag):
+    """Aggregate realization (or block) flags into a running flag vector."""
+    flag_vector[0] = max(flag_vector[0], local_flag[0])
+    flag_vector[1] = max(flag_vector[1], local_flag[1])
+    flag_vector[2] += local_flag[2]
+    return flag_vector
+
+
+def _generate_block(start, stop, info, z_vec, seed_offset=0, features=False,
+                    sampler="random", n_total=None, indices=None, code_map=None, store_layers=False,
+                    engine="numpy", n_threads=None, n_classes=None):
+    """
+    Generate the contiguous block of realizations start..stop-1.
+
+    Realization i is always seeded with seed_offset + i, so a block is
+    identical to the corresponding rows of a full run with the same seed,
+    independent of how the work is split.
+
+    Args:
+        start (int): Index of the first realization in the block.
+        stop (int): Index one past the last realization in the block.
+        info (dict): Prior information dictionary
+        z_vec (array): Depth vector
+        seed_offset (int): Random seed offset for reproducibility
+        features (bool): Also compute the per-realization feature tables.
+        sampler (str): "random", or "sobol"/"lhs" for quasi-Monte Carlo draws.
+        n_total (int, optional): Realizations in the whole run (needed for "lhs").
+        indices (array-like, optional): Generate only these realizations of
+            start..stop-1, in this order (default: all of them).
+        code_map (ndarray, optional): Lookup table applied to the lithology
+            codes before features are computed, e.g. into the class space of
+            a scenario mixture (see geoprior1d.mixture).
+        store_layers (bool): With features=True, add the layer index of every cell
+            to the feature dict as 'layer_index'.
+        engine (str): "numpy", or "numba" for the compiled kernels of
+            geoprior1d.jit (random sampler only).
+        n_threads (int, optional): Threads of the numba kernels.
+        n_classes (int, optional): Number of classes of the feature tables and
+            the lithology dtype (default: the classes of info, or the largest
+            code of code_map). Mixtures pass the unified class count so all
+            scenarios give tables of the same width.
+
+    Returns:
+        tuple: (ms, ns, os, block_flag) for the block, where block_flag holds
+            the aggregated (not yet averaged) flags. With features=True a
+            fifth element holds the feature dict (see geoprior1d.features).
+    """
+    indices = np.arange(start, stop) if indices is None else np.asarray(indices, dtype=np.int64)
+    n_block = len(indices)
+    Nz = len(z_vec)
+    ms = np.zeros((n_block, Nz), dtype=lithology_dtype(info))
+    ns = np.zeros((n_block, Nz), dtype=np.float32)
+    os = np.zeros(n_block, dtype=np.float32)
+    block_flag = [0, 0, 0]
+    tries = np.zeros(n_block, dtype=np.int16)  # Proposals of every realization
+    texture = has_texture(info)
+    if features or texture:
+        layer_index = np.zeros((n_block, Nz), dtype=layer_index_dtype(info))
+
+    if engine == "numba":
+        # Whole block in compiled kernels, in parallel over realizations
+        from .jit import sample_block
+        bm, bn, bo, layers, block_flag, block_tries = sample_block(
+            info, z_vec, indices + int(seed_offset), n_threads)
+        ms[:], ns[:], os[:], tries[:] = bm, bn, bo, block_tries
+        if features or texture:
+            layer_index[:] = layers
+    else:
+        layout, points = None, None
+        if sampler != "random":
+            layout = QMCLayout(info)
+            points = qmc_points(sampler, layout.dim, start, stop, n_total or stop, seed_offset)
+        chains = section_chains(info)
+        rngs = [RealizationRNG(int(seed_offset) + int(i),
+                               points[i - start] if points is not None else None, layout)
+                for i in indices]
+        # Layer-type chains of Transitions sections, drawn for the whole block at once
+        pools = chain_pools(info, rngs, chains)
+
+        for k, i in enumerate(indices):
+            m, n, o, local_flag, layers = _generate_single_realization(
+                int(i), info, z_vec, seed_offset, chains=chains, rng=rngs[k],
+                chain_pool=pools[k])
+            ms[k, :] = m
+            ns[k, :] = n
+            os[k] = o
+            tries[k] = local_flag[2]
+            _merge_flags(block_flag, local_flag)
+            if features or texture:
+                layer_index[k, :] = layers
+
+    if texture:
+        # Depth trends and correlated within-layer fluctuations for the whole block
+        offsets = resistivity_texture(info, ms, layer_index, z_vec,
+                                      indices + seed_offset)
+        ns[:] = ns * 10 ** offsets
+
+    if n_classes is None:
+        n_classes = len(info['Classes']['codes']) if code_map is None else int(np.max(code_map))
+    if code_map is not None:
+        ms = np.asarray(code_map)[ms].astype(smallest_int_dtype(n_classes))
+
+    if features:
+        block_features = compute_features(ms, layer_index, os, z_vec, n_classes)
+        block_features['tries'] = tries
+        if store_layers:
+            block_features['layer_index'] = layer_index
+        return ms, ns, os, block_flag, block_features
+    return ms, ns, os, block_flag
+
+
+def _lithology_block(start, stop, info, z_vec, seed_offset=0):
+    """
+    Lithology only of realizations start..stop-1 (pseudo-random sampler).
+
+    Lithology is drawn first from each realization's random source, so the
+    rows equal the M2 rows of a full run with the same seed, at a fraction of
+    the cost (no water level or resistivity).
+
+    Returns:
+        tuple: (ms, layer_index, block_flag)
+    """
+    Nz = len(z_vec)
+    ms = np.zeros((stop - start, Nz), dtype=lithology_dtype(info))
+    layer_index = np.zeros((stop - start, Nz), dtype=layer_index_dtype(info))
+    block_flag = [0, 0, 0]
+    chains = section_chains(info)
+    rngs = [RealizationRNG(int(seed_offset) + i) for i in range(start, stop)]
+    pools = chain_pools(info, rngs, chains)
+    for k in range(stop - start):
+        local_flag = [0, 0, 0]
+        ms[k], layer_index[k], local_flag = prior_lith_reals(
+            info, z_vec, local_flag, rng=rngs[k], chains=chains, chain_pool=pools[k])
+        _merge_flags(block_flag, local_flag)
+    return ms, layer_index, block_flag
+
+
+def _generate_block_task(bounds, info, z_vec, seed_offset=0, **kwargs):
+    """Pool worker: generate the block given by bounds = (start, stop)."""
+    start, stop = bounds
+    return _generate_block(start, stop, info, z_vec, seed_offset, **kwargs)
+
+
+def _default_block_size(Nreals, n_workers):
+    """Blocks small enough for smooth progress and load balancing, large
+    enough to amortize task overhead."""
+    return int(max(1, min(1000, Nreals // (max(n_workers, 1) * 20))))
+
+
+def _split_blocks(Nreals, block_size, start=0):
+    """Split range(start, Nreals) into contiguous (start, stop) blocks."""
+    return [(b, min(b + block_size, Nreals)) for b in range(start, Nreals, block_size)]
+
+
+def _submit(pool, func, item):
+    """Submit func(item) to a multiprocessing Pool or a concurrent.futures
+    Executor; return a callable that waits for the result."""
+    if hasattr(pool, 'submit'):
+        return pool.submit(func, item).result
+    return pool.apply_async(func, (item,)).get
+
+
+def _imap_bounded(pool, func, items, window):
+    """Ordered pool.imap that keeps at most `window` tasks outstanding, so
+    finished blocks cannot pile up in memory faster than they are consumed."""
+    pending = deque()
+    items = iter(items)
+    window = max(window, 1)
+    for item in items:
+        pending.append(_submit(pool, func, item))
+        if len(pending) >= window:
+            break
+    try:
+        while pending:
+            result = pending.popleft()()
+            for item in items:
+                pending.append(_submit(pool, func, item))
+                break
+            yield result
+    finally:
+        # Drain tasks still in flight when the consumer stops early, so a
+        # persistent pool is idle again afterwards
+        for wait in pending:
+            try:
+                wait()
+            except Exception:
+                pass
+
+
+# Prior information and depth vector of a PriorSampler, set once per worker
+_WORKER_CONFIG = None
+
+
+def _init_sampler_worker(info, z_vec):
+    """Pool initializer: keep the prior configuration resident in the worker."""
+    global _WORKER_CONFIG
+    _WORKER_CONFIG = (info, z_vec)
+
+
+def _sampler_block_task(bounds, seed_offset=0, **kwargs):
+    """Pool worker: generate a block for the configuration set by the initializer."""
+    info, z_vec = _WORKER_CONFIG
+    return _generate_block(bounds[0], bounds[1], info, z_vec, seed_offset, **kwargs)
+
+
+class PriorSampler:
+    """
+    Reusable prior sampler with a persistent worker pool.
+
+    The prior configuration is sent to every worker once, through the pool
+    initializer, and the pool stays alive across sample() calls. Use it when
+    drawing many batches from the same prior (notebooks, inversions):
+
+        with PriorSampler(info, z_vec, n_workers=8) as prior:
+            ms, ns, ws, flags = prior.sample(1000, seed=1)
+            ms, ns, ws, flags = prior.sample(1000, seed=2)
+
+    sample(n, seed) returns exactly what get_prior_sample(info, z_vec, n,
+    seed=seed) returns.
+
+    Args:
+        info (dict): Prior information dictionary.
+        z_vec (array-like): Depths to layer bottoms.
+        n_workers (int, optional): Number of workers (default: -1).
+            -1 = use all CPU cores, 0 or None = sequential execution,
+            >0 = use specified number of cores
+        executor (str or Executor, optional): Execution backend, see
+            get_prior_sample (default: "process", or "sequential" for 0 workers).
+        start_method (str, optional): multiprocessing start method for the
+            process backend.
+        engine (str, optional): "numpy" (default), "numba" or "auto", see
+            geoprior1d.engines. Without an explicit executor, the numba engine
+            runs the blocks in the calling process and uses the workers as
+            threads of its kernels.
+    """
+
+    def __init__(self, info, z_vec, n_workers=-1, executor=None, start_method=None, engine=None):
+        self.info = info
+        self.z_vec = z_vec
+        self.engine = resolve_engine(engine)
+
+        # Determine number of workers (0 = sequential execution)
+        if n_workers is not None and n_workers != 0:
+            if n_workers == -1:
+                n_workers = cpu_count()
+            else:
+                n_workers = min(n_workers, cpu_count())
+        else:
+            n_workers = 0
+        self.n_threads = None
+        if self.engine == "numba":
+            if executor is None:
+                # Compiled kernels parallelize within a block
+                self.n_threads, n_workers = max(n_workers, 1), 0
+            elif executor == "process":
+                # One kernel thread per worker; forking after numba's threads
+                # have started can deadlock, so workers are spawned
+                self.n_threads = 1
+                start_method = start_method or "spawn"
+        if executor is None:
+            executor = "process" if n_workers > 0 else "sequential"
+        self.n_workers = executor_workers(executor, n_workers)
+
+        # Worker processes get the configuration once; threads and the calling
+        # process use it directly
+        self._resident = executor == "process" and self.n_workers > 0
+        initargs = (info, z_vec) if self._resident else ()
+        self._stack = ExitStack()
+        self._pool = self._stack.enter_context(open_executor(
+            executor, self.n_workers, start_method,
+            initializer=_init_sampler_worker if self._resident else None,
+            initargs=initargs))
+
+    def _worker(self, **kwargs):
+        kwargs.update(engine=self.engine, n_threads=self.n_threads)
+        if self._resident:
+            return partial(_sampler_block_task, **kwargs)
+        return partial(_generate_block_task, info=self.info, z_vec=self.z_vec, **kwargs)
+
+    def iter_blocks(self, blocks, seed_offset, n_total, features=False, sampler="random",
+                    store_layers=False):
+        """
+        Generate blocks of realizations on the pool, yielding them in order.
+
+        Args:
+            blocks (list): (start, stop) realization ranges, see _split_blocks.
+            seed_offset (int): Base seed; realization i is seeded with seed_offset + i.
+            n_total (int): Realizations in the whole run (used by the "lhs" sampler).
+            features (bool): Also compute the per-realization feature tables.
+            sampler (str): "random", "sobol" or "lhs".
+            store_layers (bool): Add 'layer_index' to the feature tables.
+
+        Yields:
+            ((start, stop), result): result as returned by _generate_block.
+        """
+        if self._pool is None:
+            raise RuntimeError("PriorSampler is closed")
+        resolve_engine(self.engine, sampler)  # The numba engine has no QMC samplers
+        worker = self._worker(seed_offset=seed_offset,
+                              features=features,
+                              sampler=sampler,
+                              n_total=n_total,
+                              store_layers=store_layers)
+        results = _imap_bounded(self._pool, worker, blocks, window=2 * self.n_workers)
+        try:
+            for bounds, result in zip(blocks, results):
+                yield bounds, result
+        finally:
+            results.close()
+
+    def sample(self, Nreals, seed=None, progress=None, block_size=None, max_memory=None,
+               return_features=False, sampler="random", convergence=None, store_layers=False):
+        """
+        Generate Nreals realizations; arguments and return values as in get_prior_sample.
+        """
+        if self._pool is None:
+            raise RuntimeError("PriorSampler is closed")
+        info, z_vec = self.info, self.z_vec
+        n_workers = self.n_workers
+
+        Nz = len(z_vec)
+        # Smallest integer dtype for lithology, float32 for resistivity and water level
+        ms = np.zeros((Nreals, Nz), dtype=lithology_dtype(info))  # Lithology samples
+        ns = np.zeros((Nreals, Nz), dtype=np.float32)  # Resistivity samples
+        os = np.zeros(Nreals, dtype=np.float32)        # Water level samples
+        flag_vector = [0, 0, 0]      # Simulation status flags
+        feature_blocks = []
+
+        # Note: Probability normalization now handled in extract_prior_info() preprocessing
+
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Unknown sampler '{sampler}'. Choose from: {', '.join(SAMPLERS)}")
+        reporter = get_progress_reporter(progress)
+        if seed is None:
+            seed_offset = np.random.randint(0, 1e9)  # For reproducibility across runs
+        else:
+            seed_offset = int(seed)
+
+        if block_size is None:
+            block_size = _default_block_size(Nreals, n_workers)
+            if max_memory is not None:
+                block_size = min(block_size, _block_size_for_budget(
+                    max_memory, Nreals, Nz, len(info['Classes']['codes']), n_workers,
+                    features=return_features,
+                    layer_bytes=layer_index_dtype(info).itemsize if store_layers else 0))
+        blocks = _split_blocks(Nreals, block_size)
+
+        reporter.start(Nreals, n_workers)
+        if convergence is not None:
+            convergence.start()
+        n_done = 0
+
+        def _store(bounds, result):
+            """Store a finished block; return True if generation should stop."""
+            nonlocal n_done
+            start, stop = bounds
+            bm, bn, bo, block_flag = result[:4]
+            if return_features:
+                feature_blocks.append(result[4])
+            ms[start:stop] = bm
+            ns[start:stop] = bn
+            os[start:stop] = bo
+            _merge_flags(flag_vector, block_flag)
+            reporter.block_done(stop - start, block_flag)
+            n_done = stop
+            return convergence is not None and convergence.update(bm, bn, bo)
+
+        results = self.iter_blocks(blocks, seed_offset, Nreals, features=return_features,
+                                   sampler=sampler, store_layers=store_layers)
+        for bounds, result in results:
+            if _store(bounds, result):
+                break
+        results.close()
+
+        reporter.finish()
+
+        if convergence is not None:
+            if not convergence.stopped:
+                convergence.stop_reason = "max_realizations"
+            reporter.message(f"Stopped after {n_done} realizations ({convergence.stop_reason}).")
+            ms, ns, os = ms[:n_done], ns[:n_done], os[:n_done]
+            Nreals = n_done
+
+        # Final warnings if applicable
+        if flag_vector[0] == 1:
+            reporter.warning("Something went wrong. Models may not reflect your input assumptions.")
+        if flag_vector[1] == 1:
+            reporter.warning("Number of layers may not be uniformly distributed.")
+        flag_vector[2] = flag_vector[2] / Nreals if Nreals else 0
+
+        if return_features:
+            return ms, ns, os, flag_vector, concatenate_features(feature_blocks)
+        return ms, ns, os, flag_vector
+
+    def close(self):
+        """Shut down the worker pool."""
+        if self._pool is not None:
+            self._stack.close()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def get_prior_sample(info, z_vec, Nreals, n_processes=-1, seed=None, progress=None,
+                     block_size=None, max_memory=None, return_features=False,
+                     sampler="random", convergence=None, executor=None, start_method=None,
+                     store_layers=False, engine=None):
     """
     Generate prior samples of lithology, resistivity, and water level.
 
@@ -56,80 +486,58 @@ def get_prior_sample(info, z_vec, Nreals, n_processes=-1):
             -1 = use all CPU cores (default, recommended for performance)
             0 or None = sequential execution (slower, for debugging)
             >0 = use specified number of cores
+        seed (int, optional): Base random seed. Realization i is seeded with
+            seed + i, so runs with the same seed are reproducible. If None
+            (default), a random base seed is drawn.
+        progress (optional): Progress/telemetry sink (default: None = tqdm bar).
+            "tqdm", "jsonl" or "silent", a ProgressReporter instance, or a
+            callable receiving event dictionaries (see geoprior1d.progress).
+        block_size (int, optional): Realizations per work unit. Progress is
+            reported once per block (default: chosen from Nreals and workers).
+        max_memory (int or str, optional): Memory budget in bytes or as a size
+            like "4G". Caps the automatic block size so that the output arrays
+            plus the blocks in flight fit (see geoprior1d.memory.estimate_memory).
+        return_features (bool, optional): Also return per-realization feature
+            tables, computed by the workers (default: False).
+        sampler (str, optional): How the continuous draws (section and layer
+            thicknesses, resistivity perturbations, water level) are made:
+            "random" (default, pseudo-random), "sobol" (scrambled Sobol) or
+            "lhs" (Latin hypercube). The QMC modes reach stable per-depth
+            statistics with fewer realizations; see geoprior1d.rng.
+        convergence (ConvergenceMonitor, optional): Generate until the running
+            prior statistics stabilize. Blocks are fed to the monitor in order
+            and generation stops once it reports convergence or one of its
+            caps; Nreals is then the upper limit and the returned arrays hold
+            only the realizations generated. The monitor keeps the trace
+            (see geoprior1d.convergence).
+        executor (str or Executor, optional): Where the blocks run: "process"
+            (default when n_processes != 0), "thread", "sequential" (default
+            when n_processes is 0), or a concurrent.futures.Executor instance,
+            which is used as is and left open. The thread backend avoids
+            pickling and scales on free-threaded Python builds. All backends
+            give identical results (see geoprior1d.executors).
+        start_method (str, optional): multiprocessing start method for the
+            process backend ("fork", "spawn" or "forkserver").
+        store_layers (bool, optional): With return_features, also return the layer
+            index of every cell as features['layer_index'] (default: False).
+        engine (str, optional): "numpy" (default), "numba" (compiled parallel
+            kernels, needs numba) or "auto"; see geoprior1d.engines.
+
+    For repeated calls with the same prior, PriorSampler keeps the worker
+    pool and the configuration resident between calls.
 
     Returns:
         ms (ndarray): Lithology samples (Nreals x Nz).
         ns (ndarray): Resistivity samples (Nreals x Nz).
         os (ndarray): Water level samples (Nreals,).
         flag_vector (list): Flags indicating issues during generation.
+        features (dict): Only if return_features: feature arrays keyed by name
+            (see geoprior1d.features.compute_features).
     """
 
-    Nz = len(z_vec)
-    # Use float32 for memory efficiency (half the memory of float64)
-    ms = np.zeros((Nreals, Nz), dtype=np.float32)  # Lithology samples
-    ns = np.zeros((Nreals, Nz), dtype=np.float32)  # Resistivity samples
-    os = np.zeros(Nreals, dtype=np.float32)        # Water level samples
-    flag_vector = [0, 0, 0]      # Simulation status flags
-
-    # Note: Probability normalization now handled in extract_prior_info() preprocessing
-
-    start_time = time.time()
-    seed_offset = np.random.randint(0, 1e9)  # For reproducibility across runs
-
-    # ========== PARALLEL EXECUTION ==========
-    if n_processes is not None and n_processes != 0:
-        # Determine number of workers
-        if n_processes == -1:
-            n_workers = cpu_count()
-        else:
-            n_workers = min(n_processes, cpu_count())
-
-        print(f"Using {n_workers} parallel processes...")
-
-        # Create worker function with fixed parameters
-        worker = partial(_generate_single_realization,
-                        info=info,
-                        z_vec=z_vec,
-                        seed_offset=seed_offset)
-
-        # Process in parallel with progress bar
-        with Pool(processes=n_workers) as pool:
-            results = list(tqdm(
-                pool.imap(worker, range(Nreals)),
-                total=Nreals,
-                desc="Generating priors",
-                unit="real"
-            ))
-
-        # Unpack results
-        for i, (m, n, o, local_flag) in enumerate(results):
-            ms[i, :] = m
-            ns[i, :] = n
-            os[i] = o
-
-            # Aggregate flags
-            flag_vector[0] = max(flag_vector[0], local_flag[0])
-            flag_vector[1] = max(flag_vector[1], local_flag[1])
-            flag_vector[2] += local_flag[2]
-
-    # ========== SEQUENTIAL EXECUTION ==========
-    else:
-        for i in tqdm(range(Nreals), desc="Generating priors", unit="real"):
-            m, n, o, flag_vector = _generate_single_realization(
-                i, info, z_vec, seed_offset
-            )
-            ms[i, :] = m
-            ns[i, :] = n
-            os[i] = o
-
-    elapsed = time.time() - start_time
-    print(f"Prior generation completed in {round(elapsed)} seconds.")
-
-    # Final warnings if applicable
-    if flag_vector[0] == 1:
-        print("⚠️  Warning: Something went wrong. Models may not reflect your input assumptions.")
-    if flag_vector[1] == 1:
-        print("⚠️  Warning: Number of layers may not be uniformly distributed.")
-    flag_vector[2] = flag_vector[2] / Nreals
-
-    return ms, ns, os, flag_vector
+    with PriorSampler(info, z_vec, n_processes, executor, start_method,
+                      engine=resolve_engine(engine, sampler)) as prior_sampler:
+        return prior_sampler.sample(Nreals, seed=seed, progress=progress, block_size=block_size,
+                                    max_memory=max_memory, return_features=return_features,
+                                    sampler=sampler, convergence=convergence,
+                                    store_layers=store_layers)
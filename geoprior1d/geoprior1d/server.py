@@ -0,0 +1,389 @@
+"""Warm local prior-sampling server and client.
+
+A `PriorServer` keeps parsed Excel configurations and one persistent
+executor resident, so that repeated requests for small batches of
+realizations do not pay for Excel parsing and pool startup on every call.
+Each warm configuration is sampled through a `PriorSampler` on the shared
+executor, with the same engine and executor selection as get_prior_sample.
+It listens on localhost HTTP or on a Unix socket; `PriorClient` is the
+matching Python client.
+
+Batches are addressed by seed range: with base seed `seed`, realization i is
+seeded with seed + i (as in `get_prior_sample`), so the rows [start, stop)
+returned by the server equal rows start..stop-1 of a full run with that seed.
+"""
+
+import http.client
+import io
+import json
+import os
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import cpu_count, shared_memory
+
+import numpy as np
+
+from .configs import config_spec, load_config
+from .engines import resolve_engine
+from .executors import open_executor, executor_workers
+from .lithology import lithology_dtype
+from .sampling import PriorSampler, _split_blocks, _merge_flags
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+# Arrays returned for a batch, in the order of get_prior_sample's return values
+_ARRAY_NAMES = ("M2", "M1", "M3")
+
+
+def _parse_address(address):
+    """Split an address into ('tcp', (host, port)) or ('unix', path)."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return "tcp", (host or "127.0.0.1", int(port))
+    if address.startswith("unix:"):
+        address = address[len("unix:"):]
+    return "unix", address
+
+
+class PriorServer:
+    """
+    Long-running sampling server with a persistent executor.
+
+    Args:
+        address (str): "host:port" for localhost HTTP, or a filesystem path
+            (optionally prefixed with "unix:") for a Unix domain socket.
+        n_workers (int): Number of workers (-1 = all CPU cores,
+            0 = generate in the request thread without a pool).
+        block_size (int): Number of realizations per worker task.
+        max_configs (int): Number of parsed configurations kept warm.
+        verbose (bool): Log requests to stderr.
+        executor (str or Executor, optional): Execution backend shared by all
+            configurations, see get_prior_sample (default: "process", or
+            "sequential" for 0 workers).
+        start_method (str, optional): multiprocessing start method for the
+            process backend.
+        engine (str, optional): "numpy" (default), "numba" or "auto". Without an
+            explicit executor the numba engine starts no pool and runs the
+            blocks in the request thread with n_workers kernel threads.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, n_workers=-1, block_size=250,
+                 max_configs=8, verbose=False, executor=None, start_method=None,
+                 engine=None):
+        self.address = address
+        self.block_size = max(1, int(block_size))
+        self.max_configs = max_configs
+        self.verbose = verbose
+        self.n_served = 0
+        self.engine = resolve_engine(engine)
+        self._configs = OrderedDict()
+        self._samplers = {}
+        self._lock = threading.Lock()
+
+        if n_workers == -1:
+            n_workers = cpu_count()
+        else:
+            n_workers = min(n_workers or 0, cpu_count())
+
+        # Start the shared executor before any server threads exist
+        self._stack = ExitStack()
+        self._executor = None
+        if executor is not None or self.engine != "numba":
+            if executor is None:
+                executor = "process" if n_workers > 0 else "sequential"
+            if self.engine == "numba" and executor == "process":
+                # Forking after numba's threads have started can deadlock
+                start_method = start_method or "spawn"
+            self._executor = self._stack.enter_context(
+                open_executor(executor, n_workers, start_method))
+            n_workers = executor_workers(executor, n_workers)
+        self.n_workers = n_workers
+        # Compiled kernels in the request threads must not run concurrently
+        self._kernel_lock = threading.Lock() if self._executor is None else nullcontext()
+
+        kind, addr = _parse_address(address)
+        if kind == "tcp":
+            self._httpd = ThreadingHTTPServer(addr, _RequestHandler)
+        else:
+            if os.path.exists(addr):
+                os.remove(addr)
+            self._httpd = _UnixHTTPServer(addr, _RequestHandler)
+        self._httpd.prior_server = self
+
+    def config(self, config, dmax, dz):
+        """Return the cached (info, z_vec, cmaps) for an Excel config."""
+        spec = config_spec(config, dmax, dz)
+        with self._lock:
+            return spec, load_config(spec, self._configs, self.max_configs)
+
+    def _sampler(self, spec):
+        """Return the PriorSampler of a warm config, closing those of evicted ones."""
+        with self._lock:
+            info, z_vec, _ = load_config(spec, self._configs, self.max_configs)
+            sampler = self._samplers.get(spec)
+            if sampler is None:
+                sampler = self._samplers[spec] = PriorSampler(
+                    info, z_vec, self.n_workers, self._executor, engine=self.engine)
+            for old in [s for s in self._samplers if s not in self._configs]:
+                self._samplers.pop(old).close()
+            return sampler
+
+    def sample(self, config, start, stop, seed=0, dmax=90, dz=1.0):
+        """
+        Generate realizations start..stop-1 for a config.
+
+        Returns:
+            ms, ns, os, flag_vector: As returned by get_prior_sample.
+        """
+        sampler = self._sampler(config_spec(config, dmax, dz))
+        info, z_vec = sampler.info, sampler.z_vec
+        n = max(stop - start, 0)
+
+        # Same dtypes as get_prior_sample, also for an empty range
+        ms = np.zeros((n, len(z_vec)), dtype=lithology_dtype(info))
+        ns = np.zeros((n, len(z_vec)), dtype=np.float32)
+        os_ = np.zeros(n, dtype=np.float32)
+        flag_vector = [0, 0, 0]
+
+        with self._kernel_lock:
+            blocks = sampler.iter_blocks(_split_blocks(stop, self.block_size, start), seed, stop)
+            for (b0, b1), block in blocks:
+                ms[b0 - start:b1 - start] = block[0]
+                ns[b0 - start:b1 - start] = block[1]
+                os_[b0 - start:b1 - start] = block[2]
+                _merge_flags(flag_vector, block[3])
+        flag_vector[2] = flag_vector[2] / max(n, 1)
+
+        with self._lock:
+            self.n_served += n
+        return ms, ns, os_, flag_vector
+
+    def status(self):
+        """Return a JSON-serializable summary of the server state."""
+        with self._lock:
+            configs = [{"file": s.path, "dmax": s.dmax, "dz": s.dz} for s in self._configs]
+            return {"address": self.address, "n_workers": self.n_workers,
+                    "block_size": self.block_size, "configs": configs,
+                    "realizations_served": self.n_served}
+
+    def serve_forever(self):
+        """Handle requests until shutdown() is called."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self.close()
+
+    def shutdown(self):
+        """Stop serve_forever() from another thread."""
+        threading.Thread(target=self._httpd.shutdown, daemon=True).start()
+
+    def close(self):
+        """Release the socket and shut down the executor."""
+        self._httpd.server_close()
+        kind, addr = _parse_address(self.address)
+        if kind == "unix" and os.path.exists(addr):
+            os.remove(addr)
+        with self._lock:
+            for sampler in self._samplers.values():
+                sampler.close()
+            self._samplers.clear()
+        self._stack.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP endpoints: GET /status, POST /sample, POST /shutdown."""
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.prior_server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, code, body, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/status":
+            self._send(404, {"error": f"unknown endpoint {self.path}"})
+            return
+        try:
+            status = self.server.prior_server.status()
+        except Exception as e:
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self._send(200, status)
+
+    def do_POST(self):
+        server = self.server.prior_server
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._send(400, {"error": f"invalid JSON: {e}"})
+            return
+
+        if self.path == "/shutdown":
+            self._send(200, {"status": "shutting down"})
+            server.shutdown()
+            return
+        if self.path != "/sample":
+            self._send(404, {"error": f"unknown endpoint {self.path}"})
+            return
+
+        try:
+            start = int(request.get("start", 0))
+            stop = int(request["stop"])
+            ms, ns, os_, flag_vector = server.sample(
+                request["config"], start, stop,
+                seed=int(request.get("seed", 0)),
+                dmax=float(request.get("dmax", 90)),
+                dz=float(request.get("dz", 1.0)))
+        except (KeyError, ValueError, OSError) as e:
+            self._send(400, {"error": f"{type(e).__name__}: {e}"})
+            return
+        except Exception as e:
+            # Anything else is a server-side failure, not a bad request
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        arrays = dict(zip(_ARRAY_NAMES, (ms, ns, os_)))
+        if request.get("transport", "npy") == "shm":
+            self._send(200, {"arrays": {k: _to_shared_memory(v) for k, v in arrays.items()},
+                             "flags": flag_vector})
+        else:
+            buffer = io.BytesIO()
+            np.savez(buffer, flags=np.array(flag_vector, dtype=float), **arrays)
+            self._send(200, buffer.getvalue(), content_type="application/octet-stream")
+
+
+def _to_shared_memory(array):
+    """Copy an array into a new shared memory block owned by the client."""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    try:
+        # The client unlinks the block; keep the server's tracker out of it
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    shm.close()
+    return {"name": shm.name, "shape": list(array.shape), "dtype": array.dtype.str}
+
+
+def _from_shared_memory(handle):
+    """Copy an array out of a shared memory block and unlink the block."""
+    shm = shared_memory.SharedMemory(name=handle["name"])
+    try:
+        return np.ndarray(handle["shape"], dtype=handle["dtype"], buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._socket_path)
+
+
+class PriorClient:
+    """
+    Client for a running PriorServer.
+
+    Args:
+        address (str): Server address, as passed to PriorServer.
+        timeout (float, optional): Socket timeout in seconds.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=None):
+        self.address = address
+        self.timeout = timeout
+
+    def _request(self, method, path, payload=None):
+        kind, addr = _parse_address(self.address)
+        if kind == "tcp":
+            conn = http.client.HTTPConnection(*addr, timeout=self.timeout)
+        else:
+            conn = _UnixHTTPConnection(addr, timeout=self.timeout)
+        try:
+            body = json.dumps(payload).encode() if payload is not None else None
+            conn.request(method, path, body=body,
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            data = response.read()
+            if response.status != 200:
+                raise RuntimeError(json.loads(data).get("error", data.decode()))
+            return response.getheader("Content-Type"), data
+        finally:
+            conn.close()
+
+    def sample(self, config, n=None, start=0, stop=None, seed=0, dmax=90, dz=1.0,
+               transport="npy"):
+        """
+        Request realizations start..stop-1 (or start..start+n-1) for a config.
+
+        Args:
+            config (str): Path to the Excel input file (resolved locally).
+            n (int, optional): Number of realizations, if stop is not given.
+            start, stop (int): Realization index range.
+            seed (int): Base random seed; realization i uses seed + i.
+            dmax, dz (float): Depth grid, as for geoprior1d().
+            transport (str): "npy" to receive the arrays in the response body,
+                "shm" to receive them through shared memory blocks.
+
+        Returns:
+            ms, ns, os, flag_vector: As returned by get_prior_sample.
+        """
+        if stop is None:
+            if n is None:
+                raise ValueError("Either n or stop must be given")
+            stop = start + n
+        payload = {"config": os.path.abspath(config), "start": start, "stop": stop,
+                   "seed": seed, "dmax": dmax, "dz": dz, "transport": transport}
+        content_type, data = self._request("POST", "/sample", payload)
+
+        if content_type == "application/json":
+            reply = json.loads(data)
+            arrays = {k: _from_shared_memory(h) for k, h in reply["arrays"].items()}
+            flag_vector = reply["flags"]
+        else:
+            with np.load(io.BytesIO(data)) as npz:
+                arrays = {k: npz[k] for k in _ARRAY_NAMES}
+                flags = npz["flags"].tolist()
+                flag_vector = [int(flags[0]), int(flags[1]), flags[2]]
+        return arrays["M2"], arrays["M1"], arrays["M3"], flag_vector
+
+    def status(self):
+        """Return the server status dictionary."""
+        return json.loads(self._request("GET", "/status")[1])
+
+    def shutdown(self):
+        """Ask the server to stop."""
+        self._request("POST", "/shutdown", {})
@@ -0,0 +1,318 @@
+"""Representative sub-sampling (thinning) of large prior files.
+
+Inversions scale with the size of the prior, so a small subset that
+represents a large file is often wanted. Taking the first n realizations is
+biased if the file has any ordering (e.g. a scenario mixture or a run
+stitched from several seeds). `thin_prior` instead summarizes every
+realization in a compact feature vector, streamed from the file in chunks:
+
+    class fractions     fraction of the depth column in each class
+    log-resistivity     mean log10 resistivity in a few equal depth bands
+    water level         depth to the water table, if stored (M3)
+    n_layers            number of layers (feature tables, or M2 contacts)
+
+and selects n realizations on the standardized features with one of
+
+    random      uniform without replacement (reference)
+    stratified  strata by scenario, dominant class and number of layers,
+                allocated proportionally and sampled systematically along
+                the first principal component within each stratum
+    kmedoids    k-means on the features (n clusters) followed by picking
+                the member nearest each centre (a medoid-style
+                representative), so every selected realization stands in
+                for its cluster; if clusters end up empty, random extras
+                fill up to n and every selected realization stands in for
+                the realizations nearest to it
+
+The subset is written with the same datasets, attributes and feature tables
+as the source, plus a `thinning` group holding the source index of every
+row and its weight (the share of the source it represents; weights sum to 1).
+"""
+
+import os
+
+import h5py
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .features import FEATURES_GROUP
+from .quantize import read_m1
+from .mixture import allocate_realizations
+
+THINNING_GROUP = "thinning"
+
+THINNING_METHODS = ("stratified", "kmedoids", "random")
+
+# Realizations read per step when streaming the source file
+_THIN_CHUNK = 100_000
+
+# Depth bands summarized by their mean log10 resistivity
+_RES_BANDS = 8
+
+# Rows used to estimate the principal axis of the features
+_PCA_ROWS = 100_000
+
+# Groups of a complete prior file that describe the whole run and are copied as is
+_COPY_GROUPS = ("scenarios", "convergence")
+
+
+def _n_layers_from_codes(ms):
+    """Number of layers seen as class contacts (adjacent layers of one class merge)."""
+    return 1 + np.count_nonzero(ms[:, 1:] != ms[:, :-1], axis=1)
+
+
+def compact_features(prior_file, chunk_size=_THIN_CHUNK, n_bands=_RES_BANDS):
+    """
+    Compact per-realization features of a prior file, streamed in chunks.
+
+    Args:
+        prior_file (str): HDF5 file written by geoprior1d.
+        chunk_size (int): Realizations read per step.
+        n_bands (int): Depth bands for the log10 resistivity means.
+
+    Returns:
+        X (ndarray): Features (Nreals x n_features), float32, not standardized.
+        keys (dict): Integer arrays used for stratification: 'dominant_class',
+            'n_layers' and, for mixture priors, 'scenario'.
+    """
+    with h5py.File(prior_file, 'r') as f:
+        Nreals, Nz = f['M1'].shape
+        n_classes = len(f['M2'].attrs['class_id'])
+        bands = np.array_split(np.arange(Nz), min(n_bands, Nz))
+        has_water = 'M3' in f
+        has_features = FEATURES_GROUP in f
+        n_features = n_classes + len(bands) + 1 + has_water
+        X = np.zeros((Nreals, n_features), dtype=np.float32)
+        keys = {'dominant_class': np.zeros(Nreals, dtype=np.int16),
+                'n_layers': np.zeros(Nreals, dtype=np.int16)}
+        if 'M4' in f:
+            keys['scenario'] = f['M4'][:, 0].astype(np.int16)
+
+        for start in range(0, Nreals, chunk_size):
+            stop = min(start + chunk_size, Nreals)
+            ms = f['M2'][start:stop]
+            logres = np.log10(np.maximum(read_m1(f['M1'], slice(start, stop)), 1e-6))
+            col = 0
+            for k in range(n_classes):
+                X[start:stop, col] = np.mean(ms == k + 1, axis=1)
+                col += 1
+            for band in bands:
+                X[start:stop, col] = logres[:, band].mean(axis=1)
+                col += 1
+            if has_features:
+                n_layers = f[FEATURES_GROUP]['n_layers'][start:stop]
+            else:
+                n_layers = _n_layers_from_codes(ms)
+            X[start:stop, col] = n_layers
+            col += 1
+            if has_water:
+                X[start:stop, col] = f['M3'][start:stop, 0]
+            keys['dominant_class'][start:stop] = 1 + np.argmax(X[start:stop, :n_classes], axis=1)
+            keys['n_layers'][start:stop] = n_layers
+    return X, keys
+
+
+def _standardize(X):
+    """Columns scaled to zero mean and unit variance (constant columns left at 0)."""
+    mean = X.mean(axis=0, dtype=np.float64)
+    std = X.std(axis=0, dtype=np.float64)
+    std[std == 0] = 1.0
+    return ((X - mean) / std).astype(np.float32)
+
+
+def _first_component(Z, rng):
+    """Projection of Z onto its first principal axis, estimated on a subsample."""
+    rows = Z if len(Z) <= _PCA_ROWS else Z[rng.choice(len(Z), _PCA_ROWS, replace=False)]
+    _, _, vt = np.linalg.svd(rows - rows.mean(axis=0), full_matrices=False)
+    return Z @ vt[0]
+
+
+def _select_stratified(Z, strata, n, rng):
+    """Proportional allocation over strata, systematic sampling along PC1 within each."""
+    labels, inverse, sizes = np.unique(strata, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    counts = allocate_realizations(sizes, n)
+    pc1 = _first_component(Z, rng)
+    order = np.lexsort((pc1, inverse))
+    first = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    selected, weights = [], []
+    for s in np.flatnonzero(counts):
+        members = order[first[s]:first[s] + sizes[s]]
+        positions = ((np.arange(counts[s]) + rng.random()) * sizes[s] / counts[s]).astype(np.int64)
+        selected.append(members[np.minimum(positions, sizes[s] - 1)])
+        weights.append(np.full(counts[s], sizes[s] / counts[s]))
+    return np.concatenate(selected), np.concatenate(weights)
+
+
+def _select_kmedoids(Z, n, rng, n_iter):
+    """k-means with n centres, then the member nearest each centre as representative."""
+    N = len(Z)
+    centres = Z[rng.choice(N, n, replace=False)].astype(np.float64)
+    for _ in range(n_iter):
+        _, labels = cKDTree(centres).query(Z)
+        sizes = np.bincount(labels, minlength=n)
+        sums = np.column_stack([np.bincount(labels, Z[:, j], minlength=n)
+                                for j in range(Z.shape[1])])
+        empty = sizes == 0
+        centres[~empty] = sums[~empty] / sizes[~empty, None]
+        if np.any(empty):
+            # Re-seed empty clusters at the points farthest from their centre
+            dist = np.linalg.norm(Z - centres[labels], axis=1)
+            centres[empty] = Z[np.argsort(-dist)[:np.count_nonzero(empty)]]
+
+    dist, labels = cKDTree(centres).query(Z)
+    sizes = np.bincount(labels, minlength=n)
+    order = np.lexsort((dist, labels))
+    first = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    occupied = np.flatnonzero(sizes)
+    selected = order[first[occupied]]
+    weights = sizes[occupied].astype(float)
+    if len(selected) < n:
+        # Clusters left empty after the last assignment: fill up at random, and
+        # let every representative stand for the points nearest to it, so the
+        # extras take their share from the clusters they fall in
+        rest = np.setdiff1d(np.arange(N), selected)
+        extra = rng.choice(rest, n - len(selected), replace=False)
+        selected = np.concatenate((selected, extra))
+        _, nearest = cKDTree(Z[selected]).query(Z)
+        weights = np.bincount(nearest, minlength=n).astype(float)
+    return selected, weights
+
+
+def select_realizations(X, n, method="stratified", strata=None, seed=None, n_iter=10):
+    """
+    Select n representative rows of a feature matrix.
+
+    Args:
+        X (ndarray): Features (Nreals x n_features); standardized internally.
+        n (int): Number of rows to select.
+        method (str): "stratified", "kmedoids" or "random".
+        strata (ndarray, optional): Integer stratum keys (Nreals,) or
+            (Nreals x n_keys) for "stratified" (default: a single stratum).
+        seed (int, optional): Random seed.
+        n_iter (int): k-means iterations for "kmedoids".
+
+    Returns:
+        indices (ndarray): Selected rows, sorted.
+        weights (ndarray): Share of the rows each selected row represents
+            (sums to 1), in the order of indices.
+    """
+    if method not in THINNING_METHODS:
+        raise ValueError(f"Unknown thinning method '{method}'. "
+                         f"Choose from: {', '.join(THINNING_METHODS)}")
+    N = len(X)
+    if not 0 < n <= N:
+        raise ValueError(f"Cannot select {n} of {N} realizations")
+    rng = np.random.default_rng(seed)
+
+    if method == "random":
+        selected, weights = rng.choice(N, n, replace=False), np.ones(n)
+    else:
+        Z = _standardize(np.asarray(X, dtype=np.float32))
+        if method == "stratified":
+            if strata is None:
+                strata = np.zeros(N, dtype=np.int64)
+            strata = np.asarray(strata).reshape(N, -1)
+            selected, weights = _select_stratified(Z, strata, n, rng)
+        else:
+            selected, weights = _select_kmedoids(Z, n, rng, n_iter)
+
+    order = np.argsort(selected)
+    weights = weights[order]
+    return selected[order], weights / weights.sum()
+
+
+def _create_like(f_out, dset, n):
+    """Empty dataset with n rows, shaped, typed and attributed like dset."""
+    out = f_out.create_dataset(dset.name, shape=(n,) + dset.shape[1:], dtype=dset.dtype)
+    for key, value in dset.attrs.items():
+        out.attrs[key] = value
+    return out
+
+
+def write_subset(prior_file, indices, output_file, weights=None, chunk_size=_THIN_CHUNK,
+                 method=None):
+    """
+    Write the realizations at sorted indices of a prior file to a new file.
+
+    M datasets and feature tables are copied chunk by chunk; file attributes
+    and run-level groups are copied as is. The `thinning` group records the
+    source file, the source index of every row and its weight.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    if np.any(np.diff(indices) <= 0):
+        raise ValueError("indices must be sorted and unique")
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    n = len(indices)
+
+    with h5py.File(prior_file, 'r') as f, h5py.File(output_file, 'w') as g:
+        if 'checkpoint' in f:
+            raise ValueError(f"{prior_file} is an incomplete checkpointed run")
+        for key, value in f.attrs.items():
+            g.attrs[key] = value
+        sources = [f[k] for k in f if k.startswith('M') and isinstance(f[k], h5py.Dataset)]
+        if FEATURES_GROUP in f:
+            grp = g.create_group(FEATURES_GROUP)
+            for key, value in f[FEATURES_GROUP].attrs.items():
+                grp.attrs[key] = value
+            sources += list(f[FEATURES_GROUP].values())
+        targets = [_create_like(g, dset, n) for dset in sources]
+        for name in _COPY_GROUPS:
+            if name in f:
+                f.copy(f[name], g)
+
+        Nreals = f['M1'].shape[0]
+        for start in range(0, Nreals, chunk_size):
+            stop = min(start + chunk_size, Nreals)
+            lo, hi = np.searchsorted(indices, [start, stop])
+            if lo == hi:
+                continue
+            rows = indices[lo:hi] - start
+            for src, dst in zip(sources, targets):
+                dst[lo:hi] = src[start:stop][rows]
+
+        grp = g.create_group(THINNING_GROUP)
+        grp.create_dataset('source_index', data=indices)
+        grp.create_dataset('weight', data=np.full(n, 1.0 / n) if weights is None else weights)
+        grp.attrs['source'] = os.path.abspath(prior_file)
+        grp.attrs['n_source'] = Nreals
+        if method is not None:
+            grp.attrs['method'] = method
+    return output_file
+
+
+def thin_prior(prior_file, n, method="stratified", output_file=None, seed=None,
+               chunk_size=_THIN_CHUNK, n_iter=10):
+    """
+    Write a representative subset of n realizations of a prior file.
+
+    Args:
+        prior_file (str): HDF5 file written by geoprior1d.
+        n (int): Number of realizations to keep.
+        method (str): "stratified" (default), "kmedoids" or "random"; see the
+            module docstring.
+        output_file (str, optional): Output filename (default:
+            {prior_base}_thin{n}.h5).
+        seed (int, optional): Random seed of the selection.
+        chunk_size (int): Realizations read per step.
+        n_iter (int): k-means iterations for "kmedoids".
+
+    Returns:
+        name (str): Output HDF5 filename.
+        indices (ndarray): Source indices of the kept realizations (sorted).
+    """
+    if method not in THINNING_METHODS:
+        raise ValueError(f"Unknown thinning method '{method}'. "
+                         f"Choose from: {', '.join(THINNING_METHODS)}")
+    if output_file is None:
+        output_file = f"{os.path.splitext(prior_file)[0]}_thin{n}.h5"
+    elif not output_file.endswith('.h5'):
+        output_file += '.h5'
+
+    X, keys = compact_features(prior_file, chunk_size)
+    strata = np.column_stack([keys[k] for k in ('scenario', 'dominant_class', 'n_layers')
+                              if k in keys])
+    indices, weights = select_realizations(X, n, method, strata, seed, n_iter)
+    write_subset(prior_file, indices, output_file, weights, chunk_size, method)
+    return output_file, indices
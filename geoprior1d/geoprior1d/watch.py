@@ -0,0 +1,341 @@
+"""Live preview of a prior while its input file is edited.
+
+`geoprior1d watch prior.xlsx` polls the Excel file and, after every save,
+renders a small preview ensemble to an image (default
+{input_base}_preview.png) that an image viewer can keep open:
+
+    realizations    lithology and resistivity of the preview ensemble
+    proportions     class proportions against depth
+    distributions   per-class resistivity distributions
+    feasibility     proposals per realization, realizations that hit the
+                    redraw limit, and static checks of the tables
+
+The preview is staged so that a save only recomputes what it affects. The
+workbook is read once per save and compared sheet by sheet with the last
+rendered version: lithology (the rejection sampling) is redrawn only when
+Geology1 or Geology2 changed, water levels only when the Water table sheet
+changed, and otherwise resistivity is redrawn for the kept lithology (see
+geoprior1d.resample). Every stage has a fixed seed, so differences between
+two previews come from the edit, not from sampling noise.
+
+A save is picked up once the file is unchanged for one polling interval,
+so half-written files are skipped. A save that arrives while a preview is
+computed cancels it: the file is checked between small groups of
+realizations and the newer version is rendered instead. Saves that cannot be
+parsed (invalid tables) are reported and the last preview is kept.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+from matplotlib.colors import ListedColormap, BoundaryNorm, LogNorm
+from matplotlib.figure import Figure
+from scipy.stats import norm
+
+from .colormaps import flj_log
+from .io import SHEETS, read_prior_tables, prior_info_from_tables, table_to_strings
+from .progress import get_progress_reporter
+from .resample import resample_block
+from .rng import RealizationRNG
+from .lithology import MAX_TRIES
+from .sampling import _lithology_block
+from .water import prior_water_reals
+
+# Realizations between checks for a newer save
+_CHECK_EVERY = 10
+
+
+class PreviewCancelled(Exception):
+    """A newer save arrived while the preview was computed."""
+
+
+def _signature(path):
+    """(mtime, size) of a file, or None while it is missing (e.g. mid-save)."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _digest(table):
+    return hashlib.sha256(json.dumps(table_to_strings(table)).encode()).hexdigest()
+
+
+def feasibility_checks(info):
+    """
+    Static checks of the tables that make constraints impossible to meet.
+
+    Args:
+        info (dict): Prior information dictionary.
+
+    Returns:
+        list: One message per problem found (empty if none).
+    """
+    problems = []
+    classes, sections = info['Classes'], info['Sections']
+    names = classes['names']
+    for k, name in enumerate(names):
+        if classes['min_thick'][k] > classes['max_thick'][k]:
+            problems.append(f"{name}: min thickness exceeds max thickness")
+    for i in range(sections['N_sections']):
+        label = f"Section {i + 1}"
+        if sections['min_thick'][i] > sections['max_thick'][i]:
+            problems.append(f"{label}: min unit thickness exceeds max unit thickness")
+        if sections['min_layers'][i] > sections['max_layers'][i]:
+            problems.append(f"{label}: min no of layers exceeds max no of layers")
+        types = [t - 1 for t in sections['types'][i]]
+        if len(sections['probabilities'][i]) != len(types):
+            problems.append(f"{label}: {len(sections['probabilities'][i])} probabilities "
+                            f"for {len(types)} classes")
+        if i == sections['N_sections'] - 1:
+            continue  # The bottom section fills the remaining depth
+        # Layers are rescaled to the unit thickness; some layer count must fit
+        thinnest = np.min(classes['min_thick'][types])
+        thickest = np.max(classes['max_thick'][types])
+        counts = np.arange(sections['min_layers'][i], sections['max_layers'][i] + 1)
+        if not np.any((counts * thinnest < sections['max_thick'][i])
+                      & (counts * thickest > sections['min_thick'][i])):
+            problems.append(f"{label}: no number of layers fits the unit thickness "
+                            f"with the class thicknesses")
+        if sections['min_depth'][i + 1] > np.sum(sections['max_thick'][:i + 1]):
+            problems.append(f"Section {i + 2}: min depth {sections['min_depth'][i + 1]:g} m "
+                            f"is below the thickest possible units above it")
+    return problems
+
+
+class PreviewSession:
+    """
+    Staged preview ensemble of one input file, rendered to an image.
+
+    Args:
+        output_image (str): Image filename; the format follows the extension.
+        Nreals (int): Realizations in the preview ensemble.
+        dmax (float): Maximum depth in meters.
+        dz (float): Depth discretization step in meters.
+        seed (int): Fixed base seed of the preview.
+    """
+
+    def __init__(self, output_image, Nreals=200, dmax=90, dz=1, seed=1):
+        self.output_image = output_image
+        self.Nreals = int(Nreals)
+        self.z_vec = np.arange(dz, dmax + dz, dz)
+        self.seed = int(seed)
+        self._digests = {}
+        self._lithology = None  # (digest, ms, layer_index, tries, failed)
+        self._water = None      # (digest, ws)
+
+    def _seeds(self, stage):
+        """Disjoint seeds of the lithology (0), water (1) and resistivity (2) stages."""
+        start = self.seed + stage * self.Nreals
+        return np.arange(start, start + self.Nreals)
+
+    def _draw_lithology(self, info, is_stale):
+        Nz = len(self.z_vec)
+        ms = layer_index = None
+        tries = np.zeros(self.Nreals, dtype=int)
+        failed = np.zeros(self.Nreals, dtype=bool)
+        for i in range(self.Nreals):
+            if i % _CHECK_EVERY == 0 and is_stale():
+                raise PreviewCancelled()
+            m, li, flag = _lithology_block(i, i + 1, info, self.z_vec, self.seed)
+            if ms is None:
+                ms = np.zeros((self.Nreals, Nz), dtype=m.dtype)
+                layer_index = np.zeros((self.Nreals, Nz), dtype=li.dtype)
+            ms[i], layer_index[i] = m[0], li[0]
+            tries[i], failed[i] = flag[2], flag[0]
+        return ms, layer_index, tries, failed
+
+    def update(self, input_file, is_stale=lambda: False):
+        """
+        Render the preview of the current input file.
+
+        Args:
+            input_file (str): Excel input file.
+            is_stale (callable): Returns True once a newer save exists; the
+                update is then abandoned with PreviewCancelled.
+
+        Returns:
+            dict or None: 'changed' sheets, whether the lithology was 'reused'
+                and the elapsed 'seconds'; None if no sheet changed.
+        """
+        t0 = time.time()
+        tables = read_prior_tables(input_file)
+        digests = {key: _digest(table) for key, table in tables.items()}
+        changed = [SHEETS[k] for k in SHEETS if digests.get(k) != self._digests.get(k)]
+        if self._digests and not changed:
+            return None
+        info, cmaps = prior_info_from_tables(tables)
+
+        lith_digest = digests['Class'] + digests['Unit']
+        reused = self._lithology is not None and self._lithology[0] == lith_digest
+        if not reused:
+            self._lithology = (lith_digest, *self._draw_lithology(info, is_stale))
+        _, ms, layer_index, tries, failed = self._lithology
+
+        water_digest = digests.get('Water')
+        if self._water is None or self._water[0] != water_digest:
+            ws = np.zeros(self.Nreals, dtype=np.float32)
+            if 'Water Level' in info:
+                for k, s in enumerate(self._seeds(1)):
+                    ws[k] = prior_water_reals(info, rng=RealizationRNG(int(s)))
+            self._water = (water_digest, ws)
+        ws = self._water[1]
+
+        if is_stale():
+            raise PreviewCancelled()
+        ns = resample_block(ms, layer_index, ws, info, self.z_vec, self._seeds(2))
+
+        if is_stale():
+            raise PreviewCancelled()
+        self._render(info, cmaps, ms, ns, ws, layer_index, tries, failed)
+        self._digests = digests
+        return {'changed': changed, 'reused': reused, 'seconds': time.time() - t0}
+
+    def _render(self, info, cmaps, ms, ns, ws, layer_index, tries, failed):
+        """Draw the preview figure and replace the output image atomically."""
+        z_vec, n = self.z_vec, self.Nreals
+        names, codes = info['Classes']['names'], info['Classes']['codes']
+        colors = cmaps['Classes']
+        extent = [0.5, n + 0.5, z_vec[-1], z_vec[0]]
+
+        fig = Figure(figsize=(16, 9))
+        # Fixed margins: tight_layout would take most of the update time
+        gs = fig.add_gridspec(2, 4, width_ratios=[2, 2, 1, 1], left=0.05, right=0.98,
+                              bottom=0.07, top=0.9, wspace=0.3, hspace=0.3)
+
+        ax = fig.add_subplot(gs[0, 0:2])
+        im = ax.imshow(ms.T, aspect='auto', extent=extent, interpolation='nearest',
+                       cmap=ListedColormap(colors),
+                       norm=BoundaryNorm(np.arange(0.5, len(codes) + 1.5), len(codes)))
+        cbar = fig.colorbar(im, ax=ax, ticks=codes)
+        cbar.ax.set_yticklabels(names)
+        ax.set_title("Lithostratigraphy")
+        ax.set_ylabel("Depth [m]")
+
+        ax_res = fig.add_subplot(gs[1, 0:2])
+        im = ax_res.imshow(ns.T, aspect='auto', extent=extent, interpolation='nearest',
+                           cmap=ListedColormap(flj_log()), norm=LogNorm(vmin=0.1, vmax=2600))
+        fig.colorbar(im, ax=ax_res, label='Resistivity [Ohm-m]')
+        ax_res.set_title("Resistivity")
+        ax_res.set_xlabel("Realization #")
+        ax_res.set_ylabel("Depth [m]")
+        if 'Water Level' in info:
+            for a in (ax, ax_res):
+                a.hlines(ws, np.arange(n) + 0.5, np.arange(n) + 1.5, colors='k')
+
+        ax = fig.add_subplot(gs[0, 2])
+        left = np.zeros(len(z_vec))
+        for k, code in enumerate(codes):
+            p = np.mean(ms == code, axis=0)
+            ax.fill_betweenx(z_vec, left, left + p, color=colors[k], step='mid')
+            left += p
+        ax.set_xlim(0, 1)
+        ax.set_ylim(z_vec[-1], z_vec[0])
+        ax.set_title("Class proportions")
+        ax.set_xlabel("Proportion")
+
+        ax = fig.add_subplot(gs[0, 3])
+        x = np.linspace(-1, 4, 500)
+        res = info['Resistivity']
+        for k in range(len(codes)):
+            mu = np.log10(res['res'][k])
+            ax.plot(10 ** x, norm.pdf(x, mu, res['res_unc'][k] * mu), color=colors[k])
+            if 'Water Level' in info:
+                mu = np.log10(res['unsat_res'][k])
+                ax.plot(10 ** x, norm.pdf(x, mu, res['unsat_res_unc'][k] * mu),
+                        color=colors[k], linestyle='--')
+        ax.set_xscale('log')
+        ax.set_title("Resistivity distributions")
+        ax.set_xlabel("Resistivity [Ohm-m]")
+
+        ax = fig.add_subplot(gs[1, 2])
+        ax.hist(tries, bins=np.logspace(0, np.log10(MAX_TRIES + 1), 16), color='0.5')
+        ax.set_xscale('log')
+        ax.set_title("Proposals per realization")
+        ax.set_xlabel("Proposals")
+
+        ax = fig.add_subplot(gs[1, 3])
+        ax.axis('off')
+        n_layers = np.array([len(np.unique(row)) for row in layer_index])
+        lines = [f"Acceptance rate: {n / max(tries.sum(), 1):.1%}",
+                 f"Hit the redraw limit: {int(failed.sum())} of {n}",
+                 f"Layers: {n_layers.min()}-{n_layers.max()} (mean {n_layers.mean():.1f})",
+                 ""]
+        problems = feasibility_checks(info)
+        lines += problems if problems else ["No infeasible tables found"]
+        ax.text(0, 1, "\n".join(lines), va='top', fontsize=9, wrap=True,
+                color='firebrick' if problems or failed.any() else 'black')
+        ax.set_title("Feasibility")
+
+        fig.suptitle(f"{n} preview realizations, seed {self.seed}  "
+                     f"({time.strftime('%H:%M:%S')})")
+        root, ext = os.path.splitext(self.output_image)
+        tmp = f"{root}.tmp{ext}"
+        fig.savefig(tmp, dpi=80)
+        os.replace(tmp, self.output_image)
+
+
+def watch_prior(input_file, output_image=None, Nreals=200, dmax=90, dz=1, seed=1,
+                interval=0.25, once=False, progress=None):
+    """
+    Re-render the preview of an input file after every save, until interrupted.
+
+    Args:
+        input_file (str): Excel input file to watch.
+        output_image (str, optional): Preview image (default:
+            {input_base}_preview.png).
+        Nreals (int): Realizations in the preview ensemble.
+        dmax (float): Maximum depth in meters.
+        dz (float): Depth discretization step in meters.
+        seed (int): Fixed base seed of the preview.
+        interval (float): Seconds between checks of the file.
+        once (bool): Render the current version once and return.
+        progress (optional): Sink for status messages, see get_prior_sample.
+
+    Returns:
+        str: The preview image filename.
+
+    Raises:
+        FileNotFoundError: If once is set and input_file does not exist.
+    """
+    reporter = get_progress_reporter(progress)
+    if output_image is None:
+        output_image = f"{os.path.splitext(input_file)[0]}_preview.png"
+    session = PreviewSession(output_image, Nreals, dmax, dz, seed)
+    if not once:
+        reporter.message(f"Watching {input_file}, preview in {output_image} (Ctrl+C to stop)")
+
+    rendered = pending = None
+    try:
+        while True:
+            current = _signature(input_file)
+            if once and current is None:
+                raise FileNotFoundError(f"Input file not found: {input_file}")
+            # Wait one interval for the file to settle: editors write in several steps
+            settled = current == pending or (once and rendered is None)
+            pending = current
+            if current is not None and current != rendered and settled:
+                try:
+                    summary = session.update(
+                        input_file, is_stale=lambda: _signature(input_file) != current)
+                except PreviewCancelled:
+                    continue  # Render the newer save right away
+                except Exception as e:
+                    reporter.warning(f"Could not preview {input_file}: {e}")
+                else:
+                    if summary is not None:
+                        reporter.message(
+                            f"Preview updated in {summary['seconds']:.2f} s "
+                            f"(changed: {', '.join(summary['changed'])}; lithology "
+                            f"{'reused' if summary['reused'] else 'redrawn'})")
+                rendered = current
+                if once:
+                    break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    return output_image
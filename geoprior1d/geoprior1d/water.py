@@ -1,6 +1,9 @@
 import numpy as np
+from .rng import GLOBAL_RNG
 
-def prior_water_reals(info):
+def prior_water_reals(info, rng=GLOBAL_RNG):
   
-    o = np.random.rand() * (info['Water Level']['max'] - info['Water Level']['min']) + info['Water Level']['min']
+    w_min = float(np.ravel(info['Water Level']['min'])[0])
+    w_max = float(np.ravel(info['Water Level']['max'])[0])
+    o = rng.rand(rng.slot('water')) * (w_max - w_min) + w_min
     return o
@@ -0,0 +1,68 @@
+"""Shared fixtures of the test suite (run with python -m pytest)."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "examples", "data")
+
+
+def data_file(name):
+    """Path of an example input file, e.g. data_file('daugaard_standard.xlsx')."""
+    return os.path.join(DATA_DIR, name)
+
+
+def write_input_copy(path, source, edit=None):
+    """
+    Write a copy of an input file, optionally edited.
+
+    Args:
+        path (str): Output .xlsx path.
+        source (str): Input file to copy.
+        edit (callable, optional): edit(tables) modifies the DataFrames,
+            keyed by sheet name, in place.
+    """
+    tables = pd.read_excel(source, sheet_name=None)
+    if edit is not None:
+        edit(tables)
+    with pd.ExcelWriter(path) as writer:
+        for sheet, table in tables.items():
+            table.to_excel(writer, sheet_name=sheet, index=False)
+    return path
+
+
+@pytest.fixture
+def standard_file():
+    return data_file("daugaard_standard.xlsx")
+
+
+@pytest.fixture
+def valley_file():
+    return data_file("daugaard_valley.xlsx")
+
+
+@pytest.fixture
+def z_vec():
+    return np.arange(1, 91, dtype=float)
+
+
+@pytest.fixture
+def standard_info(standard_file):
+    from geoprior1d.io import extract_prior_info
+    return extract_prior_info(standard_file)[0]
+
+
+def add_water_table(tables, min_depth=2.0, max_depth=8.0):
+    """Edit for write_input_copy: add a water table sheet."""
+    tables['Water table'] = pd.DataFrame({'Min depth to water table': [min_depth],
+                                          'Max depth to water table': [max_depth]})
+
+
+@pytest.fixture(scope="session")
+def water_file(tmp_path_factory):
+    """Copy of the standard example with a water table sheet."""
+    path = str(tmp_path_factory.mktemp("inputs") / "standard_water.xlsx")
+    return write_input_copy(path, data_file("daugaard_standard.xlsx"), add_water_table)
@@ -0,0 +1,58 @@
+"""Manifest-driven batch generation (geoprior1d.batch)."""
+
+import json
+
+import h5py
+import numpy as np
+import pytest
+
+from geoprior1d import geoprior1d
+from geoprior1d.batch import load_manifest, run_batch
+
+
+def _manifest(tmp_path, jobs, **defaults):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"defaults": dict({"dmax": 30, "dz": 1}, **defaults),
+                                "jobs": jobs}))
+    return str(path)
+
+
+def test_outputs_match_single_runs(tmp_path, standard_file, valley_file):
+    manifest = _manifest(tmp_path, [
+        {"name": "standard", "input": standard_file, "seed": 3},
+        {"name": "valley", "input": valley_file, "seed": 5, "n_realizations": 7},
+    ], n_realizations=12)
+    results = run_batch(manifest, n_processes=0, progress="silent")
+    assert [r["status"] for r in results] == ["generated", "generated"]
+
+    for result, input_file, Nreals, seed in zip(results, (standard_file, valley_file),
+                                                (12, 7), (3, 5)):
+        single, flags = geoprior1d(input_file, Nreals, 30, 1, n_processes=0, seed=seed,
+                                   progress="silent", output_file=str(tmp_path / "single.h5"))
+        assert result["flags"] == flags
+        with h5py.File(result["output"], 'r') as f, h5py.File(single, 'r') as g:
+            assert f.attrs["Seed"] == seed
+            for key in ('M1', 'M2', 'features/thickness', 'features/tries'):
+                np.testing.assert_array_equal(f[key][:], g[key][:])
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_seeded_jobs_are_skipped_unseeded_regenerated(tmp_path, standard_file):
+    manifest = _manifest(tmp_path, [
+        {"name": "seeded", "input": standard_file, "seed": 1},
+        {"name": "unseeded", "input": standard_file},
+    ], n_realizations=4)
+    first = run_batch(manifest, n_processes=0, progress="silent")
+    with h5py.File(first[1]["output"], 'r') as f:
+        first_seed = int(f.attrs["Seed"])
+
+    second = run_batch(manifest, n_processes=0, progress="silent")
+    assert [r["status"] for r in second] == ["skipped", "generated"]
+    with h5py.File(second[1]["output"], 'r') as f:
+        assert int(f.attrs["Seed"]) != first_seed
+
+
+def test_empty_jobs_are_rejected(tmp_path, standard_file):
+    manifest = _manifest(tmp_path, [{"input": standard_file, "n_realizations": 0}])
+    with pytest.raises(ValueError, match="n_realizations"):
+        load_manifest(manifest)
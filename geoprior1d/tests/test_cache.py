@@ -0,0 +1,63 @@
+"""Content-addressed prior cache (geoprior1d.cache)."""
+
+import os
+import stat
+
+import h5py
+import numpy as np
+
+from geoprior1d import geoprior1d
+from geoprior1d.cache import PriorCache, cache_key
+
+
+def _run(input_file, tmp_path, name, Nreals, cache_dir, seed=4):
+    return geoprior1d(input_file, Nreals, 30, 1, n_processes=0, seed=seed, progress="silent",
+                      output_file=str(tmp_path / name), cache_dir=str(cache_dir))
+
+
+def test_hit_prefix_and_flags(tmp_path, standard_file):
+    cache_dir = tmp_path / "cache"
+    name, flags = _run(standard_file, tmp_path, "full.h5", 30, cache_dir)
+    key = cache_key(standard_file, 30, 1, 4)
+    assert PriorCache(str(cache_dir)).cached_realizations(key) == 30
+
+    # Exact hit: same content and flags
+    hit, hit_flags = _run(standard_file, tmp_path, "hit.h5", 30, cache_dir)
+    assert hit_flags == flags
+    with h5py.File(name, 'r') as f, h5py.File(hit, 'r') as g:
+        np.testing.assert_array_equal(f['M1'][:], g['M1'][:])
+
+    # Prefix: first rows of the cached run, flags of these rows only
+    prefix, prefix_flags = _run(standard_file, tmp_path, "prefix.h5", 12, cache_dir)
+    fresh, fresh_flags = geoprior1d(standard_file, 12, 30, 1, n_processes=0, seed=4,
+                                    progress="silent", output_file=str(tmp_path / "fresh.h5"))
+    assert prefix_flags == fresh_flags
+    with h5py.File(prefix, 'r') as f, h5py.File(fresh, 'r') as g:
+        for key in ('M1', 'M2', 'features/thickness', 'features/tries'):
+            np.testing.assert_array_equal(f[key][:], g[key][:])
+
+
+def test_outputs_stay_writable_and_independent(tmp_path, standard_file):
+    cache_dir = tmp_path / "cache"
+    name, _ = _run(standard_file, tmp_path, "out.h5", 10, cache_dir)
+    assert os.stat(name).st_mode & stat.S_IWUSR
+    hit, _ = _run(standard_file, tmp_path, "hit.h5", 10, cache_dir)
+    assert os.stat(hit).st_mode & stat.S_IWUSR
+
+    # Modifying an output leaves the cache entry intact
+    with h5py.File(hit, 'r+') as f:
+        f['M1'][0] = -1
+    again, _ = _run(standard_file, tmp_path, "again.h5", 10, cache_dir)
+    with h5py.File(again, 'r') as f:
+        assert np.all(f['M1'][0] > 0)
+
+
+def test_eviction(tmp_path, standard_file):
+    cache_dir = tmp_path / "cache"
+    _run(standard_file, tmp_path, "a.h5", 10, cache_dir, seed=1)
+    size = PriorCache(str(cache_dir)).nbytes
+    cache = PriorCache(str(cache_dir), max_bytes=int(size * 1.5))
+    _run(standard_file, tmp_path, "b.h5", 10, cache_dir, seed=2)
+    cache.evict()
+    assert len(cache.entries()) == 1
+    assert cache.cached_realizations(cache_key(standard_file, 30, 1, 2)) == 10
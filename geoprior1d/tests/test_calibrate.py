@@ -0,0 +1,61 @@
+"""SPSA calibration of section frequencies and probabilities (geoprior1d.calibrate)."""
+
+import numpy as np
+
+from geoprior1d.calibrate import (batch_statistics, calibrate_prior, decode_parameters,
+                                  default_parameters, encode_parameters,
+                                  write_calibrated_config)
+from geoprior1d.io import extract_prior_info
+
+Z_VEC = np.arange(1, 31, 1.0)
+
+
+def test_parameter_encoding_round_trip(standard_info):
+    params = default_parameters(standard_info)
+    assert params
+    decoded = decode_parameters(standard_info, params,
+                                encode_parameters(standard_info, params))
+    sections, original = decoded['Sections'], standard_info['Sections']
+    for i in range(original['N_sections']):
+        p = np.asarray(original['probabilities'][i], dtype=float)
+        np.testing.assert_allclose(sections['probabilities'][i], p / p.sum())
+        if 0 < original['frequency'][i] < 1:
+            assert abs(sections['frequency'][i] - original['frequency'][i]) < 1e-12
+
+
+def test_recovers_target_proportions(tmp_path, standard_file, standard_info):
+    params = default_parameters(standard_info)
+    theta = encode_parameters(standard_info, params)
+    signs = np.where(np.arange(len(theta)) % 2, 1.0, -1.0)
+    shifted = decode_parameters(standard_info, params, theta + signs)
+    target, _ = batch_statistics(shifted, Z_VEC, 4000, seed=1)
+
+    output = str(tmp_path / "calibrated.xlsx")
+    calibrated, history = calibrate_prior(standard_file, target, 30, 1, output_file=output,
+                                          n_iter=20, batch_size=100, n_check=1000,
+                                          n_processes=0, seed=2, progress="silent")
+    assert history['final_loss'] < 0.3 * history['initial_loss']
+
+    written, _ = extract_prior_info(output)
+    for i in range(standard_info['Sections']['N_sections']):
+        np.testing.assert_allclose(written['Sections']['frequency'][i],
+                                   calibrated['Sections']['frequency'][i], rtol=1e-12)
+
+
+def test_written_config_keeps_full_precision(tmp_path, standard_file, standard_info):
+    from openpyxl import load_workbook
+
+    params = default_parameters(standard_info)
+    theta = encode_parameters(standard_info, params) + 0.123456789
+    shifted = decode_parameters(standard_info, params, theta)
+    output = write_calibrated_config(standard_file, shifted, str(tmp_path / "out.xlsx"))
+
+    ws = load_workbook(output)['Geology2']
+    header = {cell.value: cell.column for cell in ws[1] if cell.value is not None}
+    sections = shifted['Sections']
+    for i in range(sections['N_sections']):
+        assert ws.cell(row=i + 2, column=header['Frequency']).value == sections['frequency'][i]
+        cell = ws.cell(row=i + 2, column=header['Probabilities']).value
+        probs = np.array([float(p) for p in str(cell).split(",")])
+        np.testing.assert_array_equal(probs, sections['probabilities'][i])
+        assert abs(probs.sum() - 1) < 1e-12
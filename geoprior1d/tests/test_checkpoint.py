@@ -0,0 +1,83 @@
+"""Checkpointed generation with resume (geoprior1d.checkpoint)."""
+
+import h5py
+import numpy as np
+import pytest
+
+from geoprior1d import geoprior1d
+
+from conftest import write_input_copy
+
+
+def _assert_same_prior(a, b):
+    """Same datasets, attributes and feature tables (creation date aside)."""
+    with h5py.File(a, 'r') as f, h5py.File(b, 'r') as g:
+        names = []
+        f.visit(names.append)
+        other = []
+        g.visit(other.append)
+        assert sorted(names) == sorted(other)
+        for name in names:
+            if isinstance(f[name], h5py.Dataset):
+                np.testing.assert_array_equal(f[name][()], g[name][()], err_msg=name)
+            for key, value in f[name].attrs.items():
+                np.testing.assert_array_equal(value, g[name].attrs[key], err_msg=f"{name}:{key}")
+        for key, value in f.attrs.items():
+            if key != "Creation date":
+                np.testing.assert_array_equal(value, g.attrs[key], err_msg=key)
+
+
+class _Interrupt:
+    """Progress sink raising KeyboardInterrupt at the n-th finished block."""
+
+    def __init__(self, n):
+        self.n = n
+
+    def __call__(self, event):
+        if event["event"] == "block":
+            self.n -= 1
+            if self.n == 0:
+                raise KeyboardInterrupt
+
+
+@pytest.fixture
+def clipping_file(tmp_path, standard_file):
+    """Input whose first class exceeds the uint8 range of M1, so values are clipped."""
+    def raise_resistivity(tables):
+        tables['Resistivity'].loc[0, 'Resistivity'] = 5000
+
+    return write_input_copy(str(tmp_path / "clipping.xlsx"), standard_file, raise_resistivity)
+
+
+@pytest.mark.parametrize("encoding", ["float32", "uint8"])
+def test_resume_equals_uninterrupted_run(tmp_path, clipping_file, encoding):
+    kwargs = dict(n_processes=0, seed=11, checkpoint=3600, m1_encoding=encoding,
+                  store_layers=True)
+    plain, plain_flags = geoprior1d(clipping_file, 60, 30, 1, progress="silent",
+                                    output_file=str(tmp_path / "plain.h5"), **kwargs)
+    out = str(tmp_path / "resumed.h5")
+    with pytest.raises(KeyboardInterrupt):
+        geoprior1d(clipping_file, 60, 30, 1, progress=_Interrupt(4), output_file=out, **kwargs)
+    with h5py.File(out, 'r') as f:
+        assert 0 < f['checkpoint'].attrs['n_done'] < 60
+    resumed, resumed_flags = geoprior1d(clipping_file, 60, 30, 1, progress="silent",
+                                        output_file=out, resume=True, **kwargs)
+
+    assert resumed_flags == plain_flags
+    _assert_same_prior(plain, resumed)
+    if encoding != "float32":
+        with h5py.File(plain, 'r') as f:
+            assert f['M1'].attrs['n_clipped'] > 0
+
+
+def test_resume_checks_run(tmp_path, standard_file):
+    out = str(tmp_path / "run.h5")
+    with pytest.raises(KeyboardInterrupt):
+        geoprior1d(standard_file, 40, 30, 1, n_processes=0, seed=1, checkpoint=3600,
+                   progress=_Interrupt(2), output_file=out)
+    with pytest.raises(ValueError, match="different"):
+        geoprior1d(standard_file, 50, 30, 1, n_processes=0, checkpoint=3600, resume=True,
+                   progress="silent", output_file=out)
+    with pytest.raises(ValueError, match="seed"):
+        geoprior1d(standard_file, 40, 30, 1, n_processes=0, seed=2, checkpoint=3600,
+                   resume=True, progress="silent", output_file=out)
@@ -0,0 +1,47 @@
+"""Convergence-driven generation (geoprior1d.convergence)."""
+
+import numpy as np
+import pytest
+
+from geoprior1d import get_prior_sample
+from geoprior1d.convergence import ConvergenceMonitor
+
+Z_VEC = np.arange(1, 31, 1.0)
+
+
+def _run(info, block_size, Nreals=400, **kwargs):
+    kwargs = dict(dict(tol=0.05, patience=2, min_realizations=40, check_every=20), **kwargs)
+    monitor = ConvergenceMonitor.for_prior(info, Z_VEC, max_realizations=Nreals, **kwargs)
+    result = get_prior_sample(info, Z_VEC, Nreals, n_processes=0, seed=2,
+                              block_size=block_size, progress="silent", convergence=monitor)
+    return monitor, result
+
+
+def test_stops_on_convergence_with_the_rows_of_a_full_run(standard_info):
+    monitor, (ms, ns, _, _) = _run(standard_info, 20)
+    assert monitor.stop_reason == "converged"
+    assert 40 <= len(ms) == monitor.n < 400
+
+    full_ms, full_ns, _, _ = get_prior_sample(standard_info, Z_VEC, len(ms), n_processes=0,
+                                              seed=2, progress="silent")
+    np.testing.assert_array_equal(ms, full_ms)
+    np.testing.assert_array_equal(ns, full_ns)
+    assert monitor.trace_arrays()["n_realizations"][-1] == len(ms)
+
+
+@pytest.mark.parametrize("block_size", [7, 50, 130])
+def test_stopping_point_does_not_depend_on_block_size(standard_info, block_size):
+    reference, _ = _run(standard_info, 20)
+    monitor, (ms, *_) = _run(standard_info, block_size)
+    assert monitor.stop_reason == "converged"
+    np.testing.assert_array_equal(monitor.trace_arrays()["n_realizations"],
+                                  reference.trace_arrays()["n_realizations"])
+    # Generation ends with the block containing the converged check
+    converged_at = int(reference.trace_arrays()["n_realizations"][-1])
+    assert converged_at <= len(ms) < converged_at + block_size
+
+
+def test_stops_at_max_realizations(standard_info):
+    monitor, (ms, *_) = _run(standard_info, 10, Nreals=30, tol=1e-9, min_realizations=10)
+    assert monitor.stop_reason == "max_realizations" and not monitor.converged
+    assert len(ms) == 30
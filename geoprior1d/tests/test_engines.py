@@ -0,0 +1,68 @@
+"""Compiled numba engine against the numpy engine (geoprior1d.jit)."""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from conftest import data_file
+
+from geoprior1d import extract_prior_info, get_prior_sample
+
+pytest.importorskip("numba")
+
+N = 2000
+
+
+@pytest.fixture(scope="module")
+def statistics():
+    info, _ = extract_prior_info(data_file("daugaard_standard.xlsx"))
+    z_vec = np.arange(1, 31, 1.0)
+
+    def run(engine, seed):
+        ms, ns, _, flags = get_prior_sample(info, z_vec, N, n_processes=0, seed=seed,
+                                            progress="silent", engine=engine)
+        proportions = np.stack([(ms == c).mean(axis=0) for c in info['Classes']['codes']])
+        return proportions, np.log10(ns).mean(axis=0), flags[2]
+
+    return {(engine, seed): run(engine, seed)
+            for engine in ("numba", "numpy") for seed in (1, 100000)}
+
+
+def _distance(a, b):
+    return [np.abs(x - y).max() for x, y in zip(a, b)]
+
+
+def test_statistics_match_within_the_seed_spread(statistics):
+    # The engines draw different random numbers, so they can only agree in distribution
+    spread = _distance(statistics["numba", 1], statistics["numba", 100000])
+    for seed in (1, 100000):
+        difference = _distance(statistics["numba", seed], statistics["numpy", seed])
+        assert all(d <= 2 * s for d, s in zip(difference, spread)), (difference, spread)
+
+
+def test_numba_runs_are_reproducible(standard_info):
+    z_vec = np.arange(1, 31, 1.0)
+    a = get_prior_sample(standard_info, z_vec, 20, n_processes=0, seed=5, progress="silent",
+                         engine="numba", block_size=20)
+    b = get_prior_sample(standard_info, z_vec, 20, n_processes=0, seed=5, progress="silent",
+                         engine="numba", block_size=3)
+    for x, y in zip(a[:3], b[:3]):
+        np.testing.assert_array_equal(x, y)
+
+
+def test_process_pools_after_numba_exit_cleanly(standard_file):
+    # Forking after numba's threads have started used to hang the interpreter at exit
+    script = (
+        "import numpy as np\n"
+        "from geoprior1d import extract_prior_info, get_prior_sample\n"
+        f"info, _ = extract_prior_info({standard_file!r})\n"
+        "z_vec = np.arange(1, 31, 1.0)\n"
+        "get_prior_sample(info, z_vec, 8, n_processes=0, seed=1, progress='silent', "
+        "engine='numba')\n"
+        "get_prior_sample(info, z_vec, 8, n_processes=2, seed=1, progress='silent')\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], timeout=120,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.returncode == 0
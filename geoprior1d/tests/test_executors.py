@@ -0,0 +1,43 @@
+"""Execution backends (geoprior1d.executors)."""
+
+import numpy as np
+import pytest
+
+from geoprior1d import get_prior_sample
+from geoprior1d.executors import SequentialExecutor, open_executor
+
+Z_VEC = np.arange(1, 31, 1.0)
+
+
+@pytest.fixture
+def reference(standard_info):
+    return get_prior_sample(standard_info, Z_VEC, 12, n_processes=0, seed=8, progress="silent")
+
+
+def _assert_same(a, b):
+    for x, y in zip(a[:3], b[:3]):
+        np.testing.assert_array_equal(x, y)
+    assert a[3] == b[3]
+
+
+@pytest.mark.parametrize("executor", ["process", "thread", "sequential"])
+def test_backends_give_identical_results(standard_info, reference, executor):
+    result = get_prior_sample(standard_info, Z_VEC, 12, n_processes=2, seed=8, block_size=5,
+                              executor=executor, progress="silent")
+    _assert_same(result, reference)
+
+
+def test_executor_instances_are_left_running(standard_info, reference):
+    pool = SequentialExecutor()
+    with open_executor(pool, 2) as used:
+        assert used is pool
+    result = get_prior_sample(standard_info, Z_VEC, 12, n_processes=2, seed=8, block_size=5,
+                              executor=pool, progress="silent")
+    _assert_same(result, reference)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown executor"):
+        with open_executor("cluster", 2):
+            pass
+
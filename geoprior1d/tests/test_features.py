@@ -0,0 +1,35 @@
+"""Per-realization feature tables and queries (geoprior1d.features)."""
+
+import h5py
+import numpy as np
+import pytest
+from conftest import data_file
+
+from geoprior1d import geoprior1d, query_prior, read_features
+
+
+@pytest.fixture(scope="module")
+def prior_file(tmp_path_factory):
+    out = tmp_path_factory.mktemp("features") / "prior.h5"
+    return geoprior1d(data_file("daugaard_standard.xlsx"), 40, 30, 1, n_processes=0, seed=6,
+                      progress="silent", output_file=str(out))[0]
+
+
+def test_features_agree_with_the_realizations(prior_file):
+    table = read_features(prior_file)
+    with h5py.File(prior_file, 'r') as f:
+        M2 = f['M2'][:]
+    assert len(table) == len(M2)
+    np.testing.assert_array_equal(table["top_class"], M2[:, 0])
+
+    thick = table[[c for c in table.columns if c.startswith("thick_")]].to_numpy()
+    np.testing.assert_allclose(thick.sum(axis=1), 30)
+    assert (table["n_layers"] >= 1 + (np.diff(M2, axis=1) != 0).sum(axis=1)).all()
+
+
+def test_query_matches_pandas_in_chunks(prior_file):
+    table = read_features(prior_file)
+    column = next(c for c in table.columns if c.startswith("thick_") and table[c].any())
+    expr = f"{column} > {table[column].median()} and n_layers > 3"
+    expected = table.query(expr).index.to_numpy()
+    np.testing.assert_array_equal(query_prior(prior_file, expr, chunk_size=7), expected)
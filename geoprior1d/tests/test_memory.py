@@ -0,0 +1,53 @@
+"""Memory estimation and budget-driven block sizing (geoprior1d.memory)."""
+
+import pytest
+
+from geoprior1d import geoprior1d, estimate_memory
+from geoprior1d.memory import parse_memory_size, choose_block_size
+
+
+def test_parse_memory_size():
+    assert parse_memory_size(4096) == 4096
+    assert parse_memory_size("512M") == 512 * 1024 ** 2
+    assert parse_memory_size("1.5GB") == int(1.5 * 1024 ** 3)
+    with pytest.raises(ValueError):
+        parse_memory_size("lots")
+
+
+def test_breakdown_counts_features_layers_and_temporaries():
+    base = estimate_memory(1000, 90, 1, features=False)
+    full = estimate_memory(1000, 90, 1)
+    layers = estimate_memory(1000, 90, 1, store_layers=True)
+    # depth_to_class and thickness (float32 per class), 3 int16 and water level
+    assert full["per_realization"] - base["per_realization"] == 3 * 2 + 2 * 8 * 4 + 4
+    assert layers["per_realization"] - full["per_realization"] == 90 * 2
+    assert full["temporaries"] >= 4 * 8 * 90 * 1000
+    assert full["in_flight"] > full["block"] * 6
+    streamed = estimate_memory(1000, 90, 1, streamed=True)
+    assert streamed["output"] == 0 and streamed["total"] == streamed["in_flight"]
+
+
+def test_block_size_fits_budget():
+    est = estimate_memory(10000, 90, 1, n_workers=4, block_size=1)
+    assert choose_block_size(est["output"] + 10 * est["in_flight"], 10000, 90, 1,
+                             n_workers=4) == 10
+    with pytest.raises(MemoryError):
+        choose_block_size(est["output"], 10000, 90, 1, n_workers=4)
+
+
+@pytest.mark.parametrize("mode", ["checkpoint", "mixture"])
+def test_streamed_runs_use_budget(tmp_path, standard_file, valley_file, mode):
+    est = estimate_memory(40, 30, 1, n_workers=1, block_size=1, streamed=True)
+    kwargs = dict(checkpoint=60) if mode == "checkpoint" else dict(weights=[1, 1])
+    input_data = standard_file if mode == "checkpoint" else [standard_file, valley_file]
+    events = []
+    geoprior1d(input_data, 40, 30, 1, n_processes=0, seed=2, progress=events.append,
+               output_file=str(tmp_path / "budget.h5"), max_memory=est["in_flight"],
+               **kwargs)
+    sizes = [e["block_size"] for e in events if e["event"] == "block"]
+    assert sum(sizes) == 40 and max(sizes) == 1  # default blocks hold 2
+
+    with pytest.raises(MemoryError):
+        geoprior1d(input_data, 40, 30, 1, n_processes=0, seed=2, progress="silent",
+                   output_file=str(tmp_path / "small.h5"), max_memory=est["in_flight"] // 2,
+                   **kwargs)
@@ -0,0 +1,51 @@
+"""Scenario-mixture priors (geoprior1d.mixture)."""
+
+import h5py
+import numpy as np
+
+from geoprior1d import geoprior1d
+from geoprior1d.cli import main
+from geoprior1d.mixture import allocate_realizations
+
+from conftest import write_input_copy
+
+
+def test_allocation_sums_to_total():
+    counts = allocate_realizations([0.7, 0.2, 0.1], 101)
+    assert counts.sum() == 101
+    assert list(counts) == [71, 20, 10]
+
+
+def test_mixture_with_differing_class_sets(tmp_path, standard_file, valley_file):
+    def rename_till(tables):
+        tables['Geology1']['Class'] = tables['Geology1']['Class'].replace('Till', 'Clay till')
+
+    renamed = write_input_copy(str(tmp_path / "valley_clay_till.xlsx"), valley_file, rename_till)
+    name, flags = geoprior1d([standard_file, renamed], 40, 30, 1, weights=[0.5, 0.5],
+                             n_processes=0, seed=3, output_file=str(tmp_path / "mix.h5"),
+                             progress="silent")
+
+    with h5py.File(name, 'r') as f:
+        names = [n.decode() for n in f['M2'].attrs['class_name']]
+        assert len(names) == 9 and 'Clay till' in names and 'Till' in names
+        assert f['features/thickness'].shape == (40, 9)
+        assert f['features/depth_to_class'].shape == (40, 9)
+        M2, M4 = f['M2'][:], f['M4'][:, 0]
+        assert set(np.unique(M4)) == {1, 2}
+        # Each scenario only uses its own classes in the unified code space
+        assert not np.any(M2[M4 == 1] == names.index('Clay till') + 1)
+        assert not np.any(M2[M4 == 2] == names.index('Till') + 1)
+        # Thicknesses cover the column
+        np.testing.assert_allclose(f['features/thickness'][:].sum(axis=1), 30, rtol=1e-5)
+
+
+def test_cache_environment_does_not_block_mixtures(tmp_path, monkeypatch, standard_file,
+                                                   valley_file):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("GEOPRIOR1D_CACHE", str(cache_dir))
+    out = str(tmp_path / "mix.h5")
+    main([standard_file, valley_file, "--weights", "0.5", "0.5", "-n", "10", "-d", "30",
+          "--seed", "1", "-j", "0", "--progress", "silent", "-o", out])
+    with h5py.File(out, 'r') as f:
+        assert f['M2'].shape == (10, 30)
+    assert not cache_dir.exists() or not any(cache_dir.iterdir())
@@ -0,0 +1,22 @@
+"""Persistent, pre-initialized sampler (geoprior1d.sampling.PriorSampler)."""
+
+import numpy as np
+import pytest
+
+from geoprior1d import PriorSampler, get_prior_sample
+
+Z_VEC = np.arange(1, 31, 1.0)
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_samples_match_get_prior_sample(standard_info, executor):
+    expected = [get_prior_sample(standard_info, Z_VEC, 12, n_processes=0, seed=seed,
+                                 progress="silent") for seed in (8, 9)]
+    with PriorSampler(standard_info, Z_VEC, n_workers=2, executor=executor) as prior:
+        # The pool is reused across calls, with any block size
+        results = [prior.sample(12, seed=8, progress="silent"),
+                   prior.sample(12, seed=9, progress="silent", block_size=3)]
+    for result, reference in zip(results, expected):
+        for x, y in zip(result[:3], reference[:3]):
+            np.testing.assert_array_equal(x, y)
+        assert result[3] == reference[3]
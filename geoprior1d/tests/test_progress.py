@@ -0,0 +1,39 @@
+"""Progress events and sinks (geoprior1d.progress)."""
+
+import json
+
+import numpy as np
+import pytest
+
+from geoprior1d import get_prior_sample
+from geoprior1d.progress import JsonLinesProgress, get_progress_reporter
+
+Z_VEC = np.arange(1, 31, 1.0)
+
+
+def test_callback_receives_every_block(standard_info):
+    events = []
+    *_, flags = get_prior_sample(standard_info, Z_VEC, 17, n_processes=0, seed=1,
+                                 block_size=5, progress=events.append)
+    assert events[0]["event"] == "start" and events[0]["total"] == 17
+    assert events[-1]["event"] == "finish" and events[-1]["done"] == 17
+
+    blocks = [e for e in events if e["event"] == "block"]
+    assert [e["block_size"] for e in blocks] == [5, 5, 5, 2]
+    assert [e["done"] for e in blocks] == [5, 10, 15, 17]
+    assert events[-1]["mean_tries"] == pytest.approx(flags[2])
+
+
+def test_jsonl_sink_writes_one_object_per_event(tmp_path, standard_info):
+    log = tmp_path / "progress.jsonl"
+    reporter = JsonLinesProgress(str(log))
+    get_prior_sample(standard_info, Z_VEC, 6, n_processes=0, seed=1, block_size=3,
+                     progress=reporter)
+    reporter.close()
+    events = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [e["event"] for e in events] == ["start", "block", "block", "finish"]
+
+
+def test_unknown_sink_is_rejected():
+    with pytest.raises(ValueError, match="Unknown progress sink"):
+        get_progress_reporter("verbose")
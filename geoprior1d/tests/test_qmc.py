@@ -0,0 +1,32 @@
+"""Quasi-Monte Carlo point sets (geoprior1d.rng.qmc_points)."""
+
+import h5py
+import numpy as np
+import pytest
+
+from geoprior1d import geoprior1d
+from geoprior1d.rng import qmc_points
+
+
+@pytest.mark.parametrize("sampler", ["sobol", "lhs"])
+def test_blocks_are_rows_of_the_full_set(sampler):
+    full = qmc_points(sampler, 5, 0, 64, 64, seed=2)
+    blocks = np.vstack([qmc_points(sampler, 5, b, min(b + 24, 64), 64, seed=2)
+                        for b in range(0, 64, 24)])
+    np.testing.assert_array_equal(blocks, full)
+    assert full.shape == (64, 5) and 0 <= full.min() and full.max() < 1
+
+
+def test_lhs_is_stratified():
+    points = qmc_points("lhs", 3, 0, 50, 50, seed=1)
+    for column in points.T:
+        assert sorted(np.floor(column * 50).astype(int)) == list(range(50))
+
+
+def test_sobol_run_is_reproducible(tmp_path, standard_file):
+    names = [geoprior1d(standard_file, 16, 30, 1, n_processes=0, seed=7, sampler="sobol",
+                        progress="silent", output_file=str(tmp_path / f"{k}.h5"))[0]
+             for k in range(2)]
+    with h5py.File(names[0], 'r') as f, h5py.File(names[1], 'r') as g:
+        np.testing.assert_array_equal(f['M1'][:], g['M1'][:])
+        np.testing.assert_array_equal(f['M2'][:], g['M2'][:])
@@ -0,0 +1,42 @@
+"""Quantized log10 storage of M1 (geoprior1d.quantize)."""
+
+import h5py
+import numpy as np
+import pytest
+
+from geoprior1d import PriorFile, geoprior1d
+from geoprior1d.quantize import (DEFAULT_RANGE, decode, encode, encoding_attrs, error_bound,
+                                 read_m1)
+
+
+@pytest.mark.parametrize("encoding", ["uint16", "uint8"])
+def test_round_trip_within_error_bound(encoding):
+    rng = np.random.default_rng(0)
+    rho = 10 ** rng.uniform(np.log10(DEFAULT_RANGE[0]), np.log10(DEFAULT_RANGE[1]), 100000)
+    attrs = encoding_attrs(encoding)
+    codes, n_clipped = encode(rho, attrs)
+    assert codes.dtype == np.dtype(encoding) and n_clipped == 0
+
+    relative = np.abs(decode(codes, attrs) / rho - 1)
+    assert relative.max() <= error_bound(encoding) + 1e-6  # float32 rounding
+    assert relative.max() > error_bound(encoding) / 2  # The bound is tight
+
+
+def test_values_outside_the_range_are_clipped_and_counted():
+    attrs = encoding_attrs("uint16")
+    codes, n_clipped = encode([0.01, 1.0, 1e5], attrs)
+    assert n_clipped == 2
+    np.testing.assert_allclose(decode(codes, attrs)[[0, 2]], DEFAULT_RANGE, rtol=1e-6)
+
+
+def test_encoded_file_reads_like_float32(tmp_path, standard_file):
+    names = {enc: geoprior1d(standard_file, 10, 30, 1, n_processes=0, seed=2, progress="silent",
+                             output_file=str(tmp_path / f"{enc}.h5"), m1_encoding=enc)[0]
+             for enc in ("float32", "uint16")}
+    with h5py.File(names["float32"], 'r') as f, h5py.File(names["uint16"], 'r') as g:
+        assert g['M1'].dtype == np.uint16
+        np.testing.assert_array_equal(f['M2'][:], g['M2'][:])
+        np.testing.assert_allclose(read_m1(g['M1']), f['M1'][:],
+                                   rtol=error_bound("uint16") + 1e-6)
+    with PriorFile(names["uint16"]) as pf:
+        assert pf.M1[3:5].dtype == np.float32
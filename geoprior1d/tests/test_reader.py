@@ -0,0 +1,84 @@
+"""Lazy prior reader (geoprior1d.reader)."""
+
+import h5py
+import numpy as np
+import pytest
+
+from geoprior1d import geoprior1d
+from geoprior1d.reader import PriorFile
+
+from conftest import data_file
+
+
+@pytest.fixture(scope="module")
+def prior_file(tmp_path_factory, water_file):
+    path = str(tmp_path_factory.mktemp("reader") / "prior.h5")
+    geoprior1d(water_file, 50, 30, 1, n_processes=0, seed=7,
+               output_file=path, progress="silent")
+    return path
+
+
+KEYS = [
+    5, -1, slice(None), slice(3, 17), slice(10, 10), slice(2, 40, 3), slice(None, None, -1),
+    [4, 0, 33, 4], np.arange(50) % 3 == 0, (slice(5, 20), 0), (7, slice(0, 1)),
+]
+
+
+@pytest.mark.parametrize("key", KEYS, ids=repr)
+@pytest.mark.parametrize("name", ["M1", "M2", "M3", "features/thickness"])
+def test_indexing_matches_h5py(prior_file, name, key):
+    with h5py.File(prior_file, 'r') as f, PriorFile(prior_file, chunk_rows=7) as pf:
+        if isinstance(key, list):
+            expected = f[name][:][key]  # h5py needs increasing indices
+        elif isinstance(key, slice) and key.step is not None and key.step < 0:
+            expected = f[name][:][key]  # h5py has no negative steps
+        else:
+            expected = f[name][key]
+        np.testing.assert_array_equal(pf.dataset(name)[key], expected)
+
+
+def test_read_and_batches(prior_file):
+    with h5py.File(prior_file, 'r') as f, PriorFile(prior_file, chunk_rows=8) as pf:
+        idx = np.array([49, 0, 17, 17, 8])
+        batch = pf.read(idx, names=["M1", "M2"])
+        np.testing.assert_array_equal(batch["M2"], f["M2"][:][idx])
+        seen = np.concatenate([i for i, _ in pf.iter_batches(batch_size=12)])
+        np.testing.assert_array_equal(seen, np.arange(50))
+
+
+def test_returned_arrays_do_not_alias_cache(prior_file):
+    with PriorFile(prior_file, chunk_rows=16) as pf:
+        expected = pf.M1[0:10].copy()
+        a = pf.M1[0:10]
+        a *= 0
+        b = pf.M1[3]
+        b[:] = -1
+        np.testing.assert_array_equal(pf.M1[0:10], expected)
+        assert pf.cache.hits > 0
+
+
+def test_quantized_m1_is_decoded(tmp_path):
+    path = str(tmp_path / "q.h5")
+    geoprior1d(data_file("daugaard_standard.xlsx"), 20, 30, 1, n_processes=0, seed=7,
+               output_file=path, progress="silent", m1_encoding="uint16")
+    ref = str(tmp_path / "f.h5")
+    geoprior1d(data_file("daugaard_standard.xlsx"), 20, 30, 1, n_processes=0, seed=7,
+               output_file=ref, progress="silent")
+    with PriorFile(path) as pq, PriorFile(ref) as pf:
+        assert pq.M1.dtype == np.float32
+        np.testing.assert_allclose(pq.M1[:], pf.M1[:], rtol=1e-4)
+        np.testing.assert_array_equal(pq.M2[:], pf.M2[:])
+
+
+def test_scattered_rows_bypass_the_cache(prior_file):
+    with h5py.File(prior_file, 'r') as f, PriorFile(prior_file, chunk_rows=8) as pf:
+        idx = np.array([41, 3, 25, 41, 12])
+        np.testing.assert_array_equal(pf.M2.take(idx), f["M2"][:][idx])
+        assert pf.cache.misses == 0 and pf.cache.nbytes == 0
+
+        # Several rows of chunk 0: that chunk is cached, row 25 is read directly
+        idx = np.array([1, 25, 6])
+        np.testing.assert_array_equal(pf.M2.take(idx), f["M2"][:][idx])
+        assert pf.cache.misses == 1
+        np.testing.assert_array_equal(pf.M2.take([2]), f["M2"][2:3])
+        assert pf.cache.hits == 1
@@ -0,0 +1,50 @@
+"""Resistivity-only resampling of a stored lithology ensemble (geoprior1d.resample)."""
+
+import h5py
+import numpy as np
+import pytest
+from conftest import write_input_copy
+
+from geoprior1d import geoprior1d
+from geoprior1d.resample import resample_resistivity
+
+
+def _generate(tmp_path, source, store_layers=True):
+    return geoprior1d(source, 15, 30, 1, n_processes=0, seed=3, progress="silent",
+                      output_file=str(tmp_path / "prior.h5"), store_layers=store_layers)[0]
+
+
+def test_lithology_is_kept_and_chunks_do_not_matter(tmp_path, standard_file):
+    prior = _generate(tmp_path, standard_file)
+    names = [resample_resistivity(prior, standard_file, str(tmp_path / f"new{k}.h5"), seed=11,
+                                  chunk_size=size, n_processes=0, progress="silent")
+             for k, size in enumerate((100, 4))]
+    with h5py.File(prior, 'r') as f, h5py.File(names[0], 'r') as g, h5py.File(names[1], 'r') as h:
+        np.testing.assert_array_equal(g['M2'][:], f['M2'][:])
+        np.testing.assert_array_equal(g['M1'][:], h['M1'][:])
+        assert not np.array_equal(g['M1'][:], f['M1'][:])
+
+        # One value per layer, as in generation without texture
+        same_layer = np.diff(f['features/layer_index'][:], axis=1) == 0
+        assert (np.diff(g['M1'][:], axis=1)[same_layer] == 0).all()
+        assert g.attrs["Resample seed"] == 11
+
+
+def test_new_configuration_is_applied(tmp_path, standard_file):
+    prior = _generate(tmp_path, standard_file)
+
+    def edit(tables):
+        tables['Resistivity']['Depth trend'] = 0.02
+    config = write_input_copy(str(tmp_path / "trend.xlsx"), standard_file, edit)
+    name = resample_resistivity(prior, config, seed=1, n_processes=0, progress="silent")
+    with h5py.File(prior, 'r') as f, h5py.File(name, 'r') as g:
+        same_layer = np.diff(f['features/layer_index'][:], axis=1) == 0
+        steps = np.diff(np.log10(g['M1'][:].astype(float)), axis=1)
+        np.testing.assert_allclose(steps[same_layer], 0.02, atol=1e-6)
+        assert "Depth trend" in g.attrs["Resistivity headers"]
+
+
+def test_requires_stored_layers(tmp_path, standard_file):
+    prior = _generate(tmp_path, standard_file, store_layers=False)
+    with pytest.raises(ValueError, match="store_layers"):
+        resample_resistivity(prior, standard_file, n_processes=0, progress="silent")
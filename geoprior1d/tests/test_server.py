@@ -0,0 +1,66 @@
+"""Warm sampling server and client (geoprior1d.server)."""
+
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from geoprior1d import extract_prior_info, get_prior_sample
+from geoprior1d.server import PriorClient, PriorServer, _UnixHTTPConnection
+
+
+@pytest.fixture
+def server_address(tmp_path):
+    address = str(tmp_path / "prior.sock")
+    server = PriorServer(address, n_workers=0, block_size=4)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield address
+    server.shutdown()
+    thread.join(timeout=10)
+
+
+@pytest.mark.parametrize("transport", ["npy", "shm"])
+def test_rows_match_a_full_run(server_address, standard_file, transport):
+    info, _ = extract_prior_info(standard_file)
+    z_vec = np.arange(1, 31, 1.0)
+    ms, ns, os_, _ = get_prior_sample(info, z_vec, 12, n_processes=0, seed=3,
+                                      progress="silent")
+
+    client = PriorClient(server_address, timeout=60)
+    bm, bn, bo, flags = client.sample(standard_file, start=5, stop=12, seed=3, dmax=30, dz=1)
+    np.testing.assert_array_equal(bm, ms[5:12])
+    np.testing.assert_array_equal(bn, ns[5:12])
+    np.testing.assert_array_equal(bo, os_[5:12])
+    assert len(flags) == 3
+
+    status = client.status()
+    assert status["realizations_served"] == 7
+    assert [c["dmax"] for c in status["configs"]] == [30]
+
+
+def test_empty_range_has_the_dtypes_of_a_full_run(server_address, standard_file):
+    info, _ = extract_prior_info(standard_file)
+    ms, ns, os_, _ = get_prior_sample(info, np.arange(1, 31, 1.0), 2, n_processes=0,
+                                      seed=3, progress="silent")
+    bm, bn, bo, _ = PriorClient(server_address, timeout=60).sample(
+        standard_file, start=4, stop=4, seed=3, dmax=30, dz=1)
+    assert bm.shape == (0, 30) and bn.shape == (0, 30) and bo.shape == (0,)
+    assert (bm.dtype, bn.dtype, bo.dtype) == (ms.dtype, ns.dtype, os_.dtype)
+
+
+def test_unexpected_errors_are_server_errors(server_address, standard_file, monkeypatch):
+    def fail(*args, **kwargs):
+        raise ZeroDivisionError("boom")
+
+    monkeypatch.setattr(PriorServer, "sample", fail)
+    conn = _UnixHTTPConnection(server_address, timeout=60)
+    conn.request("POST", "/sample", body=json.dumps({"config": standard_file, "stop": 2}))
+    assert conn.getresponse().status == 500
+    conn.close()
+
+    client = PriorClient(server_address, timeout=60)
+    with pytest.raises(RuntimeError, match="ZeroDivisionError: boom"):
+        client.sample(standard_file, n=2, dmax=30, dz=1)
+    assert client.status()["realizations_served"] == 0
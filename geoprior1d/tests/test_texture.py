@@ -0,0 +1,50 @@
+"""Depth trends and within-layer fluctuations of resistivity (geoprior1d.resistivity)."""
+
+import h5py
+import numpy as np
+from conftest import write_input_copy
+
+from geoprior1d import geoprior1d, get_prior_sample
+from geoprior1d.io import extract_prior_info
+from geoprior1d.resistivity import gaussian_fields
+
+Z_VEC = np.arange(1, 31, 1.0)
+
+
+def _texture_file(tmp_path, source, **columns):
+    def edit(tables):
+        for column, value in columns.items():
+            tables['Resistivity'][column] = value
+    return write_input_copy(str(tmp_path / "texture.xlsx"), source, edit)
+
+
+def test_gaussian_fields_statistics_and_row_independence():
+    fields = gaussian_fields(np.arange(4000), 40, 1.0, [5.0])[0]
+    assert abs(fields.var() - 1) < 0.05
+    lag5 = np.mean(fields[:, :-5] * fields[:, 5:])
+    assert abs(lag5 - np.exp(-1)) < 0.05
+    np.testing.assert_array_equal(gaussian_fields([7], 40, 1.0, [5.0])[0, 0], fields[7])
+
+
+def test_depth_trend_within_layers(tmp_path, standard_file):
+    source = _texture_file(tmp_path, standard_file, **{"Depth trend": 0.01})
+    name, _ = geoprior1d(source, 20, 30, 1, n_processes=0, seed=1, progress="silent",
+                         output_file=str(tmp_path / "trend.h5"), store_layers=True)
+    with h5py.File(name, 'r') as f:
+        same_layer = np.diff(f['features/layer_index'][:], axis=1) == 0
+        steps = np.diff(np.log10(f['M1'][:].astype(float)), axis=1)
+    np.testing.assert_allclose(steps[same_layer], 0.01, atol=1e-6)
+
+
+def test_fluctuations_do_not_depend_on_blocks(tmp_path, standard_file):
+    source = _texture_file(tmp_path, standard_file, **{"Within-layer uncertainty": 1.5,
+                                                       "Correlation length": 3.0})
+    info, _ = extract_prior_info(source)
+    a = get_prior_sample(info, Z_VEC, 10, n_processes=0, seed=4, progress="silent")
+    b = get_prior_sample(info, Z_VEC, 10, n_processes=0, seed=4, progress="silent",
+                         block_size=3)
+    np.testing.assert_array_equal(a[1], b[1])
+    plain = get_prior_sample(extract_prior_info(standard_file)[0], Z_VEC, 10, n_processes=0,
+                             seed=4, progress="silent")
+    np.testing.assert_array_equal(a[0], plain[0])
+    assert not np.array_equal(a[1], plain[1])
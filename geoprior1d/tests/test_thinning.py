@@ -0,0 +1,43 @@
+"""Representative sub-sampling of prior files (geoprior1d.thinning)."""
+
+import h5py
+import numpy as np
+import pytest
+
+from geoprior1d import geoprior1d
+from geoprior1d.thinning import select_realizations, thin_prior, THINNING_METHODS
+
+
+@pytest.mark.parametrize("method", THINNING_METHODS)
+def test_selection_weights(method):
+    X = np.random.default_rng(0).normal(size=(500, 4))
+    indices, weights = select_realizations(X, 40, method=method, seed=1)
+    assert len(indices) == 40 and np.all(np.diff(indices) > 0)
+    np.testing.assert_allclose(weights.sum(), 1)
+    assert np.all(weights > 0)
+
+
+def test_kmedoids_fill_up_weights_are_shares():
+    # Three distinct points: most of the 10 clusters end up empty
+    X = np.repeat(np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]]), [50, 30, 20], axis=0)
+    indices, weights = select_realizations(X, 10, method="kmedoids", seed=3)
+    assert len(indices) == 10
+    counts = weights * len(X)
+    np.testing.assert_allclose(counts, np.round(counts), atol=1e-9)
+    assert round(counts.sum()) == len(X)
+    # The representatives of each group share that group's size
+    for group, size in zip(([0.0, 0.0], [10.0, 0.0], [0.0, 10.0]), (50, 30, 20)):
+        members = np.all(X[indices] == group, axis=1)
+        assert round(counts[members].sum()) == size
+
+
+def test_thin_prior_writes_subset(tmp_path, standard_file):
+    source, _ = geoprior1d(standard_file, 200, 30, 1, n_processes=0, seed=5, progress="silent",
+                           output_file=str(tmp_path / "source.h5"))
+    name, indices = thin_prior(source, 25, method="stratified", seed=2,
+                               output_file=str(tmp_path / "thin.h5"))
+    with h5py.File(source, 'r') as f, h5py.File(name, 'r') as g:
+        np.testing.assert_array_equal(g['thinning/source_index'][:], indices)
+        np.testing.assert_allclose(g['thinning/weight'][:].sum(), 1)
+        np.testing.assert_array_equal(g['M2'][:], f['M2'][:][indices])
+        np.testing.assert_array_equal(g['features/n_layers'][:], f['features/n_layers'][:][indices])
@@ -0,0 +1,76 @@
+"""Markov transition matrices of section layer types (geoprior1d.lithology)."""
+
+import numpy as np
+import pytest
+
+from geoprior1d import generate_prior_realizations, get_prior_sample
+from geoprior1d.io import extract_prior_info, parse_transitions
+from geoprior1d.lithology import _markov_chain, sample_markov_chains, section_transitions
+from geoprior1d.sampling import _lithology_block
+
+from conftest import write_input_copy
+
+
+def test_parse_transitions_normalizes_rows():
+    T = parse_transitions("0,2,2; 1,0,3; 1,1,0", 3)
+    np.testing.assert_allclose(T.sum(axis=1), 1)
+    np.testing.assert_allclose(T[0], [0, 0.5, 0.5])
+    assert parse_transitions(float('nan'), 3) is None
+    with pytest.raises(ValueError):
+        parse_transitions("1,0; 0,1", 3)
+
+
+def test_repeat_rule_as_transition_matrix(standard_info):
+    # Section 2 of the example (classes 6,7) has Repeat = 0: no self-transitions
+    np.testing.assert_array_equal(np.diag(section_transitions(standard_info, 2)), 0)
+    # Section 1 has Repeat = 1: every row equals the type probabilities
+    T = section_transitions(standard_info, 1)
+    np.testing.assert_allclose(T, np.tile(standard_info['Sections']['probabilities'][1], (4, 1)))
+
+
+def test_chain_frequencies_follow_matrix():
+    T = np.array([[0, 0.8, 0.2], [0.5, 0, 0.5], [0.9, 0.1, 0]])
+    cum_initial, cum_rows = [1 / 3, 2 / 3, 1.0], np.cumsum(T, axis=1).tolist()
+    u = np.random.default_rng(0).random((2000, 20))
+    counts = np.zeros((3, 3))
+    for row in u:
+        states = _markov_chain(cum_initial, cum_rows, row)
+        np.add.at(counts, (states[:-1], states[1:]), 1)
+    np.testing.assert_allclose(counts / counts.sum(axis=1, keepdims=True), T, atol=0.02)
+
+
+def test_batched_chains_equal_single_chains():
+    T = np.array([[0, 0.8, 0.2], [0.5, 0, 0.5], [0.9, 0.1, 0]])
+    cum_initial, cum_rows = [0.2, 0.7, 1.0], np.cumsum(T, axis=1)
+    u = np.random.default_rng(1).random((300, 12))
+    states = sample_markov_chains(cum_initial, cum_rows, u)
+    for row, chain in zip(u, states):
+        assert list(chain) == _markov_chain(cum_initial, cum_rows.tolist(), row)
+
+
+def _cycle_info(tmp_path, standard_file):
+    # Section 1 (classes 2,3,4,5) as a deterministic cycle 2 -> 3 -> 4 -> 5 -> 2
+    def add_cycle(tables):
+        cycle = "0,1,0,0; 0,0,1,0; 0,0,0,1; 1,0,0,0"
+        tables['Geology2']['Transitions'] = [None, cycle, None, None]
+
+    return extract_prior_info(write_input_copy(str(tmp_path / "cycle.xlsx"),
+                                               standard_file, add_cycle))[0]
+
+
+def test_batched_chains_do_not_depend_on_blocks(tmp_path, standard_file, z_vec):
+    info = _cycle_info(tmp_path, standard_file)
+    M2 = [get_prior_sample(info, z_vec, 30, n_processes=0, seed=4, block_size=size,
+                           progress="silent")[0] for size in (30, 4)]
+    np.testing.assert_array_equal(M2[0], M2[1])
+    # Lithology-only blocks give the same rows
+    np.testing.assert_array_equal(_lithology_block(10, 17, info, z_vec, 4)[0], M2[0][10:17])
+
+
+def test_generated_layers_follow_cycle(tmp_path, standard_file, z_vec):
+    info = _cycle_info(tmp_path, standard_file)
+    M2 = generate_prior_realizations(info, z_vec, 200, n_processes=0, seed=1)[0]
+    above, below = M2[:, :-1], M2[:, 1:]
+    within = (above != below) & np.isin(above, [2, 3, 4, 5]) & np.isin(below, [2, 3, 4, 5])
+    assert within.sum() > 100
+    np.testing.assert_array_equal(below[within], np.where(above[within] == 5, 2, above[within] + 1))
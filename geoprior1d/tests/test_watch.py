@@ -0,0 +1,55 @@
+"""Staged live preview (geoprior1d.watch)."""
+
+import copy
+import os
+
+import numpy as np
+import pytest
+from conftest import write_input_copy
+
+from geoprior1d.watch import PreviewCancelled, PreviewSession, feasibility_checks, watch_prior
+
+
+def test_only_changed_stages_are_recomputed(tmp_path, standard_file):
+    config = str(tmp_path / "prior.xlsx")
+    image = str(tmp_path / "preview.png")
+    write_input_copy(config, standard_file)
+    session = PreviewSession(image, Nreals=20, dmax=30)
+
+    first = session.update(config)
+    assert not first['reused'] and os.path.exists(image)
+    assert session.update(config) is None
+
+    def more_resistive(tables):
+        tables['Resistivity']['Resistivity'] *= 2
+    write_input_copy(config, standard_file, more_resistive)
+    update = session.update(config)
+    assert update['changed'] == ['Resistivity'] and update['reused']
+
+    def thicker(tables):
+        tables['Geology1']['Max thickness'] += 1
+    write_input_copy(config, standard_file, thicker)
+    update = session.update(config)
+    assert update['changed'] == ['Geology1', 'Resistivity'] and not update['reused']
+
+
+def test_stale_updates_are_cancelled(tmp_path, standard_file):
+    image = str(tmp_path / "preview.png")
+    with pytest.raises(PreviewCancelled):
+        PreviewSession(image, Nreals=20, dmax=30).update(standard_file, is_stale=lambda: True)
+    assert not os.path.exists(image)
+
+
+def test_feasibility_checks(standard_info):
+    assert feasibility_checks(standard_info) == []
+    info = copy.deepcopy(standard_info)
+    classes = info['Classes']
+    classes['min_thick'] = np.array(classes['min_thick'])
+    classes['min_thick'][0] = classes['max_thick'][0] + 1
+    name = classes['names'][0]
+    assert f"{name}: min thickness exceeds max thickness" in feasibility_checks(info)
+
+
+def test_once_with_missing_input_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        watch_prior(str(tmp_path / "missing.xlsx"), once=True, progress="silent")